@@ -22,6 +22,45 @@ class Settings(BaseModel):
     # Frontend URL
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
     
+    # Search result cache
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+    SEARCH_CACHE_MAX_BYTES: int = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    
+    # On-disk search indexes (semantic vectors etc.)
+    SEARCH_INDEX_DIR: str = os.getenv("SEARCH_INDEX_DIR", "./search_index")
+    
+    # Background notification scheduler
+    NOTIFICATION_SCHEDULER_ENABLED: bool = os.getenv("NOTIFICATION_SCHEDULER_ENABLED", "true").lower() == "true"
+    NOTIFICATION_SCHEDULER_INTERVAL_SECONDS: int = int(os.getenv("NOTIFICATION_SCHEDULER_INTERVAL_SECONDS", "60"))
+    NOTIFICATION_SCHEDULER_JITTER_SECONDS: int = int(os.getenv("NOTIFICATION_SCHEDULER_JITTER_SECONDS", "10"))
+    NOTIFICATION_SCHEDULER_MAX_BACKOFF_SECONDS: int = int(os.getenv("NOTIFICATION_SCHEDULER_MAX_BACKOFF_SECONDS", "900"))
+    NOTIFICATION_SCHEDULER_LEASE_SECONDS: int = int(os.getenv("NOTIFICATION_SCHEDULER_LEASE_SECONDS", "180"))
+    
+    # Notification retention: READ/DISMISSED 알림을 보관 테이블로 옮기기까지의 일수 (0 이면 보관하지 않음)
+    NOTIFICATION_RETENTION_READ_DAYS: int = int(os.getenv("NOTIFICATION_RETENTION_READ_DAYS", "30"))
+    NOTIFICATION_RETENTION_DISMISSED_DAYS: int = int(os.getenv("NOTIFICATION_RETENTION_DISMISSED_DAYS", "7"))
+    NOTIFICATION_ARCHIVE_INTERVAL_SECONDS: int = int(os.getenv("NOTIFICATION_ARCHIVE_INTERVAL_SECONDS", "3600"))
+    NOTIFICATION_ARCHIVE_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_ARCHIVE_BATCH_SIZE", "500"))
+    
+    # Outbound notification delivery (채널은 주소/호스트를 지정해야 켜짐)
+    NOTIFICATION_DELIVERY_ENABLED: bool = os.getenv("NOTIFICATION_DELIVERY_ENABLED", "true").lower() == "true"
+    NOTIFICATION_DELIVERY_INTERVAL_SECONDS: int = int(os.getenv("NOTIFICATION_DELIVERY_INTERVAL_SECONDS", "5"))
+    NOTIFICATION_DELIVERY_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_DELIVERY_BATCH_SIZE", "100"))
+    NOTIFICATION_DELIVERY_MAX_ATTEMPTS: int = int(os.getenv("NOTIFICATION_DELIVERY_MAX_ATTEMPTS", "6"))
+    NOTIFICATION_DELIVERY_BACKOFF_SECONDS: int = int(os.getenv("NOTIFICATION_DELIVERY_BACKOFF_SECONDS", "30"))
+    NOTIFICATION_DELIVERY_MAX_BACKOFF_SECONDS: int = int(os.getenv("NOTIFICATION_DELIVERY_MAX_BACKOFF_SECONDS", "3600"))
+    NOTIFICATION_WEBHOOK_URL: str = os.getenv("NOTIFICATION_WEBHOOK_URL", "")
+    NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS: int = int(os.getenv("NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS", "10"))
+    NOTIFICATION_SMTP_HOST: str = os.getenv("NOTIFICATION_SMTP_HOST", "")
+    NOTIFICATION_SMTP_PORT: int = int(os.getenv("NOTIFICATION_SMTP_PORT", "25"))
+    NOTIFICATION_SMTP_USERNAME: str = os.getenv("NOTIFICATION_SMTP_USERNAME", "")
+    NOTIFICATION_SMTP_PASSWORD: str = os.getenv("NOTIFICATION_SMTP_PASSWORD", "")
+    NOTIFICATION_SMTP_STARTTLS: bool = os.getenv("NOTIFICATION_SMTP_STARTTLS", "false").lower() == "true"
+    NOTIFICATION_EMAIL_FROM: str = os.getenv("NOTIFICATION_EMAIL_FROM", "personal-ops@localhost")
+    NOTIFICATION_EMAIL_TO: list[str] = [
+        address for address in os.getenv("NOTIFICATION_EMAIL_TO", "").split(",") if address
+    ]
+    
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
@@ -0,0 +1,195 @@
+"""
+커밋된 ORM 변경 사항을 구독자에게 전달하는 변경 피드
+
+- 테이블별 쓰기 버전(table version)을 커밋 시점에 증가시킵니다.
+- flush 시점에 변경된 행의 컬럼 값을 스냅샷으로 남기고,
+  커밋이 끝난 뒤 구독자(캐시, 인덱스 등)에게 한 번에 전달합니다.
+- 롤백된 트랜잭션의 변경은 버려집니다.
+
+- log_durably()로 등록한 테이블의 변경은 같은 트랜잭션 안에서 변경 기록 테이블에도 남겨,
+  다른 워커나 재시작한 프로세스가 워터마크 이후의 변경만 따라잡을 수 있게 합니다.
+- version_durably()로 등록한 테이블은 같은 트랜잭션에서 버전 테이블의 행도 올려,
+  다른 워커가 자기 프로세스의 버전만으로는 알 수 없는 쓰기를 DB 에서 확인할 수 있게 합니다.
+
+bulk UPDATE/DELETE 문처럼 ORM 단위 작업을 거치지 않는 쓰기는 감지되지 않습니다.
+"""
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Table, event, inspect, insert
+from sqlalchemy.orm import Session
+
+from app.db.dialects import dialect_insert
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+_PENDING_KEY = "_change_feed_pending"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Change:
+    """
+    커밋된 단일 행 변경 (previous: UPDATE 시 바뀐 컬럼의 이전 값, changed: UPDATE 시 바뀐 컬럼 이름).
+    수정 전에 만료된 컬럼은 이전 값을 알 수 없어 previous 에는 없지만 changed 에는 들어갑니다.
+    """
+    table: str
+    id: Any
+    op: str
+    values: Dict[str, Any] = field(default_factory=dict)
+    previous: Dict[str, Any] = field(default_factory=dict)
+    changed: Tuple[str, ...] = ()
+
+
+_lock = threading.Lock()
+_table_versions: Dict[str, int] = defaultdict(int)
+_subscribers: List[Callable[[List[Change]], None]] = []
+_durable_log: Optional[Table] = None
+_durable_tables: Set[str] = set()
+_version_table: Optional[Table] = None
+_versioned_tables: Set[str] = set()
+
+
+def table_version(table: str) -> int:
+    """테이블의 현재 쓰기 버전"""
+    return _table_versions[table]
+
+
+def table_versions(tables: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+    """여러 테이블의 쓰기 버전 스냅샷 (이름순 정렬)"""
+    with _lock:
+        return tuple((t, _table_versions[t]) for t in sorted(set(tables)))
+
+
+def subscribe(callback: Callable[[List[Change]], None]) -> None:
+    """커밋된 변경 목록을 받을 콜백 등록"""
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+
+def log_durably(log_table: Table, tables: Iterable[str]) -> None:
+    """tables 의 변경을 log_table (table_name, row_id, op, changed_columns 컬럼)에 같은 트랜잭션으로 기록"""
+    global _durable_log
+    _durable_log = log_table
+    _durable_tables.update(tables)
+
+
+def version_durably(version_table: Table, tables: Iterable[str]) -> None:
+    """tables 에 쓰기가 있으면 version_table (table_name, version) 의 행을 같은 트랜잭션으로 1 올림"""
+    global _version_table
+    _version_table = version_table
+    _versioned_tables.update(tables)
+
+
+def _bump_versions(session: Session, tables: Set[str]) -> None:
+    connection = session.connection()
+    statement = dialect_insert(connection, _version_table).values(
+        [{"table_name": table, "version": 1} for table in sorted(tables)]
+    )
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=["table_name"], set_={"version": _version_table.c.version + 1}
+    ))
+
+
+def _snapshot(obj, load: bool) -> Dict[str, Any]:
+    state = inspect(obj)
+    values = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key in state.dict:
+            values[attr.key] = state.dict[attr.key]
+        elif load:
+            # 만료된 컬럼은 구독자가 DB를 다시 읽지 않도록 여기서 로드
+            values[attr.key] = getattr(obj, attr.key)
+    return values
+
+
+def _previous_values(obj) -> Tuple[Dict[str, Any], Tuple[str, ...]]:
+    # after_flush 시점에는 아직 속성 변경 이력이 남아 있습니다
+    state = inspect(obj)
+    previous = {}
+    changed = []
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.deleted:
+            previous[attr.key] = history.deleted[0]
+        if history.added or history.deleted:
+            changed.append(attr.key)
+    return previous, tuple(changed)
+
+
+def _record(session: Session, obj, op: str) -> None:
+    mapper = inspect(obj).mapper
+    table = mapper.local_table.name
+    pk = mapper.primary_key_from_instance(obj)
+    row_id = pk[0] if len(pk) == 1 else tuple(pk)
+    previous, changed = _previous_values(obj) if op == UPDATE else ({}, ())
+    session.info.setdefault(_PENDING_KEY, []).append(Change(
+        table=table, id=row_id, op=op,
+        values=_snapshot(obj, load=op != DELETE),
+        previous=previous,
+        changed=changed
+    ))
+
+
+@event.listens_for(Session, "before_flush")
+def _load_deleted(session, flush_context, instances):
+    # 삭제된 행은 flush 뒤에 다시 읽을 수 없으므로 만료된 컬럼을 미리 로드해 스냅샷에 남깁니다
+    for obj in session.deleted:
+        state = inspect(obj)
+        for key in state.expired_attributes & set(state.mapper.column_attrs.keys()):
+            getattr(obj, key)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    start = len(session.info.get(_PENDING_KEY, ()))
+    for obj in session.new:
+        _record(session, obj, INSERT)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            _record(session, obj, UPDATE)
+    for obj in session.deleted:
+        _record(session, obj, DELETE)
+
+    if _durable_log is not None and _durable_tables:
+        rows = [
+            {"table_name": c.table, "row_id": c.id, "op": c.op, "changed_columns": ",".join(c.changed) or None}
+            for c in session.info.get(_PENDING_KEY, ())[start:]
+            if c.table in _durable_tables
+        ]
+        if rows:
+            session.connection().execute(insert(_durable_log), rows)
+
+    if _version_table is not None:
+        touched = {c.table for c in session.info.get(_PENDING_KEY, ())[start:]} & _versioned_tables
+        if touched:
+            _bump_versions(session, touched)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if not changes:
+        return
+
+    with _lock:
+        for table in {c.table for c in changes}:
+            _table_versions[table] += 1
+
+    for callback in list(_subscribers):
+        try:
+            callback(changes)
+        except Exception:
+            # 이미 커밋된 쓰기를 구독자 오류로 실패시키지 않습니다
+            logger.exception("change feed subscriber failed")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,22 @@
+"""
+DB 방언별 INSERT
+
+충돌 행 건너뛰기/갱신(ON CONFLICT)은 방언마다 구문 모듈이 달라 연결의 방언으로 고릅니다.
+SQLite 와 PostgreSQL 을 지원합니다 (부분 인덱스의 sqlite_where / postgresql_where 와 같은 범위).
+"""
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(connection, table: Table):
+    """연결 방언의 INSERT 구문 (on_conflict_do_nothing / on_conflict_do_update 사용 가능)"""
+    if connection.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    if connection.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"ON CONFLICT 를 지원하지 않는 DB 입니다: {connection.dialect.name}")
+
+
+def insert_ignore(connection, table: Table):
+    """유니크 제약(부분 인덱스 포함)에 걸리는 행은 건너뛰는 INSERT"""
+    return dialect_insert(connection, table).on_conflict_do_nothing()
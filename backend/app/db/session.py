@@ -1,12 +1,67 @@
+import logging
+
 from sqlmodel import SQLModel, create_engine, Session
-from . import init_db
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from . import init_db, changes
 from app.core.config import settings
 
 engine = create_engine(settings.DATABASE_URL, echo=False)
 
+logger = logging.getLogger(__name__)
+
 def get_session():
     with Session(engine) as session:
         yield session
 
+def _ensure_schema():
+    """create_all이 기존 테이블에 추가하지 않는 신규 컬럼/인덱스를 보강합니다.
+
+    새 컬럼은 NULL 허용으로 추가되며, 컬럼 info의 "backfill" SQL이 있으면 추가 직후 실행합니다.
+    """
+    with engine.begin() as conn:
+        # 같은 연결로 조회해야 backfill 로 잠긴 DB를 다른 연결이 기다리지 않습니다
+        inspector = inspect(conn)
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                if column.info.get("backfill"):
+                    conn.execute(text(column.info["backfill"]))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+def _enable_incremental_vacuum(conn):
+    # 새 SQLite DB 는 증분 VACUUM 모드로 만들어 알림 보관 작업이 빈 페이지를 조금씩 돌려줄 수 있게 합니다
+    # (테이블을 만들기 전 같은 연결에서 설정해야 하고, 이미 있는 DB 는 전체 VACUUM 한 번 뒤에야 적용됩니다)
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+
+def _migrate_incremental_vacuum():
+    """증분 VACUUM 모드가 아닌 기존 SQLite DB 를 전체 VACUUM 한 번으로 전환합니다 (이미 전환됐으면 조회 한 번)."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            return
+    try:
+        # VACUUM 은 트랜잭션 밖에서만 실행됩니다
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        logger.info("SQLite DB 를 증분 VACUUM 모드로 전환했습니다")
+    except OperationalError:
+        # 다른 워커가 동시에 전환/쓰기 중이면 다음 시작 때 다시 시도합니다
+        logger.warning("SQLite 증분 VACUUM 전환을 건너뜁니다", exc_info=True)
+
 def init():
-    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        _enable_incremental_vacuum(conn)
+        SQLModel.metadata.create_all(conn)
+    _ensure_schema()
+    _migrate_incremental_vacuum()
@@ -1,59 +1,149 @@
-from sqlmodel import Session, select
-from app.models import Project, Task, Brief, DoD, Review, DecisionLog, Sample
-
-def export_project_markdown(session: Session, project_id: int) -> str:
-    project = session.get(Project, project_id)
-    if not project:
-        raise ValueError("Project not found")
-
-    tasks = project.tasks
-    lines = []
-    lines.append(f"# Project: {project.name}\n")
-    if project.description:
-        lines.append(project.description + "\n")
-    lines.append("## Tasks\n")
-
-    for t in tasks:
-        lines.append(f"### [{t.id}] {t.title} ({t.state})\n")
-        lines.append(f"- Priority: {t.priority}, Due: {t.due_date}\n")
-        lines.append(f"- DoD Checked: {t.dod_checked}\n")
-
-        if t.brief:
-            b = t.brief
-            lines.append("#### 5SB\n")
-            lines.append(f"- Purpose: {b.purpose}\n")
-            lines.append(f"- Success: {b.success_criteria}\n")
-            lines.append(f"- Constraints: {b.constraints}\n")
-            lines.append(f"- Priorities: {b.priorities}\n")
-            lines.append(f"- Validation: {b.validation_method}\n")
-
-        if t.dod:
-            d = t.dod
-            lines.append("#### DoD\n")
-            lines.append(f"- Formats: {d.deliverable_formats}\n")
-            lines.append(f"- Mandatory: {d.mandatory_checks}\n")
-            lines.append(f"- Quality: {d.quality_bar}\n")
-            lines.append(f"- Verification: {d.verification}\n")
-            lines.append(f"- Deadline: {d.deadline}, Version: {d.version_tag}\n")
-
-        decs = t.decision_logs or []
-        if decs:
-            lines.append("#### Decision Logs\n")
-            for dl in decs:
-                lines.append(f"- {dl.date}: {dl.problem} | Reason: {dl.decision_reason} | Risks: {dl.assumptions_risks} | D+7: {dl.d_plus_7_review}\n")
-
-        revs = t.reviews or []
-        if revs:
-            lines.append("#### Reviews\n")
-            for rv in revs:
-                lines.append(f"- {rv.review_type}: + {rv.positives} / - {rv.negatives} / → {rv.changes_next}\n")
-
-        sams = t.samples or []
-        if sams:
-            lines.append("#### Samples\n")
-            for s in sams:
-                lines.append(f"- {int(s.proportion*100)}% | approved={s.approved} | notes={s.notes}\n")
-
-        lines.append("\n")
-
-    return "\n".join(lines)
+"""
+프로젝트 Markdown 내보내기 (GET /exports/project/{id}/md)
+
+작업을 배치로 읽어 조각 단위로 내보냅니다. 5SB, DoD, 의사결정 로그, 회고는 배치마다 selectinload 로
+한 번에 읽으므로 작업 수와 관계없이 배치당 쿼리 수가 같습니다.
+"""
+from typing import Iterator, List
+
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, func, select
+
+from app.db.session import engine
+from app.models import Project, Task, TaskState, Brief, DoD, DecisionLog, Review
+
+# 내보내기에서 한 번에 읽는 작업 수
+EXPORT_BATCH_SIZE = 200
+
+# 작업마다 지연 로딩하지 않도록 배치 단위로 함께 읽는 연관 (테이블마다 IN 쿼리 한 번)
+_TASK_RELATIONS = (
+    selectinload(Task.brief),
+    selectinload(Task.dod),
+    selectinload(Task.decision_logs),
+    selectinload(Task.reviews),
+)
+
+
+def _fmt_date(dt) -> str:
+    if not dt:
+        return "—"
+    # dt is expected to be timezone-aware; fall back to ISO if not
+    try:
+        return dt.date().isoformat()
+    except Exception:
+        return str(dt)
+
+
+def _task_markdown(t: Task) -> str:
+    lines: List[str] = []
+    state_label = t.state.name if hasattr(t.state, 'name') else str(t.state)
+    lines.append(f"### [{state_label}] {t.title}\n")
+    lines.append(f"- Priority: P{getattr(t, 'priority', '—')}\n")
+    lines.append(f"- Due: {_fmt_date(getattr(t, 'due_date', None))}\n")
+    lines.append(f"- DoD: {'✓' if getattr(t, 'dod_checked', False) else '✗'}\n")
+
+    # 5SB (Brief)
+    brief: Brief | None = getattr(t, 'brief', None)
+    if brief:
+        lines.append("- 5SB:\n")
+        lines.append(f"  - Purpose: {brief.purpose}\n")
+        lines.append(f"  - Success: {brief.success_criteria}\n")
+        lines.append(f"  - Constraints: {brief.constraints}\n")
+        lines.append(f"  - Priority: {brief.priority}\n")
+        lines.append(f"  - Validation: {brief.validation}\n")
+
+    # DoD details
+    dod: DoD | None = getattr(t, 'dod', None)
+    if dod:
+        lines.append("- DoD Details:\n")
+        lines.append(f"  - Deliverable Formats: {dod.deliverable_formats}\n")
+        checks = ", ".join(dod.mandatory_checks) if isinstance(dod.mandatory_checks, list) else str(dod.mandatory_checks)
+        lines.append(f"  - Mandatory: {checks}\n")
+        lines.append(f"  - Quality Bar: {dod.quality_bar}\n")
+        lines.append(f"  - Verification: {dod.verification}\n")
+        lines.append(f"  - Deadline: {_fmt_date(getattr(dod, 'deadline', None))}\n")
+        lines.append(f"  - Version: {dod.version_tag}\n")
+
+    # Decision Logs
+    decision_logs: List[DecisionLog] = getattr(t, 'decision_logs', [])
+    if decision_logs:
+        lines.append("- Decision Logs:\n")
+        for dl in decision_logs:
+            lines.append(f"  - Date: {_fmt_date(dl.date)}\n")
+            lines.append(f"    - Problem: {dl.problem}\n")
+            lines.append(f"    - Options: {dl.options}\n")
+            lines.append(f"    - Decision: {dl.decision_reason}\n")
+            lines.append(f"    - Risks: {dl.assumptions_risks}\n")
+            if dl.d_plus_7_review:
+                lines.append(f"    - D+7 Review: {dl.d_plus_7_review}\n")
+
+    # Reviews
+    reviews: List[Review] = getattr(t, 'reviews', [])
+    if reviews:
+        lines.append("- Reviews:\n")
+        for review in reviews:
+            review_type_label = review.review_type.value.replace('_', ' ').title()
+            lines.append(f"  - {review_type_label} ({_fmt_date(review.created_at)}):\n")
+            lines.append(f"    - Positives: {review.positives}\n")
+            lines.append(f"    - Negatives: {review.negatives}\n")
+            lines.append(f"    - Changes for Next: {review.changes_next}\n")
+
+    lines.append("\n")
+    return "".join(lines)
+
+
+def iter_project_markdown(project_id: int, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """
+    프로젝트 Markdown 을 조각으로 내보냅니다 (StreamingResponse 용).
+
+    요청 세션이 아니라 자체 세션을 열고, 작업을 ID 순으로 batch_size 개씩 읽어 배치마다 한 조각을 내보낸 뒤
+    세션에서 비웁니다. 문서 전체를 메모리에 만들지 않습니다.
+    배치마다 쿼리는 작업 1 + 연관 테이블 4 (IN) 로 고정이고, 집계한 작업 수만큼 읽으면 멈추므로
+    전체 쿼리는 2 (프로젝트, 집계) + 5 × ceil(작업 수 / batch_size) 입니다.
+    """
+    with Session(engine) as session:
+        project = session.get(Project, project_id)
+        if not project:
+            return
+
+        header: List[str] = [f"# {project.name}\n\n"]
+        if getattr(project, "description", None):
+            header.append(f"{project.description}\n\n")
+
+        # Overview (작업을 읽지 않고 개수만 집계)
+        total, done = session.exec(
+            select(func.count(Task.id), func.count(Task.id).filter(Task.state == TaskState.DONE))
+            .where(Task.project_id == project_id)
+        ).one()
+        completion = f"{(done/total*100):.1f}%" if total else "0%"
+
+        header.append("## Overview\n")
+        header.append(f"- Created: {_fmt_date(getattr(project, 'created_at', None))}\n")
+        header.append(f"- Tasks: {total}\n")
+        header.append(f"- Completion: {completion}\n\n")
+
+        # Tasks section
+        header.append("## Tasks\n")
+        if not total:
+            header.append("(no tasks)\n\n")
+        yield "".join(header)
+
+        last_id = 0
+        exported = 0
+        while exported < total:
+            tasks = session.exec(
+                select(Task)
+                .options(*_TASK_RELATIONS)
+                .where(Task.project_id == project_id, Task.id > last_id)
+                .order_by(Task.id)
+                .limit(batch_size)
+            ).all()
+            if not tasks:
+                break
+            last_id = tasks[-1].id
+            exported += len(tasks)
+            yield "".join(_task_markdown(t) for t in tasks)
+            # 내보낸 배치는 세션에서 비워 메모리를 일정하게 유지
+            session.expunge_all()
+            if len(tasks) < batch_size:
+                break
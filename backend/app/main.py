@@ -1,14 +1,34 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.db.session import init, get_session
+from app.services.notification_scheduler import notification_scheduler
+from app.services.notification_delivery import notification_delivery
+from app.services.saved_searches import saved_search_percolation
 from app.routers import projects, tasks, briefs, dod, decisions, reviews, samples, exports, dashboard, notifications, search, templates, collaboration
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 백그라운드 알림 생성 (워커가 여러 개여도 DB 임대를 가진 하나만 실행)
+    if settings.NOTIFICATION_SCHEDULER_ENABLED:
+        notification_scheduler.start()
+    # 저장된 검색 대조 (워커마다, 스케줄러 설정과 무관하게 ChangeLog 를 따라잡음)
+    saved_search_percolation.start()
+    # 외부 발송 (웹훅/이메일 채널이 설정된 경우에만 돎)
+    if settings.NOTIFICATION_DELIVERY_ENABLED:
+        notification_delivery.start()
+    yield
+    await saved_search_percolation.stop()
+    await notification_delivery.stop()
+    await notification_scheduler.stop()
+
 def create_app():
     app = FastAPI(
         title=settings.APP_NAME,
         description="개인 업무 관리 시스템 - WIP 제한, 5SB, DoD, KPI 대시보드",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
     
     # CORS 설정 - 환경별로 분리
@@ -1,8 +1,8 @@
-from datetime import datetime, date, timezone
+from datetime import datetime, date, timedelta, timezone
 from enum import Enum
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, JSON, event
+from sqlalchemy import Column, Index, JSON, LargeBinary, event, text
 
 class TaskState(str, Enum):
     BACKLOG = "BACKLOG"
@@ -23,6 +23,13 @@ class NotificationType(str, Enum):
     MISSING_DOD = "MISSING_DOD"
     STALE_TASK = "STALE_TASK"
     REVIEW_SCHEDULE = "REVIEW_SCHEDULE"
+    SAVED_SEARCH_MATCH = "SAVED_SEARCH_MATCH"
+    DIGEST = "DIGEST"
+    DECISION_REVIEW_DUE = "DECISION_REVIEW_DUE"
+
+class DeliveryStatus(str, Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
 
 class NotificationStatus(str, Enum):
     PENDING = "PENDING"
@@ -99,6 +106,8 @@ class Project(SQLModel, table=True):
     owner_id: int = Field(foreign_key="user.id", index=True)
     is_private: bool = Field(default=True)  # 비공개/공개 프로젝트
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # 근접 중복 탐지용 MinHash 서명 (이름 + 설명, 쓰기 시 계산)
+    minhash: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary), exclude=True)
     
     # Relationships
     owner: Optional[User] = Relationship(back_populates="owned_projects")
@@ -175,6 +184,12 @@ class DoD(SQLModel, table=True):
         sa_relationship_kwargs={"uselist": False}
     )
 
+DECISION_REVIEW_DAYS = 7
+DECISION_REVIEW_DUE_BACKFILL = f"""
+UPDATE decisionlog SET review_due_on = date("date", '+{DECISION_REVIEW_DAYS} days')
+WHERE d_plus_7_review IS NULL OR d_plus_7_review = ''
+"""
+
 class DecisionLog(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     task_id: int = Field(foreign_key="task.id")
@@ -184,7 +199,14 @@ class DecisionLog(SQLModel, table=True):
     decision_reason: str
     assumptions_risks: str
     d_plus_7_review: Optional[str] = None
+    # D+7 리뷰 예정일 (리뷰가 없으면 date + 7일, 작성되면 None). 리뷰 대기 큐로 쓰는 인덱스 컬럼
+    review_due_on: Optional[date] = Field(
+        default=None, index=True,
+        sa_column_kwargs={"info": {"backfill": DECISION_REVIEW_DUE_BACKFILL}},
+    )
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # 근접 중복 탐지용 MinHash 서명 (문제 정의, 쓰기 시 계산)
+    minhash: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary), exclude=True)
     task: Optional[Task] = Relationship(back_populates="decision_logs")
 
 class Review(SQLModel, table=True):
@@ -206,7 +228,55 @@ class Sample(SQLModel, table=True):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     task: Optional[Task] = Relationship(back_populates="samples")
 
+class ChangeLog(SQLModel, table=True):
+    """검색 색인 등 파생 데이터를 워커 간/재시작 후 따라잡기 위한 행 변경 기록"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    table_name: str
+    row_id: int
+    op: str  # insert / update / delete
+    # update 일 때 바뀐 컬럼 이름 (쉼표 구분, 이 컬럼이 생기기 전 기록은 None)
+    changed_columns: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class ChangeLogConsumer(SQLModel, table=True):
+    """ChangeLog 를 빠짐없이 처리해야 하는 소비자의 워터마크. ChangeLog 는 가장 느린 소비자 아래로만 지웁니다"""
+    name: str = Field(primary_key=True)
+    applied_id: int = 0
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class TableVersion(SQLModel, table=True):
+    """테이블별 쓰기 버전. 쓰기와 같은 트랜잭션에서 올라가 다른 워커의 캐시도 무효화합니다 (db.changes.version_durably)"""
+    table_name: str = Field(primary_key=True)
+    version: int = 0
+
+# dedupe_key 컬럼 추가 시 기존 활성 알림에 키를 채웁니다 (같은 대상/타입 중 가장 최근 알림 하나만)
+NOTIFICATION_DEDUPE_BACKFILL = """
+UPDATE notification SET dedupe_key = type || ':' || COALESCE(task_id, '') || ':' || COALESCE(project_id, '') || ':'
+    || CASE WHEN type = 'DUE_DATE_REMINDER'
+            THEN COALESCE((SELECT due_date FROM task WHERE task.id = notification.task_id), '')
+            ELSE '' END
+WHERE type != 'SAVED_SEARCH_MATCH' AND id IN (
+    SELECT MAX(id) FROM notification WHERE status IN ('PENDING', 'SENT') GROUP BY type, task_id, project_id
+)
+"""
+
 class Notification(SQLModel, table=True):
+    # 활성(PENDING, SENT) 알림 중 같은 dedupe_key 는 하나만 허용 (동시 생성 경쟁에서도 중복 방지)
+    __table_args__ = (
+        Index(
+            "ux_notification_dedupe_key_active", "dedupe_key", unique=True,
+            sqlite_where=text("status IN ('PENDING', 'SENT')"),
+            postgresql_where=text("status IN ('PENDING', 'SENT')"),
+        ),
+        # 목록 키셋 페이지네이션 (created_at, id) 과 필터별 변형, 상태별 개수(GROUP BY status)
+        Index("ix_notification_created_id", "created_at", "id"),
+        Index("ix_notification_status_created_id", "status", "created_at", "id"),
+        Index("ix_notification_type_created_id", "type", "created_at", "id"),
+        Index("ix_notification_project_created_id", "project_id", "created_at", "id"),
+        # 발송기 sync: 예약 시각이 지난 대기 알림
+        Index("ix_notification_status_scheduled", "status", "scheduled_for"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     type: NotificationType
     title: str
@@ -216,6 +286,13 @@ class Notification(SQLModel, table=True):
     # Optional task/project association
     task_id: Optional[int] = Field(default=None, foreign_key="task.id")
     project_id: Optional[int] = Field(default=None, foreign_key="project.id")
+    # 특정 사용자 대상 알림 (저장된 검색 등), None 이면 전체 대상
+    user_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
+    # "타입:task_id:project_id:활성 구간" (services.notifications.dedupe_key), None 이면 중복 검사 안 함
+    dedupe_key: Optional[str] = Field(
+        default=None,
+        sa_column_kwargs={"info": {"backfill": NOTIFICATION_DEDUPE_BACKFILL}},
+    )
     
     # Scheduling
     scheduled_for: datetime
@@ -230,11 +307,85 @@ class Notification(SQLModel, table=True):
     task: Optional[Task] = Relationship()
     project: Optional[Project] = Relationship()
 
+class NotificationArchive(SQLModel, table=True):
+    """보존 기간이 지난 읽음/해제 알림 (services.notification_retention). 조회에 필요한 컬럼만 남깁니다."""
+    # 원래 알림 ID
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": False})
+    type: NotificationType
+    status: NotificationStatus
+    title: str
+    message: str
+    task_id: Optional[int] = None
+    project_id: Optional[int] = None
+    user_id: Optional[int] = None
+    created_at: datetime
+    # 읽은/해제한 시각
+    closed_at: Optional[datetime] = None
+    archived_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class NotificationDigest(SQLModel, table=True):
+    """
+    여러 작업 알림을 묶은 다이제스트 (services.notification_digests)
+    
+    알림 테이블에는 type=DIGEST 알림 하나만 두고, 묶인 작업 ID는 정렬 후 증분 varint 로 압축해 저장합니다.
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    notification_id: int = Field(foreign_key="notification.id", unique=True)
+    project_id: Optional[int] = Field(default=None, foreign_key="project.id", index=True)
+    member_type: NotificationType
+    window_start: datetime
+    member_count: int = Field(default=0)
+    member_task_ids: bytes = Field(default=b"", sa_column=Column(LargeBinary))
+
+class NotificationDelivery(SQLModel, table=True):
+    """알림 외부 발송 대기열 (알림 x 채널마다 한 행, services.notification_delivery)"""
+    __table_args__ = (
+        # 발송할 차례가 된 행 (status, next_attempt_at) 범위 조회
+        Index("ix_notificationdelivery_due", "status", "channel", "next_attempt_at"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    notification_id: int = Field(foreign_key="notification.id", index=True)
+    channel: str
+    status: DeliveryStatus = Field(default=DeliveryStatus.PENDING)
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    last_error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class NotificationDeadLetter(SQLModel, table=True):
+    """재시도 한도를 넘었거나 영구 실패한 발송 (보낸 내용과 마지막 오류를 남김)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    notification_id: int = Field(index=True)
+    channel: str
+    attempts: int
+    last_error: Optional[str] = None
+    payload: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
+    failed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class SavedSearch(SQLModel, table=True):
+    """사용자별 저장된 검색. 새로 쓰인 콘텐츠가 검색어와 일치하면 알림을 만듭니다."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    name: str
+    query: str
+    # 비어 있으면 전체 콘텐츠 타입
+    content_types: List[str] = Field(default=[], sa_column=Column(JSON))
+    is_active: bool = Field(default=True)
+    last_matched_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
 class NotificationSettings(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     
     # Due date reminders
     due_date_reminder_days: int = Field(default=1)  # Days before due date
+    # 알림 발송 시각 (UTC 시), 예: 1일 전 09:00
+    due_date_reminder_hour: int = Field(
+        default=9, ge=0, le=23,
+        sa_column_kwargs={"info": {"backfill": "UPDATE notificationsettings SET due_date_reminder_hour = 9"}},
+    )
     enable_due_date_reminders: bool = Field(default=True)
     
     # Missing components alerts
@@ -249,9 +400,68 @@ class NotificationSettings(SQLModel, table=True):
     enable_review_reminders: bool = Field(default=True)
     review_reminder_frequency_days: int = Field(default=7)  # Weekly reviews
     
+    # Decision log D+7 review reminders
+    enable_decision_review_reminders: bool = Field(
+        default=True,
+        sa_column_kwargs={"info": {"backfill": "UPDATE notificationsettings SET enable_decision_review_reminders = 1"}},
+    )
+    
+    # Digests: 같은 프로젝트/타입 알림이 한 번에 digest_min_items 개 이상 생기면 구간(분)마다 하나로 묶음 (0 이면 끔)
+    digest_interval_minutes: int = Field(
+        default=0,
+        sa_column_kwargs={"info": {"backfill": "UPDATE notificationsettings SET digest_interval_minutes = 0"}},
+    )
+    digest_min_items: int = Field(
+        default=10,
+        sa_column_kwargs={"info": {"backfill": "UPDATE notificationsettings SET digest_min_items = 10"}},
+    )
+    
+    # 설정이나 덮어쓰기가 바뀔 때마다 1씩 증가 (워커별 설정 캐시가 이 값으로 갱신 여부를 판단)
+    version: int = Field(
+        default=1,
+        sa_column_kwargs={"info": {"backfill": "UPDATE notificationsettings SET version = 1"}},
+    )
+    
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class NotificationSettingsOverride(SQLModel, table=True):
+    """프로젝트 또는 사용자(작업 담당자)별 알림 설정 덮어쓰기. values 에 있는 항목만 전체 설정 대신 씁니다."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # 둘 중 하나만 지정
+    project_id: Optional[int] = Field(default=None, foreign_key="project.id", unique=True)
+    user_id: Optional[int] = Field(default=None, foreign_key="user.id", unique=True)
+    values: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class NotificationCheck(SQLModel, table=True):
+    """
+    알림 조건을 다시 평가할 작업/프로젝트와 평가 시각
+    
+    작업/5SB/DoD/리뷰/프로젝트가 바뀌면 같은 트랜잭션에서 check_at=현재 시각으로 기록되고,
+    시간이 지나야 성립하는 조건(마감 임박, 장기 미진행, 리뷰 주기)은 성립 시각으로 예약됩니다.
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    task_id: Optional[int] = Field(default=None, index=True)
+    project_id: Optional[int] = Field(default=None, index=True)
+    check_at: datetime = Field(index=True)
+
+class NotificationGenerationState(SQLModel, table=True):
+    """증분 알림 생성 상태 (단일 행)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # 마지막 전체 평가 때의 NotificationSettings.version (설정이 바뀌면 전체 평가를 다시 합니다)
+    settings_version: Optional[int] = None
+    full_run_at: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
+
+class SchedulerLease(SQLModel, table=True):
+    """여러 워커 중 하나만 주기 작업을 실행하도록 하는 DB 임대(lease) 행"""
+    name: str = Field(primary_key=True)
+    owner: str
+    expires_at: datetime
+    acquired_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
 @event.listens_for(Task, "before_update", propagate=True)
 def _task_timestamp_before_update(mapper, connection, target):
     # Auto-update the updated_at timestamp to UTC on any Task change
@@ -262,6 +472,14 @@ def _notification_timestamp_before_update(mapper, connection, target):
     # Auto-update the updated_at timestamp to UTC on any Notification change
     target.updated_at = datetime.now(timezone.utc)
 
+@event.listens_for(DecisionLog, "before_insert", propagate=True)
+@event.listens_for(DecisionLog, "before_update", propagate=True)
+def _decision_review_due_on(mapper, connection, target):
+    # D+7 리뷰를 작성하기 전까지만 리뷰 대기 큐(review_due_on)에 둡니다
+    target.review_due_on = (
+        None if target.d_plus_7_review else target.date + timedelta(days=DECISION_REVIEW_DAYS)
+    )
+
 class Template(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
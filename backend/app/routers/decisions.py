@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
 from app.db.session import get_session
 from app.models import DecisionLog, Task
 from app.schemas import DecisionLogCreate, DecisionLogReviewUpdate
+from app.services.near_duplicates import find_near_duplicates
 
 router = APIRouter(prefix="/decisions", tags=["decisions"])
 
@@ -14,12 +17,26 @@ def create_decision(payload: DecisionLogCreate, session: Session = Depends(get_s
     d = DecisionLog(task_id=payload.task_id, date=payload.date, problem=payload.problem,
                     options=payload.options, decision_reason=payload.decision_reason, assumptions_risks=payload.assumptions_risks)
     session.add(d); session.commit(); session.refresh(d)
-    return {"id": d.id}
+    # 이미 내린 결정과 거의 같은 문제인지 확인
+    return {"id": d.id, "near_duplicates": find_near_duplicates(session, "decisions", row_id=d.id)}
 
 @router.get("", response_model=list[DecisionLog])
 def list_decisions(session: Session = Depends(get_session)):
     return session.exec(select(DecisionLog)).all()
 
+@router.get("/due-reviews", response_model=list[DecisionLog])
+def list_due_reviews(
+    on: Optional[date] = Query(None, description="이 날짜까지 D+7 리뷰 예정일이 된 결정 (기본: 오늘, UTC)"),
+    project_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    session: Session = Depends(get_session)
+):
+    """D+7 리뷰를 아직 작성하지 않았고 리뷰 예정일(결정일 + 7일)이 지난 결정들을 예정일 순으로 가져옵니다."""
+    query = select(DecisionLog).where(DecisionLog.review_due_on <= (on or datetime.now(timezone.utc).date()))
+    if project_id is not None:
+        query = query.join(Task, Task.id == DecisionLog.task_id).where(Task.project_id == project_id)
+    return session.exec(query.order_by(DecisionLog.review_due_on, DecisionLog.id).limit(limit)).all()
+
 @router.get("/task/{task_id}", response_model=list[DecisionLog])
 def get_decisions_by_task(task_id: int, session: Session = Depends(get_session)):
     return session.exec(select(DecisionLog).where(DecisionLog.task_id == task_id)).all()
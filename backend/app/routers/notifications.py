@@ -1,28 +1,79 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlmodel import Session, select
-from datetime import datetime, timezone
 
 from app.db.session import get_session
-from app.models import Notification, NotificationSettings, NotificationStatus
+from app.models import (
+    NotificationSettingsOverride, NotificationStatus, NotificationType, Project, User
+)
 from app.services.notifications import NotificationService
+from app.services.content_stats import content_stats
+from app.services.notification_delivery import notification_delivery
+from app.services.notification_digests import expand_digest
+from app.services.notification_scheduler import notification_scheduler
+from app.services.notification_settings import (
+    SettingsOverrideValues, bump_version, delete_override, get_or_create_settings_row, notification_settings,
+    save_override, validate_override_values
+)
+from app.services.saved_searches import saved_search_percolation
+from app.services.notification_events import (
+    HEARTBEAT_SECONDS, RESUME_LIMIT, format_event, notification_broker
+)
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+# 일괄 처리 대상 (주어진 조건을 모두 만족하는 알림, 최소 하나는 필요)
+class BulkNotificationRequest(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=10000)
+    status: Optional[NotificationStatus] = None
+    type: Optional[NotificationType] = None
+    project_id: Optional[int] = None
+    task_id: Optional[int] = None
+    older_than_days: Optional[int] = Field(None, ge=0)
+
+# 프로젝트/사용자별 알림 설정 덮어쓰기 (지정한 항목만 전체 설정 대신 사용, 항목 검증은 서비스와 공유)
+class NotificationSettingsOverrideRequest(SettingsOverrideValues):
+    pass
+
+def _bulk_conditions(payload: BulkNotificationRequest) -> list:
+    if all(value is None for value in payload.model_dump().values()):
+        raise HTTPException(400, "일괄 처리할 알림 조건(ids, status, type, project_id, task_id, older_than_days)이 필요합니다.")
+    return NotificationService.filter_conditions(
+        ids=payload.ids,
+        status=payload.status,
+        notification_type=payload.type,
+        project_id=payload.project_id,
+        task_id=payload.task_id,
+        older_than_days=payload.older_than_days
+    )
+
 @router.get("/", response_model=List[dict])
 def get_notifications(
+    response: Response,
     status: NotificationStatus = None,
-    limit: int = 50,
+    type: Optional[NotificationType] = None,
+    project_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
     session: Session = Depends(get_session)
 ):
-    """알림 목록을 가져옵니다."""
-    query = select(Notification).order_by(Notification.created_at.desc())
+    """
+    알림 목록을 최신순으로 가져옵니다.
     
-    if status:
-        query = query.where(Notification.status == status)
-    
-    query = query.limit(limit)
-    notifications = session.exec(query).all()
+    다음 페이지가 있으면 X-Next-Cursor 응답 헤더에 커서를 담습니다.
+    """
+    conditions = NotificationService.filter_conditions(
+        status=status, notification_type=type, project_id=project_id
+    )
+    try:
+        notifications, next_cursor = NotificationService(session).list_notifications(conditions, limit, cursor)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     return [
         {
@@ -33,6 +84,7 @@ def get_notifications(
             "status": n.status,
             "task_id": n.task_id,
             "project_id": n.project_id,
+            "user_id": n.user_id,
             "scheduled_for": n.scheduled_for.isoformat(),
             "sent_at": n.sent_at.isoformat() if n.sent_at else None,
             "read_at": n.read_at.isoformat() if n.read_at else None,
@@ -42,6 +94,61 @@ def get_notifications(
         for n in notifications
     ]
 
+async def _event_stream(last_event_id: Optional[int]):
+    seq, last_id = await notification_broker.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        resume_from = last_event_id
+        while True:
+            if resume_from is not None:
+                # 재연결(Last-Event-ID) 또는 버퍼보다 뒤처진 경우: 알림 테이블에서 이어 읽기
+                seq = notification_broker.seq
+                while True:
+                    batch = await asyncio.to_thread(notification_broker.resume, resume_from)
+                    for event_id, text in batch:
+                        yield text
+                        resume_from = event_id
+                    if len(batch) < RESUME_LIMIT:
+                        break
+                last_id = max(last_id, resume_from)
+                resume_from = None
+            
+            events = await notification_broker.wait(seq, HEARTBEAT_SECONDS)
+            if events is None:
+                resume_from = last_id
+                continue
+            if not events:
+                yield ": heartbeat\n\n"
+                continue
+            for event_seq, event_id, name, data in events:
+                seq = event_seq
+                if event_id is not None:
+                    # 이어 읽기로 이미 보낸 알림은 건너뜁니다
+                    if event_id <= last_id:
+                        continue
+                    last_id = event_id
+                yield format_event(event_id, name, data)
+    finally:
+        notification_broker.unsubscribe()
+
+@router.get("/stream")
+async def stream_notifications(
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    since: Optional[int] = Query(None, description="이 알림 ID 이후부터 (Last-Event-ID 헤더 대신)")
+):
+    """
+    새 알림을 Server-Sent Events 로 실시간 전송합니다.
+    
+    - event: notification (id = 알림 ID), event: sent (예약 알림 발송, data.ids)
+    - HEARTBEAT_SECONDS 마다 주석 줄로 연결 유지
+    - Last-Event-ID 헤더(또는 since)로 재연결하면 그 이후 알림부터 이어서 받습니다
+    """
+    return StreamingResponse(
+        _event_stream(last_event_id if last_event_id is not None else since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/pending", response_model=List[dict])
 def get_pending_notifications(session: Session = Depends(get_session)):
     """대기중인 알림들을 가져옵니다."""
@@ -57,6 +164,7 @@ def get_pending_notifications(session: Session = Depends(get_session)):
             "status": n.status,
             "task_id": n.task_id,
             "project_id": n.project_id,
+            "user_id": n.user_id,
             "scheduled_for": n.scheduled_for.isoformat(),
             "created_at": n.created_at.isoformat(),
         }
@@ -64,16 +172,30 @@ def get_pending_notifications(session: Session = Depends(get_session)):
     ]
 
 @router.post("/generate")
-def generate_notifications(session: Session = Depends(get_session)):
+def generate_notifications(
+    full: bool = Query(False, description="바뀐 대상만이 아니라 전체 작업/프로젝트를 다시 평가"),
+    session: Session = Depends(get_session)
+):
     """새로운 알림들을 생성합니다."""
     service = NotificationService(session)
-    notifications = service.generate_all_notifications()
+    count = service.generate_all_notifications(full=full)
     
     return {
-        "message": f"{len(notifications)}개의 새로운 알림이 생성되었습니다.",
-        "count": len(notifications)
+        "message": f"{count}개의 새로운 알림이 생성되었습니다.",
+        "count": count
     }
 
+@router.get("/{notification_id}/digest", response_model=dict)
+def get_notification_digest(
+    notification_id: int,
+    session: Session = Depends(get_session)
+):
+    """다이제스트 알림에 묶인 작업 목록을 펼쳐 가져옵니다."""
+    digest = expand_digest(session, notification_id)
+    if digest is None:
+        raise HTTPException(404, "다이제스트 알림을 찾을 수 없습니다.")
+    return digest
+
 @router.patch("/{notification_id}/mark-read")
 def mark_notification_read(
     notification_id: int,
@@ -94,23 +216,28 @@ def dismiss_notification(
     service.dismiss_notification(notification_id)
     return {"message": "알림이 해제되었습니다."}
 
+@router.post("/bulk/mark-read")
+def bulk_mark_read(payload: BulkNotificationRequest, session: Session = Depends(get_session)):
+    """조건에 맞는 알림들을 한 번에 읽음으로 표시합니다."""
+    updated = NotificationService(session).bulk_update_status(_bulk_conditions(payload), NotificationStatus.READ)
+    return {"message": f"{updated}개의 알림이 읽음으로 표시되었습니다.", "updated": updated}
+
+@router.post("/bulk/dismiss")
+def bulk_dismiss(payload: BulkNotificationRequest, session: Session = Depends(get_session)):
+    """조건에 맞는 알림들을 한 번에 해제합니다."""
+    updated = NotificationService(session).bulk_update_status(_bulk_conditions(payload), NotificationStatus.DISMISSED)
+    return {"message": f"{updated}개의 알림이 해제되었습니다.", "updated": updated}
+
+@router.post("/bulk/delete")
+def bulk_delete(payload: BulkNotificationRequest, session: Session = Depends(get_session)):
+    """조건에 맞는 알림들을 한 번에 삭제합니다. (예: 30일 지난 READ 알림)"""
+    deleted = NotificationService(session).bulk_delete(_bulk_conditions(payload))
+    return {"message": f"{deleted}개의 알림이 삭제되었습니다.", "deleted": deleted}
+
 @router.get("/settings", response_model=dict)
 def get_notification_settings(session: Session = Depends(get_session)):
     """알림 설정을 가져옵니다."""
-    service = NotificationService(session)
-    settings = service.get_or_create_settings()
-    
-    return {
-        "id": settings.id,
-        "due_date_reminder_days": settings.due_date_reminder_days,
-        "enable_due_date_reminders": settings.enable_due_date_reminders,
-        "enable_missing_brief_alerts": settings.enable_missing_brief_alerts,
-        "enable_missing_dod_alerts": settings.enable_missing_dod_alerts,
-        "stale_task_days": settings.stale_task_days,
-        "enable_stale_task_alerts": settings.enable_stale_task_alerts,
-        "enable_review_reminders": settings.enable_review_reminders,
-        "review_reminder_frequency_days": settings.review_reminder_frequency_days,
-    }
+    return NotificationService(session).get_settings().as_dict()
 
 @router.patch("/settings", response_model=dict)
 def update_notification_settings(
@@ -118,63 +245,92 @@ def update_notification_settings(
     session: Session = Depends(get_session)
 ):
     """알림 설정을 업데이트합니다."""
-    service = NotificationService(session)
-    settings = service.get_or_create_settings()
+    # 허용된 필드만, 항목 타입/범위를 검증한 뒤 업데이트 (덮어쓰기 저장과 같은 검증)
+    try:
+        values = validate_override_values(settings_update)
+    except ValueError as exc:
+        raise HTTPException(422, str(exc))
+    settings = get_or_create_settings_row(session)
+    for field, value in values.items():
+        setattr(settings, field, value)
     
-    # 허용된 필드만 업데이트
-    allowed_fields = {
-        'due_date_reminder_days', 'enable_due_date_reminders',
-        'enable_missing_brief_alerts', 'enable_missing_dod_alerts',
-        'stale_task_days', 'enable_stale_task_alerts',
-        'enable_review_reminders', 'review_reminder_frequency_days'
-    }
-    
-    for field, value in settings_update.items():
-        if field in allowed_fields and hasattr(settings, field):
-            setattr(settings, field, value)
-    
-    settings.updated_at = datetime.now(timezone.utc)
+    # version 을 올려 다른 워커의 설정 캐시도 갱신되게 합니다
+    bump_version(session)
     session.commit()
-    session.refresh(settings)
+    notification_settings.invalidate()
     
     return {
         "message": "알림 설정이 업데이트되었습니다.",
-        "settings": {
-            "id": settings.id,
-            "due_date_reminder_days": settings.due_date_reminder_days,
-            "enable_due_date_reminders": settings.enable_due_date_reminders,
-            "enable_missing_brief_alerts": settings.enable_missing_brief_alerts,
-            "enable_missing_dod_alerts": settings.enable_missing_dod_alerts,
-            "stale_task_days": settings.stale_task_days,
-            "enable_stale_task_alerts": settings.enable_stale_task_alerts,
-            "enable_review_reminders": settings.enable_review_reminders,
-            "review_reminder_frequency_days": settings.review_reminder_frequency_days,
-        }
+        "settings": notification_settings.get(session).as_dict()
     }
 
+def _override_scope(scope: str, scope_id: int, session: Session) -> dict:
+    model = Project if scope == "project" else User
+    if not session.get(model, scope_id):
+        raise HTTPException(404, "프로젝트를 찾을 수 없습니다." if scope == "project" else "사용자를 찾을 수 없습니다.")
+    return {"project_id": scope_id} if scope == "project" else {"user_id": scope_id}
+
+def _override_payload(override: NotificationSettingsOverride) -> dict:
+    return {
+        "id": override.id,
+        "project_id": override.project_id,
+        "user_id": override.user_id,
+        "values": override.values,
+        "updated_at": override.updated_at.isoformat(),
+    }
+
+@router.get("/settings/overrides", response_model=List[dict])
+def get_notification_settings_overrides(session: Session = Depends(get_session)):
+    """프로젝트/사용자별 알림 설정 덮어쓰기 목록을 가져옵니다."""
+    overrides = session.exec(select(NotificationSettingsOverride).order_by(NotificationSettingsOverride.id)).all()
+    return [_override_payload(override) for override in overrides]
+
+@router.put("/settings/overrides/{scope}/{scope_id}", response_model=dict)
+def save_notification_settings_override(
+    scope: Literal["project", "user"],
+    scope_id: int,
+    payload: NotificationSettingsOverrideRequest,
+    session: Session = Depends(get_session)
+):
+    """프로젝트 또는 사용자(작업 담당자)의 알림 설정 덮어쓰기를 저장합니다. 지정한 항목만 전체 설정 대신 씁니다."""
+    scope_filter = _override_scope(scope, scope_id, session)
+    try:
+        override = save_override(session, payload.model_dump(exclude_none=True), **scope_filter)
+    except ValueError as exc:
+        raise HTTPException(422, str(exc))
+    return {"message": "알림 설정 덮어쓰기가 저장되었습니다.", "override": _override_payload(override)}
+
+@router.delete("/settings/overrides/{scope}/{scope_id}", response_model=dict)
+def delete_notification_settings_override(
+    scope: Literal["project", "user"],
+    scope_id: int,
+    session: Session = Depends(get_session)
+):
+    """프로젝트 또는 사용자의 알림 설정 덮어쓰기를 삭제합니다."""
+    scope_filter = {"project_id": scope_id} if scope == "project" else {"user_id": scope_id}
+    if not delete_override(session, **scope_filter):
+        raise HTTPException(404, "알림 설정 덮어쓰기를 찾을 수 없습니다.")
+    return {"message": "알림 설정 덮어쓰기가 삭제되었습니다."}
+
+@router.get("/admin/scheduler", response_model=dict)
+def get_scheduler_stats():
+    """백그라운드 알림 스케줄러의 실행 횟수, 소요 시간, 임대 상태와 저장된 검색 대조 상태를 가져옵니다."""
+    return {**notification_scheduler.stats(), "saved_search_percolation": saved_search_percolation.stats()}
+
+@router.post("/admin/archive", response_model=dict)
+def archive_notifications():
+    """보존 기간이 지난 읽음/해제 알림을 지금 보관 테이블로 옮깁니다."""
+    return notification_scheduler.archive_once()
+
+@router.get("/admin/delivery", response_model=dict)
+def get_delivery_stats(session: Session = Depends(get_session)):
+    """외부 발송 워커 상태와 채널별 발송/재시도/대기/dead letter 수를 가져옵니다."""
+    return notification_delivery.stats(session)
+
 @router.get("/stats", response_model=dict)
 def get_notification_stats(session: Session = Depends(get_session)):
     """알림 통계를 가져옵니다."""
-    pending_count = session.exec(
-        select(Notification).where(Notification.status == NotificationStatus.PENDING)
-    ).all()
-    
-    sent_count = session.exec(
-        select(Notification).where(Notification.status == NotificationStatus.SENT)
-    ).all()
-    
-    read_count = session.exec(
-        select(Notification).where(Notification.status == NotificationStatus.READ)
-    ).all()
-    
-    dismissed_count = session.exec(
-        select(Notification).where(Notification.status == NotificationStatus.DISMISSED)
-    ).all()
-    
-    return {
-        "pending": len(pending_count),
-        "sent": len(sent_count),
-        "read": len(read_count),
-        "dismissed": len(dismissed_count),
-        "total": len(pending_count) + len(sent_count) + len(read_count) + len(dismissed_count)
-    }
\ No newline at end of file
+    counts = content_stats.counts(session)
+    stats = {s.value.lower(): counts.get(f"notifications.{s.value}", 0) for s in NotificationStatus}
+    stats["total"] = counts.get("notifications", 0)
+    return stats
\ No newline at end of file
@@ -1,13 +1,24 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlmodel import Session, select
 
 from app.db.session import get_session
 from app.services.search import SearchService
-from app.models import Project
+from app.services.search_cache import search_cache
+from app.services.near_duplicates import find_near_duplicates, DEFAULT_THRESHOLD
+from app.services.suggest import suggest_index, MAX_SUGGESTIONS
+from app.services.saved_searches import PERCOLATED_TYPES, query_terms
+from app.models import Project, SavedSearch, User
 
 router = APIRouter(prefix="/search", tags=["search"])
 
+class SavedSearchCreate(BaseModel):
+    user_id: int
+    name: str
+    query: str
+    content_types: List[str] = []
+
 @router.get("/")
 def unified_search(
     q: str = Query(..., description="검색어", min_length=2),
@@ -17,6 +28,8 @@ def unified_search(
         regex="^(projects|tasks|briefs|dod|decisions|reviews)$"
     ),
     limit: int = Query(50, description="결과 제한 수", ge=1, le=200),
+    fuzzy: bool = Query(False, description="오타 허용 검색"),
+    mode: str = Query("keyword", description="검색 방식", regex="^(keyword|semantic)$"),
     session: Session = Depends(get_session)
 ):
     """
@@ -27,9 +40,11 @@ def unified_search(
     - **q**: 검색어 (최소 2글자)
     - **types**: 검색할 콘텐츠 타입 리스트 (기본값: 전체)
     - **limit**: 결과 제한 수 (기본값: 50)
+    - **fuzzy**: true 이면 trigram 색인으로 오타를 허용해 검색
+    - **mode**: keyword (부분 문자열, 기본값) 또는 semantic (표현이 비슷한 항목을 임베딩 유사도로 검색)
     """
     service = SearchService(session)
-    return service.unified_search(q, types, limit)
+    return service.unified_search(q, types, limit, fuzzy, mode)
 
 @router.get("/similar-projects/{project_id}")
 def find_similar_projects(
@@ -55,6 +70,7 @@ def find_similar_projects(
 def get_decision_patterns(
     q: str = Query(..., description="문제 상황 검색어", min_length=3),
     limit: int = Query(10, description="결과 제한 수", ge=1, le=50),
+    mode: str = Query("keyword", description="검색 방식", regex="^(keyword|semantic)$"),
     session: Session = Depends(get_session)
 ):
     """
@@ -64,11 +80,58 @@ def get_decision_patterns(
     
     - **q**: 문제 상황 검색어
     - **limit**: 결과 제한 수 (기본값: 10)
+    - **mode**: keyword (기본값) 또는 semantic (비슷한 표현의 문제도 검색)
     """
     service = SearchService(session)
     return {
         "query": q,
-        "decision_patterns": service.get_decision_patterns(q, limit)
+        "decision_patterns": service.get_decision_patterns(q, limit, mode)
+    }
+
+@router.get("/near-duplicates")
+def get_near_duplicates(
+    type: str = Query("decisions", description="대상 콘텐츠 타입", pattern="^(decisions|projects)$"),
+    text: Optional[str] = Query(None, description="비교할 텍스트", min_length=2),
+    id: Optional[int] = Query(None, description="기준 행 ID (text 대신 사용)"),
+    threshold: float = Query(DEFAULT_THRESHOLD, description="최소 유사도 (Jaccard 추정치)", ge=0.1, le=1.0),
+    limit: int = Query(10, description="결과 제한 수", ge=1, le=50),
+    session: Session = Depends(get_session)
+):
+    """
+    근접 중복 찾기
+    
+    MinHash/LSH 색인으로 거의 같은 의사결정 문제 정의나 프로젝트를 찾습니다.
+    
+    - **type**: decisions 또는 projects
+    - **text** / **id**: 비교 기준 (둘 중 하나 필수)
+    - **threshold**: 최소 유사도 (기본값: 0.8)
+    """
+    if text is None and id is None:
+        raise HTTPException(status_code=400, detail="text 또는 id 중 하나가 필요합니다.")
+    
+    return {
+        "type": type,
+        "threshold": threshold,
+        "near_duplicates": find_near_duplicates(session, type, text=text, row_id=id, threshold=threshold, limit=limit)
+    }
+
+@router.get("/suggest")
+def suggest(
+    prefix: str = Query(..., description="입력 중인 검색어 접두사", min_length=1, max_length=100),
+    limit: int = Query(8, description="종류별 결과 수", ge=1, le=MAX_SUGGESTIONS),
+    session: Session = Depends(get_session)
+):
+    """
+    검색어 자동완성
+    
+    프로젝트 이름, 작업 제목, 템플릿 이름, 템플릿 태그 중 단어가 접두사로 시작하는 항목을
+    종류별 인기도 순으로 반환합니다 (템플릿: 사용 횟수, 작업: 최근 수정, 프로젝트: 최근 생성).
+    메모리 색인에서 응답하므로 키 입력마다 호출해도 됩니다.
+    """
+    suggest_index.ensure_built(session)
+    return {
+        "prefix": prefix,
+        "suggestions": suggest_index.suggest(prefix, limit=limit)
     }
 
 @router.get("/suggestions/{project_id}")
@@ -115,6 +178,57 @@ def get_project_suggestions(
         }
     }
 
+@router.post("/saved")
+def create_saved_search(payload: SavedSearchCreate, session: Session = Depends(get_session)):
+    """
+    검색 저장
+    
+    이후 새로 생성/수정되는 프로젝트, 작업, 5SB, 의사결정, 리뷰가 검색어의 모든 단어를 포함하면
+    해당 사용자에게 알림(SAVED_SEARCH_MATCH)이 생성됩니다.
+    """
+    if not session.get(User, payload.user_id):
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    if not query_terms(payload.query):
+        raise HTTPException(status_code=400, detail="검색어에 단어가 없습니다")
+    invalid = set(payload.content_types) - PERCOLATED_TYPES
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 콘텐츠 타입: {', '.join(sorted(invalid))}")
+    
+    saved = SavedSearch(**payload.model_dump())
+    session.add(saved)
+    session.commit()
+    session.refresh(saved)
+    return saved
+
+@router.get("/saved", response_model=List[SavedSearch])
+def list_saved_searches(
+    user_id: int = Query(..., description="사용자 ID"),
+    session: Session = Depends(get_session)
+):
+    """사용자의 저장된 검색 목록"""
+    return session.exec(
+        select(SavedSearch).where(SavedSearch.user_id == user_id).order_by(SavedSearch.created_at.desc())
+    ).all()
+
+@router.delete("/saved/{saved_search_id}")
+def delete_saved_search(saved_search_id: int, session: Session = Depends(get_session)):
+    """저장된 검색 삭제"""
+    saved = session.get(SavedSearch, saved_search_id)
+    if not saved:
+        raise HTTPException(status_code=404, detail="저장된 검색을 찾을 수 없습니다")
+    session.delete(saved)
+    session.commit()
+    return {"ok": True}
+
+@router.get("/cache/stats")
+def get_search_cache_stats():
+    """
+    검색 결과 캐시 통계
+    
+    캐시 적중/미스, 무효화, 축출 횟수와 현재 사용량을 제공합니다.
+    """
+    return search_cache.stats()
+
 @router.get("/stats")
 def get_search_stats(session: Session = Depends(get_session)):
     """
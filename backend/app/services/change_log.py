@@ -0,0 +1,109 @@
+"""
+ChangeLog 따라잡기 커서
+
+메모리 색인은 같은 프로세스의 쓰기를 변경 피드로 바로 반영하지만, 다른 워커의 쓰기는 볼 수 없습니다.
+색인마다 ChangeLogCursor 를 두고 조회 전에 워터마크 이후 바뀐 행 ID 만 읽어 다시 반영합니다
+(text_index._catch_up 과 같은 방식, 최대 CHECK_SECONDS 마다 한 번).
+
+ChangeLog 는 text_index 가 세그먼트를 합칠 때 오래된 행을 지우므로, 커서의 워터마크 이후 구간이
+이미 지워졌으면 pending() 이 None 을 돌려주고 색인은 전체를 다시 만들어야 합니다.
+
+전체를 다시 만들 수 없는 소비자(알림을 만드는 저장된 검색 대조 등)는 ChangeLogConsumer 행에 워터마크를
+저장합니다. 재시작해도 이어서 읽고, ChangeLog 는 가장 느린 소비자의 워터마크 아래로만 지워집니다.
+워터마크는 처리 결과와 같은 트랜잭션에서 compare-and-set 으로 올려, 여러 워커가 같은 구간을 처리해도
+한 워커의 결과만 커밋됩니다.
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import update
+from sqlmodel import Session, func, select
+
+from app.db import changes
+from app.db.dialects import insert_ignore
+from app.models import ChangeLog, ChangeLogConsumer
+
+CHECK_SECONDS = 2
+
+
+class ChangeLogCursor:
+    def __init__(self, tables: Iterable[str], check_seconds: float = CHECK_SECONDS):
+        self.tables = set(tables)
+        self.check_seconds = check_seconds
+        self.applied_id = 0
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        changes.log_durably(ChangeLog.__table__, self.tables)
+
+    def start(self, session: Session) -> None:
+        """전체 색인 직전에 호출: 현재 워터마크부터 따라잡습니다 (스캔 중 변경은 다음 pending 에서 다시 반영)"""
+        with self._lock:
+            self.applied_id = session.exec(select(func.max(ChangeLog.id))).one() or 0
+            self._checked_at = time.monotonic()
+
+    def pending(self, session: Session, force: bool = False) -> Optional[Dict[str, Set[int]]]:
+        """
+        워터마크 이후 바뀐 {테이블: 행 ID 집합}. 확인 주기 전이면 빈 dict.
+        워터마크 이후 구간이 이미 지워졌으면 None (전체 재색인 필요)
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._checked_at < self.check_seconds:
+                return {}
+            self._checked_at = time.monotonic()
+            first_id, last_id = session.exec(select(func.min(ChangeLog.id), func.max(ChangeLog.id))).one()
+            if last_id is None or last_id < self.applied_id or first_id > self.applied_id + 1:
+                # 로그가 비었거나(지워진 뒤 ID 재사용 포함) 워터마크 바로 다음 행이 없으면 놓친 변경이 있을 수 있음
+                reset = self.applied_id > 0 or (first_id is not None and first_id > 1)
+                self.applied_id = last_id or 0
+                if reset:
+                    return None
+                if last_id is None:
+                    return {}
+            if last_id == self.applied_id:
+                return {}
+            rows = session.exec(
+                select(ChangeLog.table_name, ChangeLog.row_id)
+                .where(
+                    ChangeLog.id > self.applied_id,
+                    ChangeLog.id <= last_id,
+                    ChangeLog.table_name.in_(self.tables)
+                )
+                .distinct()
+            ).all()
+            self.applied_id = last_id
+        changed: Dict[str, Set[int]] = defaultdict(set)
+        for table_name, row_id in rows:
+            changed[table_name].add(row_id)
+        return changed
+
+
+def consumer_position(session: Session, name: str) -> int:
+    """소비자의 워터마크. 처음이면 현재 마지막 ChangeLog ID 로 등록합니다 (등록 전 변경은 처리하지 않음)."""
+    applied_id = session.exec(select(ChangeLogConsumer.applied_id).where(ChangeLogConsumer.name == name)).first()
+    if applied_id is not None:
+        return applied_id
+    connection = session.connection()
+    connection.execute(
+        insert_ignore(connection, ChangeLogConsumer.__table__)
+        .values(name=name, applied_id=select(func.coalesce(func.max(ChangeLog.id), 0)).scalar_subquery())
+    )
+    session.commit()
+    return session.exec(select(ChangeLogConsumer.applied_id).where(ChangeLogConsumer.name == name)).one()
+
+
+def advance_consumer(session: Session, name: str, applied_id: int, last_id: int) -> bool:
+    """워터마크가 아직 applied_id 이면 last_id 로 올립니다 (커밋은 호출자가 함). 다른 워커가 먼저 올렸으면 False."""
+    result = session.connection().execute(
+        update(ChangeLogConsumer.__table__)
+        .where(ChangeLogConsumer.name == name, ChangeLogConsumer.applied_id == applied_id)
+        .values(applied_id=last_id, updated_at=datetime.now(timezone.utc))
+    )
+    return result.rowcount == 1
+
+
+def min_consumer_position(session: Session) -> Optional[int]:
+    """가장 느린 소비자의 워터마크 (소비자가 없으면 None)"""
+    return session.exec(select(func.min(ChangeLogConsumer.applied_id))).one()
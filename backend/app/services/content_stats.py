@@ -0,0 +1,169 @@
+"""
+콘텐츠 개수 통계 서비스
+
+여러 COUNT 쿼리를 UNION ALL 한 번으로 모아 읽고, 이후에는 메모리의 카운터를 커밋된 ORM
+변경(변경 피드)으로 증감합니다. ORM을 거치지 않는 bulk 쓰기나 다른 워커의 쓰기로 생기는 오차는
+주기적인 재집계(RECONCILE_SECONDS)로 바로잡습니다.
+
+카운터는 (모델, 동등 조건) 으로 정의해 SQL 조건과 변경 행 판정에 같은 정의를 씁니다.
+같은 열거형 컬럼 하나로 나뉘는 카운터들(알림 상태별, 템플릿 카테고리별)은 GROUP BY 한 번으로 셉니다.
+"""
+import enum
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import String, cast, event, literal, union_all
+from sqlmodel import Session, func, select
+
+from app.db import changes
+from app.models import (
+    Project, Task, Brief, DoD, DecisionLog, Review,
+    Notification, NotificationStatus, Template, TemplateCategory
+)
+
+RECONCILE_SECONDS = 300
+
+# 카운터 이름 -> (모델, {컬럼: 값})
+COUNTERS: Dict[str, Tuple[Any, Dict[str, Any]]] = {
+    "projects": (Project, {}),
+    "tasks": (Task, {}),
+    "briefs": (Brief, {}),
+    "dod": (DoD, {}),
+    "decisions": (DecisionLog, {}),
+    "reviews": (Review, {}),
+    "notifications": (Notification, {}),
+    **{
+        f"notifications.{s.value}": (Notification, {"status": s})
+        for s in NotificationStatus
+    },
+    "templates": (Template, {}),
+    "templates.system": (Template, {"is_system_template": True}),
+    "templates.ai_generated": (Template, {"is_ai_generated": True}),
+    **{
+        f"templates.category.{c.value}": (Template, {"category": c})
+        for c in TemplateCategory
+    },
+}
+
+_TABLE_COUNTERS: Dict[str, List[str]] = {}
+for _name, (_model, _conditions) in COUNTERS.items():
+    _TABLE_COUNTERS.setdefault(_model.__tablename__, []).append(_name)
+
+
+def _group_key(conditions: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    # 열거형 컬럼 하나에 대한 조건이면 (컬럼, 저장된 값) - 열거형은 이름으로 저장됩니다
+    if len(conditions) == 1:
+        (column, expected), = conditions.items()
+        if isinstance(expected, enum.Enum):
+            return column, expected.name
+    return None
+
+
+# GROUP BY 로 셀 카운터: "테이블.컬럼" -> (모델, 컬럼, {저장된 값: 카운터 이름})
+_GROUPED_COUNTERS: Dict[str, Tuple[Any, str, Dict[str, str]]] = {}
+for _name, (_model, _conditions) in COUNTERS.items():
+    _key = _group_key(_conditions)
+    if _key is not None:
+        _group = _GROUPED_COUNTERS.setdefault(
+            f"{_model.__tablename__}.{_key[0]}", (_model, _key[0], {})
+        )
+        _group[2][_key[1]] = _name
+
+
+def _track_previous_values():
+    # 만료된 속성을 바로 덮어써도 UPDATE 이전 값이 변경 피드에 남도록 이전 값을 로드하게 합니다
+    for model, conditions in COUNTERS.values():
+        for column in conditions:
+            attribute = getattr(model, column)
+            if not event.contains(attribute, "set", _noop_set):
+                event.listen(attribute, "set", _noop_set, active_history=True)
+
+
+def _noop_set(target, value, oldvalue, initiator):
+    return value
+
+
+_track_previous_values()
+
+
+def _matches(conditions: Dict[str, Any], values: Dict[str, Any]) -> bool:
+    return all(values.get(column) == expected for column, expected in conditions.items())
+
+
+class ContentStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Optional[Dict[str, int]] = None
+        self._reconciled_at = 0.0
+
+    def _count_query(self):
+        selects = []
+        for name, (model, conditions) in COUNTERS.items():
+            if _group_key(conditions) is not None:
+                continue
+            query = select(
+                literal(name).label("name"), cast(literal(None), String).label("value"), func.count().label("count")
+            ).select_from(model)
+            for column, expected in conditions.items():
+                query = query.where(getattr(model, column) == expected)
+            selects.append(query)
+        for group, (model, column, _) in _GROUPED_COUNTERS.items():
+            attribute = getattr(model, column)
+            selects.append(
+                select(literal(group), cast(attribute, String), func.count())
+                .select_from(model)
+                .group_by(attribute)
+            )
+        return union_all(*selects)
+
+    def reconcile(self, session: Session) -> Dict[str, int]:
+        """UNION ALL 한 번으로 전체 카운터를 다시 집계"""
+        counts = {name: 0 for name in COUNTERS}
+        for name, value, count in session.exec(self._count_query()).all():
+            if value is None and name in COUNTERS:
+                counts[name] = count
+            elif name in _GROUPED_COUNTERS:
+                counter = _GROUPED_COUNTERS[name][2].get(value)
+                if counter is not None:
+                    counts[counter] = count
+        with self._lock:
+            self._counts = counts
+            self._reconciled_at = time.monotonic()
+            return dict(counts)
+
+    def invalidate(self) -> None:
+        """다음 조회 때 다시 집계 (ORM을 거치지 않는 bulk 쓰기 후 호출)"""
+        with self._lock:
+            self._counts = None
+
+    def counts(self, session: Session) -> Dict[str, int]:
+        with self._lock:
+            fresh = self._counts is not None and time.monotonic() - self._reconciled_at < RECONCILE_SECONDS
+            if fresh:
+                return dict(self._counts)
+        return self.reconcile(session)
+
+    def on_changes(self, batch: List[changes.Change]) -> None:
+        with self._lock:
+            if self._counts is None:
+                return
+            for change in batch:
+                names = _TABLE_COUNTERS.get(change.table)
+                if not names:
+                    continue
+                before = {**change.values, **change.previous}
+                for name in names:
+                    _, conditions = COUNTERS[name]
+                    if change.op == changes.INSERT:
+                        delta = _matches(conditions, change.values)
+                    elif change.op == changes.DELETE:
+                        delta = -_matches(conditions, change.values)
+                    else:
+                        delta = _matches(conditions, change.values) - _matches(conditions, before)
+                    if delta:
+                        self._counts[name] = self._counts.get(name, 0) + delta
+
+
+content_stats = ContentStats()
+changes.subscribe(content_stats.on_changes)
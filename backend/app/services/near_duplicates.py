@@ -0,0 +1,294 @@
+"""
+MinHash 서명 + LSH 밴딩 기반 근접 중복 탐지
+
+- 서명: 정규화한 텍스트의 문자 3-gram 집합에 대한 128개 MinHash 값 (uint32)
+- 저장: Project / DecisionLog 의 `minhash` 컬럼에 쓰기 시점에 계산해 저장
+- 색인: 16 band x 8 row LSH. 같은 band 버킷에 걸린 후보만 비교하므로
+  전체 행과 비교하지 않고 후보를 찾습니다 (Jaccard 0.7 부근에서 후보 확률이 급격히 증가).
+- 같은 프로세스의 쓰기는 변경 피드로, 다른 워커의 쓰기는 조회 전에 ChangeLog 로 따라잡습니다.
+"""
+import logging
+import random
+import threading
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, event, inspect, update
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from app.db import changes
+from app.models import Project, DecisionLog
+from app.services.change_log import ChangeLogCursor
+from app.services.text import normalize
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+
+_PRIME = (1 << 61) - 1
+_MASK = 0xFFFFFFFF
+_rng = random.Random(20240101)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+logger = logging.getLogger(__name__)
+
+# 콘텐츠 타입 -> (모델, 서명 대상 텍스트 필드)
+KINDS = {
+    "decisions": (DecisionLog, ("problem",)),
+    "projects": (Project, ("name", "description")),
+}
+
+
+def _shingles(text: str) -> Set[int]:
+    text = " ".join(normalize(text).split())
+    if not text:
+        return set()
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {
+        zlib.crc32(text[i:i + SHINGLE_SIZE].encode("utf-8"))
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def compute_signature(text: str) -> Optional[bytes]:
+    """텍스트의 MinHash 서명 (NUM_PERM개 uint32를 직렬화한 bytes)"""
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    signature = array("I", (
+        min((a * x + b) % _PRIME for x in shingles) & _MASK
+        for a, b in _PERMUTATIONS
+    ))
+    return signature.tobytes()
+
+
+def _decode(signature: bytes) -> Tuple[int, ...]:
+    return tuple(array("I", signature))
+
+
+def _text_of(obj: Any, fields: Tuple[str, ...]) -> str:
+    return " ".join(getattr(obj, f) or "" for f in fields)
+
+
+def _joined(texts) -> str:
+    return " ".join(t or "" for t in texts)
+
+
+def estimate_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """두 서명의 일치 비율 = Jaccard 유사도 추정치"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+# ---- 쓰기 시 서명 계산 ----
+def _register_signature_listeners(model, fields):
+    @event.listens_for(model, "before_insert", propagate=True)
+    def _sign_before_insert(mapper, connection, target):
+        target.minhash = compute_signature(_text_of(target, fields))
+
+    @event.listens_for(model, "before_update", propagate=True)
+    def _sign_before_update(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[f].history.has_changes() for f in fields):
+            target.minhash = compute_signature(_text_of(target, fields))
+
+
+for _model, _fields in KINDS.values():
+    _register_signature_listeners(_model, _fields)
+
+
+class LSHIndex:
+    """콘텐츠 타입별 LSH 밴딩 색인"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built: Set[str] = set()
+        self._signatures: Dict[str, Dict[int, Tuple[int, ...]]] = defaultdict(dict)
+        self._buckets: Dict[str, List[Dict[Tuple[int, ...], Set[int]]]] = {
+            kind: [defaultdict(set) for _ in range(BANDS)] for kind in KINDS
+        }
+        self._tables = {model.__tablename__: kind for kind, (model, _) in KINDS.items()}
+        self._cursor = ChangeLogCursor(self._tables)
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for band in range(BANDS):
+            yield band, signature[band * ROWS:(band + 1) * ROWS]
+
+    def _add(self, kind: str, row_id: int, signature: Tuple[int, ...]) -> None:
+        self._remove(kind, row_id)
+        self._signatures[kind][row_id] = signature
+        for band, key in self._bands(signature):
+            self._buckets[kind][band][key].add(row_id)
+
+    def _remove(self, kind: str, row_id: int) -> None:
+        signature = self._signatures[kind].pop(row_id, None)
+        if signature is None:
+            return
+        for band, key in self._bands(signature):
+            bucket = self._buckets[kind][band].get(key)
+            if bucket is not None:
+                bucket.discard(row_id)
+                if not bucket:
+                    del self._buckets[kind][band][key]
+
+    def on_changes(self, batch: List[changes.Change]) -> None:
+        with self._lock:
+            for change in batch:
+                kind = self._tables.get(change.table)
+                if kind is None or kind not in self._built:
+                    continue
+                signature = change.values.get("minhash")
+                if change.op == changes.DELETE or not signature:
+                    self._remove(kind, change.id)
+                else:
+                    self._add(kind, change.id, _decode(signature))
+
+    def _load(self, session: Session, kind: str, row_ids: Optional[Set[int]] = None) -> Set[int]:
+        """행의 서명을 색인에 넣고 찾은 ID 를 반환합니다 (서명이 없는 기존 행은 계산해 따로 저장)"""
+        model, fields = KINDS[kind]
+        query = select(model.id, model.minhash, *[getattr(model, f) for f in fields])
+        if row_ids is not None:
+            query = query.where(model.id.in_(list(row_ids)))
+        found = set()
+        missing = []
+        for row_id, signature, *texts in session.exec(query).all():
+            found.add(row_id)
+            if signature is None:
+                signature = compute_signature(_joined(texts))
+                if signature is None:
+                    self._remove(kind, row_id)
+                    continue
+                missing.append({"row_id": row_id, "minhash": signature})
+            self._add(kind, row_id, _decode(signature))
+        if missing:
+            self._store_signatures(session, model, missing)
+        return found
+
+    def _store_signatures(self, session: Session, model, missing: List[Dict[str, Any]]) -> None:
+        # 조회 요청의 세션은 커밋하지 않고 별도 세션으로 저장합니다 (실패해도 다음 색인 때 다시 계산)
+        table = model.__table__
+        try:
+            with Session(session.get_bind()) as writer:
+                writer.connection().execute(
+                    update(table).where(table.c.id == bindparam("row_id")).values(minhash=bindparam("minhash")),
+                    missing
+                )
+                writer.commit()
+        except OperationalError:
+            logger.warning("minhash backfill skipped for %s", table.name, exc_info=True)
+
+    def ensure_built(self, session: Session, kind: str) -> None:
+        """처음 사용할 때 서명 컬럼에서 색인을 만들고, 이후에는 다른 워커의 변경을 따라잡습니다."""
+        with self._lock:
+            if kind in self._built:
+                changed = self._cursor.pending(session)
+                if changed is None:
+                    # 놓친 변경이 있을 수 있어 전체를 다시 만듭니다
+                    self._built.clear()
+                    for k in KINDS:
+                        self._signatures[k].clear()
+                        self._buckets[k] = [defaultdict(set) for _ in range(BANDS)]
+                else:
+                    for table_name, row_ids in changed.items():
+                        changed_kind = self._tables[table_name]
+                        if changed_kind in self._built:
+                            for row_id in row_ids - self._load(session, changed_kind, row_ids):
+                                self._remove(changed_kind, row_id)
+                    return
+            if not self._built:
+                self._cursor.start(session)
+            self._load(session, kind)
+            self._built.add(kind)
+
+    def query(
+        self,
+        kind: str,
+        signature: Tuple[int, ...],
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 10,
+        exclude_id: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """LSH 후보 중 추정 유사도가 threshold 이상인 (id, similarity) 목록"""
+        with self._lock:
+            candidates: Set[int] = set()
+            for band, key in self._bands(signature):
+                candidates.update(self._buckets[kind][band].get(key, ()))
+            candidates.discard(exclude_id)
+
+            scored = []
+            for row_id in candidates:
+                similarity = estimate_similarity(signature, self._signatures[kind][row_id])
+                if similarity >= threshold:
+                    scored.append((row_id, similarity))
+
+        scored.sort(key=lambda x: (-x[1], x[0]))
+        return scored[:limit]
+
+
+lsh_index = LSHIndex()
+changes.subscribe(lsh_index.on_changes)
+
+
+def _format(kind: str, row: Any, similarity: float) -> Dict[str, Any]:
+    if kind == "decisions":
+        return {
+            "id": row.id,
+            "type": "decision",
+            "task_id": row.task_id,
+            "problem": row.problem,
+            "decision": row.decision_reason,
+            "date": row.date.isoformat(),
+            "similarity": round(similarity, 3),
+        }
+    return {
+        "id": row.id,
+        "type": "project",
+        "name": row.name,
+        "description": row.description,
+        "created_at": row.created_at.isoformat(),
+        "similarity": round(similarity, 3),
+    }
+
+
+def find_near_duplicates(
+    session: Session,
+    kind: str,
+    text: Optional[str] = None,
+    row_id: Optional[int] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+    limit: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    근접 중복 후보 찾기
+
+    Args:
+        kind: 'decisions' 또는 'projects'
+        text: 비교할 텍스트 (row_id 대신 사용)
+        row_id: 기준 행 ID (자기 자신은 결과에서 제외)
+    """
+    model, fields = KINDS[kind]
+    lsh_index.ensure_built(session, kind)
+
+    if row_id is not None:
+        row = session.get(model, row_id)
+        if not row:
+            return []
+        signature = row.minhash or compute_signature(_text_of(row, fields))
+    else:
+        signature = compute_signature(text or "")
+    if not signature:
+        return []
+
+    matches = lsh_index.query(kind, _decode(signature), threshold, limit, exclude_id=row_id)
+    if not matches:
+        return []
+
+    rows = {r.id: r for r in session.exec(
+        select(model).where(model.id.in_([m[0] for m in matches]))
+    ).all()}
+    return [_format(kind, rows[i], s) for i, s in matches if i in rows]
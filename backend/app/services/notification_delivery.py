@@ -0,0 +1,458 @@
+"""
+알림 외부 발송 (웹훅 / SMTP 이메일)
+
+발송기(notification_dispatcher)가 알림을 SENT 로 바꾸는 같은 트랜잭션에서 설정된 채널마다
+NotificationDelivery 행(발송 대기열)을 한 번에 추가하고, 이 모듈의 asyncio 워커가 대기열을 비웁니다.
+요청 처리와는 별개의 태스크라 API 부하와 관계없이 발송됩니다.
+
+- 채널별로 차례가 된 행을 BATCH_SIZE 개씩 읽어 한 번에 보냅니다 (웹훅은 POST 한 번, 이메일은 메시지 한 통).
+  채널들은 서로 다른 스레드에서 동시에 보냅니다.
+- 채널은 연결을 재사용합니다 (HTTP keep-alive, SMTP 세션). 재사용하던 연결이 끊겼으면 한 번 다시 연결합니다.
+- 대기열 정리(지워진 알림의 행 삭제)는 먼저 커밋하고 트랜잭션 밖에서 보낸 뒤, 결과를 짧은 트랜잭션 하나로
+  반영합니다. 네트워크 I/O 동안 DB 쓰기 잠금을 잡지 않습니다 (결과 반영 전에 죽으면 다음 주기에 다시 보냄).
+- 결과는 배치 단위로 반영합니다: 성공은 UPDATE 한 번(status=SENT, sent_at), 실패는 시도 횟수별 UPDATE 로
+  지수 백오프 후 재시도, 재시도 한도를 넘거나 영구 실패(4xx, 5xx SMTP 응답)면 NotificationDeadLetter 로 옮깁니다.
+- 여러 워커가 떠 있어도 SchedulerLease 임대를 가진 워커 하나만 발송합니다.
+- 채널은 register_channel 로 더 붙일 수 있습니다 (DeliveryChannel 구현).
+"""
+import asyncio
+import http.client
+import json
+import logging
+import os
+import random
+import smtplib
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from sqlalchemy import delete, insert, update
+from sqlmodel import Session, func, select
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models import DeliveryStatus, Notification, NotificationDeadLetter, NotificationDelivery
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.notification_events import notification_payload
+from app.services.notification_scheduler import acquire_lease, release_lease
+
+LEASE_NAME = "notification-delivery"
+LEASE_SECONDS = 60
+# 한 번 깨어났을 때 채널마다 보내는 최대 배치 수 (나머지는 다음 주기)
+MAX_BATCHES_PER_RUN = 50
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    """발송 실패. permanent 면 재시도하지 않고 바로 dead letter 로 옮깁니다."""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class DeliveryChannel:
+    """발송 채널. send_batch 는 배치 전체를 보내고, 실패하면 예외를 던집니다."""
+    name = ""
+
+    def send_batch(self, payloads: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class WebhookChannel(DeliveryChannel):
+    """배치를 JSON 으로 POST 합니다: {"notifications": [...]} (수신 측은 알림 id 로 중복을 거르면 됩니다)"""
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float):
+        parts = urlsplit(url)
+        self._connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        )
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._timeout = timeout
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def send_batch(self, payloads: List[Dict[str, Any]]) -> None:
+        body = json.dumps({"notifications": payloads}, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        while True:
+            reused = self._connection is not None
+            if self._connection is None:
+                self._connection = self._connection_class(self._host, self._port, timeout=self._timeout)
+            try:
+                self._connection.request("POST", self._path, body=body, headers=headers)
+                response = self._connection.getresponse()
+                response.read()
+            except (http.client.HTTPException, OSError) as exc:
+                self.close()
+                if reused:
+                    continue
+                raise DeliveryError(f"{type(exc).__name__}: {exc}")
+            if response.will_close:
+                self.close()
+            if response.status >= 400:
+                permanent = response.status < 500 and response.status not in (408, 429)
+                raise DeliveryError(f"HTTP {response.status} {response.reason}", permanent=permanent)
+            return
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class EmailChannel(DeliveryChannel):
+    """배치를 한 통의 메일로 보냅니다 (SMTP 세션 재사용)."""
+    name = "email"
+
+    def __init__(
+        self, host: str, port: int, sender: str, recipients: List[str],
+        username: str = "", password: str = "", starttls: bool = False, timeout: float = 10
+    ):
+        self._host = host
+        self._port = port
+        self._sender = sender
+        self._recipients = recipients
+        self._username = username
+        self._password = password
+        self._starttls = starttls
+        self._timeout = timeout
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def _session(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self._host, self._port, timeout=self._timeout)
+            if self._starttls:
+                smtp.starttls()
+            if self._username:
+                smtp.login(self._username, self._password)
+            self._smtp = smtp
+        return self._smtp
+
+    def _message(self, payloads: List[Dict[str, Any]]) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self._sender
+        message["To"] = ", ".join(self._recipients)
+        message["Subject"] = (
+            payloads[0]["title"] if len(payloads) == 1 else f"[Personal Ops] 알림 {len(payloads)}건"
+        )
+        message.set_content("\n\n".join(f"{p['title']}\n{p['message']}" for p in payloads))
+        return message
+
+    def send_batch(self, payloads: List[Dict[str, Any]]) -> None:
+        message = self._message(payloads)
+        while True:
+            reused = self._smtp is not None
+            try:
+                self._session().send_message(message)
+                return
+            except smtplib.SMTPServerDisconnected as exc:
+                self.close()
+                if reused:
+                    continue
+                raise DeliveryError(f"SMTPServerDisconnected: {exc}")
+            except smtplib.SMTPResponseException as exc:
+                self.close()
+                raise DeliveryError(f"SMTP {exc.smtp_code} {exc.smtp_error!r}", permanent=exc.smtp_code >= 500)
+            except smtplib.SMTPRecipientsRefused as exc:
+                raise DeliveryError(f"SMTPRecipientsRefused: {list(exc.recipients)}", permanent=True)
+            except (smtplib.SMTPException, OSError) as exc:
+                self.close()
+                raise DeliveryError(f"{type(exc).__name__}: {exc}")
+
+    def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+
+
+def build_channels() -> List[DeliveryChannel]:
+    """설정(NOTIFICATION_WEBHOOK_URL, NOTIFICATION_SMTP_HOST + NOTIFICATION_EMAIL_TO)으로 켜진 채널"""
+    channels: List[DeliveryChannel] = []
+    if settings.NOTIFICATION_WEBHOOK_URL:
+        channels.append(WebhookChannel(settings.NOTIFICATION_WEBHOOK_URL, settings.NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS))
+    if settings.NOTIFICATION_SMTP_HOST and settings.NOTIFICATION_EMAIL_TO:
+        channels.append(EmailChannel(
+            settings.NOTIFICATION_SMTP_HOST,
+            settings.NOTIFICATION_SMTP_PORT,
+            sender=settings.NOTIFICATION_EMAIL_FROM,
+            recipients=settings.NOTIFICATION_EMAIL_TO,
+            username=settings.NOTIFICATION_SMTP_USERNAME,
+            password=settings.NOTIFICATION_SMTP_PASSWORD,
+            starttls=settings.NOTIFICATION_SMTP_STARTTLS,
+        ))
+    return channels
+
+
+class NotificationDeliveryWorker:
+    def __init__(
+        self, engine, channels: List[DeliveryChannel], batch_size: int, interval: int,
+        max_attempts: int, backoff: int, max_backoff: int
+    ):
+        self.engine = engine
+        self.channels: Dict[str, DeliveryChannel] = {channel.name: channel for channel in channels}
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._is_leader = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def register_channel(self, channel: DeliveryChannel) -> None:
+        self.channels[channel.name] = channel
+
+    def _channel_stats(self, name: str) -> Dict[str, Any]:
+        return self._stats.setdefault(name, {
+            "batches": 0, "sent": 0, "retried": 0, "dead_lettered": 0, "last_error": None, "last_sent_at": None,
+        })
+
+    # ---- 대기열 추가 (발송기 트랜잭션 안에서) ----
+    def enqueue(self, session: Session, notification_ids: List[int]) -> None:
+        if not self.channels or not notification_ids:
+            return
+        now = datetime.now(timezone.utc)
+        session.connection().execute(insert(NotificationDelivery.__table__), [
+            {
+                "notification_id": notification_id,
+                "channel": name,
+                "status": DeliveryStatus.PENDING,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+            }
+            for name in self.channels
+            for notification_id in notification_ids
+        ])
+
+    def on_dispatched(self, notification_ids: List[int]) -> None:
+        """발송 트랜잭션이 커밋된 뒤 워커를 깨웁니다 (커밋 전에 깨우면 새 행을 못 보고 다시 잠듦)."""
+        if self.channels:
+            self.wake()
+
+    def wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ---- 발송 (워커 스레드) ----
+    def _retry_delay(self, attempts: int) -> timedelta:
+        delay = min(self.backoff * (2 ** (attempts - 1)), self.max_backoff)
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    def deliver_batch(self, name: str) -> int:
+        """채널의 차례가 된 대기열 행을 한 배치 보내고 처리한 행 수를 반환합니다."""
+        channel = self.channels[name]
+        now = datetime.now(timezone.utc)
+        with Session(self.engine) as session:
+            due = session.exec(
+                select(NotificationDelivery.id, NotificationDelivery.notification_id, NotificationDelivery.attempts)
+                .where(
+                    NotificationDelivery.status == DeliveryStatus.PENDING,
+                    NotificationDelivery.channel == name,
+                    NotificationDelivery.next_attempt_at <= now
+                )
+                .order_by(NotificationDelivery.next_attempt_at)
+                .limit(self.batch_size)
+            ).all()
+            if not due:
+                return 0
+            notifications = {
+                n.id: notification_payload(n)
+                for n in session.exec(
+                    select(Notification).where(Notification.id.in_([notification_id for _, notification_id, _ in due]))
+                ).all()
+            }
+            # 그 사이 지워진(일괄 삭제/보관) 알림은 보내지 않습니다
+            gone = [delivery_id for delivery_id, notification_id, _ in due if notification_id not in notifications]
+            if gone:
+                session.connection().execute(
+                    delete(NotificationDelivery.__table__).where(NotificationDelivery.id.in_(gone))
+                )
+            session.commit()
+        due = [row for row in due if row[1] in notifications]
+
+        error: Optional[DeliveryError] = None
+        if due:
+            # 트랜잭션 밖에서 보냅니다 (네트워크 대기 동안 쓰기 잠금을 잡지 않음)
+            try:
+                channel.send_batch([notifications[notification_id] for _, notification_id, _ in due])
+            except DeliveryError as exc:
+                error = exc
+            except Exception as exc:
+                logger.exception("notification delivery channel %s failed", name)
+                error = DeliveryError(f"{type(exc).__name__}: {exc}")
+            with self.engine.begin() as connection:
+                self._record(connection, name, due, notifications, error)
+
+        with self._lock:
+            stats = self._channel_stats(name)
+            stats["batches"] += 1
+            if error is None:
+                stats["sent"] += len(due)
+                stats["last_sent_at"] = now.isoformat()
+            else:
+                stats["last_error"] = str(error)
+        return len(due) + len(gone)
+
+    def _record(
+        self, connection, name: str, due: List[Tuple[int, int, int]],
+        notifications: Dict[int, Dict[str, Any]], error: Optional[DeliveryError]
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        table = NotificationDelivery.__table__
+        if error is None:
+            connection.execute(
+                update(table)
+                .where(NotificationDelivery.id.in_([delivery_id for delivery_id, _, _ in due]))
+                .values(status=DeliveryStatus.SENT, sent_at=now, attempts=NotificationDelivery.attempts + 1,
+                        last_error=None)
+            )
+            return
+
+        dead = [row for row in due if error.permanent or row[2] + 1 >= self.max_attempts]
+        retry: Dict[int, List[int]] = {}
+        for delivery_id, _, attempts in due:
+            if not (error.permanent or attempts + 1 >= self.max_attempts):
+                retry.setdefault(attempts + 1, []).append(delivery_id)
+        # 같은 시도 횟수끼리 같은 백오프라 시도 횟수마다 UPDATE 한 번
+        for attempts, ids in retry.items():
+            connection.execute(
+                update(table)
+                .where(NotificationDelivery.id.in_(ids))
+                .values(attempts=attempts, last_error=str(error), next_attempt_at=now + self._retry_delay(attempts))
+            )
+        if dead:
+            connection.execute(insert(NotificationDeadLetter.__table__), [
+                {
+                    "notification_id": notification_id,
+                    "channel": name,
+                    "attempts": attempts + 1,
+                    "last_error": str(error),
+                    "payload": notifications[notification_id],
+                    "failed_at": now,
+                }
+                for _, notification_id, attempts in dead
+            ])
+            connection.execute(delete(table).where(NotificationDelivery.id.in_([row[0] for row in dead])))
+        with self._lock:
+            stats = self._channel_stats(name)
+            stats["retried"] += sum(len(ids) for ids in retry.values())
+            stats["dead_lettered"] += len(dead)
+
+    def drain(self, name: str) -> int:
+        """채널 대기열을 (최대 MAX_BATCHES_PER_RUN 배치) 비우고 처리한 행 수를 반환합니다."""
+        processed = 0
+        for _ in range(MAX_BATCHES_PER_RUN):
+            count = self.deliver_batch(name)
+            processed += count
+            if count < self.batch_size:
+                break
+        return processed
+
+    def _acquire(self) -> bool:
+        with Session(self.engine) as session:
+            self._is_leader = acquire_lease(session, LEASE_NAME, self.owner, LEASE_SECONDS)
+        return self._is_leader
+
+    # ---- asyncio 태스크 ----
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await asyncio.to_thread(self._acquire):
+                    await asyncio.gather(*(asyncio.to_thread(self.drain, name) for name in list(self.channels)))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("notification delivery run failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if not self.channels:
+            return
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="notification-delivery")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+        for channel in self.channels.values():
+            await asyncio.to_thread(channel.close)
+        if self._is_leader:
+            await asyncio.to_thread(self._release)
+
+    def _release(self) -> None:
+        with Session(self.engine) as session:
+            release_lease(session, LEASE_NAME, self.owner)
+        self._is_leader = False
+
+    def stats(self, session: Session) -> Dict[str, Any]:
+        pending = dict(session.exec(
+            select(NotificationDelivery.channel, func.count())
+            .where(NotificationDelivery.status == DeliveryStatus.PENDING)
+            .group_by(NotificationDelivery.channel)
+        ).all())
+        dead_letters = dict(session.exec(
+            select(NotificationDeadLetter.channel, func.count()).group_by(NotificationDeadLetter.channel)
+        ).all())
+        with self._lock:
+            channels = {
+                name: {
+                    **self._channel_stats(name),
+                    "pending": pending.get(name, 0),
+                    "dead_letters": dead_letters.get(name, 0),
+                }
+                for name in self.channels
+            }
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "is_leader": self._is_leader,
+            "owner": self.owner,
+            "batch_size": self.batch_size,
+            "interval_seconds": self.interval,
+            "max_attempts": self.max_attempts,
+            "channels": channels,
+        }
+
+
+notification_delivery = NotificationDeliveryWorker(
+    engine,
+    build_channels(),
+    batch_size=settings.NOTIFICATION_DELIVERY_BATCH_SIZE,
+    interval=settings.NOTIFICATION_DELIVERY_INTERVAL_SECONDS,
+    max_attempts=settings.NOTIFICATION_DELIVERY_MAX_ATTEMPTS,
+    backoff=settings.NOTIFICATION_DELIVERY_BACKOFF_SECONDS,
+    max_backoff=settings.NOTIFICATION_DELIVERY_MAX_BACKOFF_SECONDS,
+)
+notification_dispatcher.add_listener(notification_delivery.enqueue)
+notification_dispatcher.add_commit_listener(notification_delivery.on_dispatched)
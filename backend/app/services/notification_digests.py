@@ -0,0 +1,235 @@
+"""
+알림 다이제스트
+
+대량 가져오기 직후처럼 한 번의 생성에서 같은 프로젝트/타입의 작업 알림이 digest_min_items 개 이상 나오면,
+작업마다 알림을 만들지 않고 digest_interval_minutes 구간마다 DIGEST 알림 하나로 묶습니다
+(프로젝트별 설정 덮어쓰기 적용, 구간이 0 이면 끔).
+
+- 묶인 작업 ID는 NotificationDigest.member_task_ids 에 정렬 후 증분 varint 로 저장합니다.
+- 같은 구간에 다시 생긴 알림은 활성 다이제스트에 합칩니다 (다이제스트의 dedupe_key 가 구간을 나타냄).
+- 중복 판단: 활성 다이제스트에 들어 있는 작업은 개별 알림의 dedupe_key 와 같은 키로 취급해 다시 만들지 않습니다.
+- 목록에는 개수만 보이고, 묶인 작업은 GET /notifications/{id}/digest 로 펼쳐 봅니다.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, exists, insert, or_, update
+from sqlmodel import Session, select
+
+from app.models import Notification, NotificationDigest, NotificationStatus, NotificationType, Project, Task
+from app.services.notification_settings import SettingsSnapshot
+
+# 묶을 수 있는 타입 (작업 하나에 활성 알림 하나인 타입)
+DIGEST_TYPES = {
+    NotificationType.MISSING_BRIEF: "5SB 미작성",
+    NotificationType.MISSING_DOD: "DoD 미설정",
+    NotificationType.STALE_TASK: "장기 미진행",
+}
+
+_ACTIVE_STATUSES = [NotificationStatus.PENDING, NotificationStatus.SENT]
+
+
+# ---- 작업 ID 집합 압축 (정렬 + 증분 varint) ----
+def encode_ids(ids: Iterable[int]) -> bytes:
+    out = bytearray()
+    previous = 0
+    for value in sorted(set(ids)):
+        delta = value - previous
+        previous = value
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_ids(buf: bytes) -> List[int]:
+    ids = []
+    value = shift = delta = 0
+    for byte in buf or b"":
+        delta |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            value += delta
+            ids.append(value)
+            delta = shift = 0
+        else:
+            shift += 7
+    return ids
+
+
+def digest_window(now: datetime, interval_minutes: int) -> datetime:
+    """now 가 속한 구간의 시작 시각 (UTC epoch 기준 interval_minutes 단위)"""
+    interval = interval_minutes * 60
+    return datetime.fromtimestamp(int(now.timestamp()) // interval * interval, tz=timezone.utc)
+
+
+def active_member_keys(session: Session, groups: Set[Tuple[Optional[int], NotificationType]]) -> Set[str]:
+    """(프로젝트, 타입) 묶음들의 활성 다이제스트에 묶인 작업들의 개별 알림 dedupe_key"""
+    from app.services.notifications import dedupe_key
+
+    groups = {(project_id, t) for project_id, t in groups if t in DIGEST_TYPES}
+    if not groups:
+        return set()
+    project_ids = {project_id for project_id, _ in groups}
+    in_projects = NotificationDigest.project_id.in_([p for p in project_ids if p is not None])
+    if None in project_ids:
+        in_projects = or_(in_projects, NotificationDigest.project_id.is_(None))
+    rows = session.exec(
+        select(NotificationDigest.member_type, NotificationDigest.project_id, NotificationDigest.member_task_ids)
+        .join(Notification, Notification.id == NotificationDigest.notification_id)
+        .where(
+            NotificationDigest.member_type.in_({t for _, t in groups}),
+            in_projects,
+            Notification.status.in_(_ACTIVE_STATUSES)
+        )
+    ).all()
+    return {
+        dedupe_key(member_type, task_id, project_id)
+        for member_type, project_id, member_ids in rows
+        if (project_id, member_type) in groups
+        for task_id in decode_ids(member_ids)
+    }
+
+
+def _describe(notification_type: NotificationType, project_name: str, count: int) -> Tuple[str, str]:
+    label = DIGEST_TYPES[notification_type]
+    return (
+        f"📦 {label} 작업 {count}개: {project_name}",
+        f"프로젝트 '{project_name}'에 {label} 작업이 {count}개 있습니다.",
+    )
+
+
+def apply_digests(
+    session: Session, rows: List[Dict[str, Any]], snapshot: SettingsSnapshot, now: datetime
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    다이제스트로 묶을 행을 저장하고 (개별로 만들 나머지 행, 새로 만든 다이제스트 알림 수) 를 반환합니다.
+
+    (프로젝트, 타입) 묶음이 digest_min_items 개 이상이거나 같은 구간의 활성 다이제스트가 이미 있으면
+    다이제스트로 저장합니다. 기존 다이제스트에는 작업 ID를 합치고 개수/문구만 갱신합니다.
+    """
+    from app.services.notifications import dedupe_key
+
+    groups: Dict[Tuple[Optional[int], NotificationType], List[Dict[str, Any]]] = {}
+    for row in rows:
+        if row["type"] in DIGEST_TYPES and row.get("task_id") is not None:
+            if snapshot.resolve(row.get("project_id")).digest_interval_minutes > 0:
+                groups.setdefault((row.get("project_id"), row["type"]), []).append(row)
+    if not groups:
+        return rows, 0
+
+    keys = {}
+    for project_id, notification_type in groups:
+        window = digest_window(now, snapshot.resolve(project_id).digest_interval_minutes)
+        key = dedupe_key(
+            NotificationType.DIGEST, None, project_id, window=f"{notification_type.value}@{window.isoformat()}"
+        )
+        keys[(project_id, notification_type)] = (window, key)
+    existing = {
+        key: (notification_id, digest)
+        for key, notification_id, digest in session.exec(
+            select(Notification.dedupe_key, Notification.id, NotificationDigest)
+            .join(NotificationDigest, NotificationDigest.notification_id == Notification.id)
+            .where(
+                Notification.dedupe_key.in_([key for _, key in keys.values()]),
+                Notification.status.in_(_ACTIVE_STATUSES)
+            )
+        ).all()
+    }
+    groups = {
+        group: members for group, members in groups.items()
+        if keys[group][1] in existing or len(members) >= snapshot.resolve(group[0]).digest_min_items
+    }
+    if not groups:
+        return rows, 0
+    plain = [row for row in rows if (row.get("project_id"), row["type"]) not in groups]
+    project_names = dict(session.exec(
+        select(Project.id, Project.name).where(Project.id.in_([p for p, _ in groups if p is not None]))
+    ).all())
+
+    connection = session.connection()
+    created = 0
+    for (project_id, notification_type), members in groups.items():
+        window, key = keys[(project_id, notification_type)]
+        task_ids = [row["task_id"] for row in members]
+        project_name = project_names.get(project_id, "-")
+        if key in existing:
+            notification_id, digest = existing[key]
+            merged = set(decode_ids(digest.member_task_ids)) | set(task_ids)
+            title, message = _describe(notification_type, project_name, len(merged))
+            digest.member_task_ids = encode_ids(merged)
+            digest.member_count = len(merged)
+            session.add(digest)
+            connection.execute(
+                update(Notification.__table__)
+                .where(Notification.id == notification_id)
+                .values(title=title, message=message, updated_at=now)
+            )
+            continue
+
+        title, message = _describe(notification_type, project_name, len(set(task_ids)))
+        notification_id = connection.execute(
+            insert(Notification.__table__)
+            .values(
+                type=NotificationType.DIGEST,
+                title=title,
+                message=message,
+                status=NotificationStatus.PENDING,
+                project_id=project_id,
+                dedupe_key=key,
+                scheduled_for=now,
+                created_at=now,
+                updated_at=now,
+            )
+            .returning(Notification.id)
+        ).scalar_one()
+        connection.execute(insert(NotificationDigest.__table__).values(
+            notification_id=notification_id,
+            project_id=project_id,
+            member_type=notification_type,
+            window_start=window,
+            member_count=len(set(task_ids)),
+            member_task_ids=encode_ids(task_ids),
+        ))
+        created += 1
+    session.flush()
+    return plain, created
+
+
+def delete_orphan_digests(session: Session) -> None:
+    """알림이 지워진(일괄 삭제/보관) 다이제스트의 구성원 행을 지웁니다 (커밋은 호출자가 함)"""
+    session.connection().execute(
+        delete(NotificationDigest.__table__).where(
+            ~exists(select(Notification.id).where(Notification.id == NotificationDigest.notification_id))
+        )
+    )
+
+
+def expand_digest(session: Session, notification_id: int) -> Optional[Dict[str, Any]]:
+    """다이제스트에 묶인 작업 목록 (다이제스트가 아니면 None)"""
+    digest = session.exec(
+        select(NotificationDigest).where(NotificationDigest.notification_id == notification_id)
+    ).first()
+    if digest is None:
+        return None
+    task_ids = decode_ids(digest.member_task_ids)
+    tasks = session.exec(
+        select(Task.id, Task.title, Task.state, Task.due_date, Task.assignee_id).where(Task.id.in_(task_ids))
+    ).all() if task_ids else []
+    return {
+        "notification_id": notification_id,
+        "member_type": digest.member_type,
+        "project_id": digest.project_id,
+        "window_start": digest.window_start.isoformat(),
+        "count": digest.member_count,
+        "members": [
+            {
+                "task_id": task_id,
+                "title": title,
+                "state": state,
+                "due_date": due_date.isoformat() if due_date else None,
+                "assignee_id": assignee_id,
+            }
+            for task_id, title, state, due_date, assignee_id in tasks
+        ],
+    }
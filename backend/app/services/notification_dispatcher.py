@@ -0,0 +1,164 @@
+"""
+예약 알림 발송기 (PENDING -> SENT)
+
+대기 알림을 한 번 읽어 타이밍 휠(timing_wheel)에 넣고, 매 분 휠을 진행해 예약 시각이 된 알림만
+UPDATE 한 번으로 SENT 로 바꿉니다. 매 분 `scheduled_for <= now` 를 조회하지 않습니다.
+
+- 같은 프로세스의 ORM 쓰기는 변경 피드로 바로 반영합니다 (새 알림 추가, 상태/예약 시각 변경, 삭제).
+- 다른 워커나 bulk INSERT 로 생긴 알림은 sync() 가 마지막으로 읽은 ID 이후만 PK 범위로 읽어 들입니다.
+  (스케줄러가 알림 생성 직후 호출)
+  ID 는 커밋 순서대로 보이지 않을 수 있어(PostgreSQL 시퀀스, 적재 중 커밋) 워터마크 아래로 늦게 커밋된 알림은
+  예약 시각이 지났는데 휠에 없는 PENDING 알림을 sync() 가 함께 읽어 건집니다 (늦어도 다음 sync 에 발송).
+- 발송 UPDATE 는 status = PENDING 조건을 걸어, 그 사이 읽음/해제된 알림은 건드리지 않습니다.
+- add_listener 로 등록한 함수는 같은 트랜잭션에서 SENT 로 바뀐 ID 들을 받습니다 (외부 발송 대기열 등).
+  add_commit_listener 로 등록한 함수는 커밋 뒤에 받습니다 (커밋된 행을 읽는 워커 깨우기 등).
+"""
+import threading
+from datetime import datetime, timezone
+from typing import Callable, List
+
+from sqlalchemy import update
+from sqlmodel import Session, func, select
+
+from app.db import changes
+from app.models import Notification, NotificationStatus
+from app.services.content_stats import content_stats
+from app.services.notification_events import notification_broker
+from app.services.timing_wheel import TimingWheel, to_minute
+
+
+def _now_minute() -> int:
+    return to_minute(datetime.now(timezone.utc))
+
+
+class NotificationDispatcher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wheel = TimingWheel(_now_minute())
+        self._loaded = False
+        self._last_id = 0
+        self._listeners: List[Callable[[Session, List[int]], None]] = []
+        self._commit_listeners: List[Callable[[List[int]], None]] = []
+        self.dispatched = 0
+
+    def add_listener(self, listener: Callable[[Session, List[int]], None]) -> None:
+        """발송 트랜잭션 안에서 (커밋 전) SENT 로 바뀐 알림 ID 들을 받을 함수를 등록합니다."""
+        self._listeners.append(listener)
+
+    def add_commit_listener(self, listener: Callable[[List[int]], None]) -> None:
+        """발송 트랜잭션 커밋 뒤 SENT 로 바뀐 알림 ID 들을 받을 함수를 등록합니다."""
+        self._commit_listeners.append(listener)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _schedule(self, notification_id: int, scheduled_for: datetime) -> None:
+        self._wheel.add(notification_id, to_minute(scheduled_for))
+        self._last_id = max(self._last_id, notification_id)
+
+    def load(self, session: Session) -> int:
+        """대기 알림 전체를 휠에 다시 적재합니다. 적재한 개수를 반환."""
+        # 워터마크를 먼저 읽어, 두 조회 사이에 커밋된 알림은 대기 알림 조회나 다음 sync 에서 읽히게 합니다
+        last_id = session.exec(select(func.max(Notification.id))).one() or 0
+        rows = session.exec(
+            select(Notification.id, Notification.scheduled_for)
+            .where(Notification.status == NotificationStatus.PENDING)
+        ).all()
+        with self._lock:
+            self._wheel = TimingWheel(_now_minute())
+            for notification_id, scheduled_for in rows:
+                self._schedule(notification_id, scheduled_for)
+            self._last_id = max(self._last_id, last_id)
+            self._loaded = True
+        return len(rows)
+
+    def sync(self, session: Session) -> int:
+        """마지막으로 본 ID 이후에 생긴 대기 알림과, 예약 시각이 지났는데 휠에 없는 대기 알림을 휠에 추가합니다."""
+        if not self._loaded:
+            return self.load(session)
+        last_id = self._last_id
+        # PK 범위와 (status, scheduled_for) 인덱스 범위를 각각 쓰도록 두 조회로 나눕니다
+        rows = session.exec(
+            select(Notification.id, Notification.scheduled_for).where(
+                Notification.id > last_id,
+                Notification.status == NotificationStatus.PENDING
+            )
+        ).all()
+        rows += session.exec(
+            select(Notification.id, Notification.scheduled_for).where(
+                Notification.status == NotificationStatus.PENDING,
+                Notification.scheduled_for <= datetime.now(timezone.utc),
+                Notification.id <= last_id
+            )
+        ).all()
+        added = 0
+        with self._lock:
+            for notification_id, scheduled_for in rows:
+                if notification_id <= last_id and notification_id in self._wheel:
+                    continue
+                self._schedule(notification_id, scheduled_for)
+                added += 1
+        return added
+
+    def cancel(self, ids: List[int]) -> None:
+        """발송 예약 취소 (일괄 상태 변경/삭제처럼 변경 피드를 거치지 않는 쓰기 후 호출)"""
+        with self._lock:
+            for notification_id in ids:
+                self._wheel.cancel(notification_id)
+
+    def due(self) -> List[int]:
+        """현재 분까지 예약 시각이 된 알림 ID (휠에서 꺼냄)"""
+        with self._lock:
+            return self._wheel.advance(_now_minute())
+
+    def dispatch(self, session: Session) -> int:
+        """예약 시각이 된 알림을 SENT 로 바꾸고 바뀐 개수를 반환합니다."""
+        ids = self.due()
+        if not ids:
+            return 0
+        now = datetime.now(timezone.utc)
+        sent_ids = session.connection().execute(
+            update(Notification.__table__)
+            .where(Notification.id.in_(ids), Notification.status == NotificationStatus.PENDING)
+            .values(status=NotificationStatus.SENT, sent_at=now, updated_at=now)
+            .returning(Notification.id)
+        ).scalars().all()
+        if sent_ids:
+            for listener in self._listeners:
+                listener(session, sent_ids)
+        session.commit()
+        if sent_ids:
+            # ORM 을 거치지 않은 UPDATE 이므로 상태별 개수 캐시를 다시 집계하게 합니다
+            content_stats.invalidate()
+            notification_broker.publish_sent(sorted(sent_ids))
+            for listener in self._commit_listeners:
+                listener(sent_ids)
+        with self._lock:
+            self.dispatched += len(sent_ids)
+        return len(sent_ids)
+
+    def on_changes(self, batch: List[changes.Change]) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            for change in batch:
+                if change.table != Notification.__tablename__:
+                    continue
+                if change.op == changes.DELETE or change.values.get("status") != NotificationStatus.PENDING:
+                    self._wheel.cancel(change.id)
+                else:
+                    self._schedule(change.id, change.values["scheduled_for"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "scheduled": len(self._wheel),
+                "last_seen_id": self._last_id,
+                "dispatched": self.dispatched,
+            }
+
+
+notification_dispatcher = NotificationDispatcher()
+changes.subscribe(notification_dispatcher.on_changes)
@@ -0,0 +1,187 @@
+"""
+알림 실시간 전송용 프로세스 내 pub/sub (SSE /notifications/stream)
+
+- 알림을 쓰는 쪽(생성기, 저장된 검색, 발송기)은 커밋 후 publish_new()/publish_sent()를 부릅니다.
+  새 알림은 구독자마다가 아니라 브로커가 한 번만 `id > 마지막 ID` 로 읽어 공유 버퍼에 넣습니다.
+- 구독자(SSE 연결)는 큐나 태스크를 따로 갖지 않고, 공유 버퍼의 순번(seq)과 "다음 이벤트" future 하나만
+  기다립니다. 발행 한 번은 연결 수와 관계없이 버퍼 추가 + future 완료 한 번입니다.
+- 구독자가 버퍼(BUFFER_SIZE)보다 뒤처지면 알림 테이블에서 마지막으로 받은 알림 ID 이후를 다시 읽습니다
+  (Last-Event-ID 재연결과 같은 경로).
+- 다른 워커가 만든 알림은 구독자가 있는 동안 TAIL_CHECK_SECONDS 마다 한 번 확인합니다.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, func, select
+
+from app.db import changes
+from app.db.session import engine
+from app.models import Notification
+
+BUFFER_SIZE = 1000
+HEARTBEAT_SECONDS = 15
+TAIL_CHECK_SECONDS = 15
+RESUME_LIMIT = 500
+
+# (seq, SSE id, 이벤트 이름, data)
+Event = Tuple[int, Optional[int], str, Dict[str, Any]]
+
+
+def notification_payload(n: Notification) -> Dict[str, Any]:
+    def iso(value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() if value else None
+    return {
+        "id": n.id,
+        "type": n.type,
+        "title": n.title,
+        "message": n.message,
+        "status": n.status,
+        "task_id": n.task_id,
+        "project_id": n.project_id,
+        "user_id": n.user_id,
+        "scheduled_for": iso(n.scheduled_for),
+        "created_at": iso(n.created_at),
+    }
+
+
+def format_event(event_id: Optional[int], name: str, data: Dict[str, Any]) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {name}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class NotificationBroker:
+    def __init__(self, engine):
+        self.engine = engine
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._buffer: Deque[Event] = deque(maxlen=BUFFER_SIZE)
+        self._seq = 0
+        self._next: Optional[asyncio.Future] = None
+        self._subscribers = 0
+        self._tail_id: Optional[int] = None
+        self._fetch_lock = threading.Lock()
+        self._tail_task: Optional[asyncio.Task] = None
+        self._tail_refresh: Optional[asyncio.Task] = None
+
+    # ---- 발행 (어느 스레드에서나) ----
+    def publish_new(self) -> int:
+        """마지막으로 본 ID 이후의 새 알림을 읽어 발행합니다. 구독자가 없으면 아무것도 하지 않습니다."""
+        if not self._subscribers or self._loop is None:
+            return 0
+        with self._fetch_lock:
+            with Session(self.engine) as session:
+                rows = session.exec(
+                    select(Notification)
+                    .where(Notification.id > (self._tail_id or 0))
+                    .order_by(Notification.id)
+                    .limit(BUFFER_SIZE)
+                ).all()
+                events = [(n.id, "notification", notification_payload(n)) for n in rows]
+            if rows:
+                self._tail_id = rows[-1].id
+        if events:
+            self._loop.call_soon_threadsafe(self._append, events)
+        return len(events)
+
+    def publish_sent(self, ids: List[int]) -> None:
+        """예약 시각이 되어 발송된 알림 ID들 (재연결 시 다시 보내지 않는 일회성 이벤트)"""
+        if ids and self._subscribers and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._append, [(None, "sent", {"ids": ids})])
+
+    def _append(self, events: List[Tuple[Optional[int], str, Dict[str, Any]]]) -> None:
+        for event_id, name, data in events:
+            self._seq += 1
+            self._buffer.append((self._seq, event_id, name, data))
+        if self._next is not None and not self._next.done():
+            self._next.set_result(None)
+        self._next = None
+
+    # ---- 구독 (이벤트 루프에서) ----
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    async def subscribe(self) -> Tuple[int, int]:
+        """구독을 시작하고 (현재 순번, 지금까지 발행된 마지막 알림 ID)를 돌려줍니다."""
+        self._loop = asyncio.get_running_loop()
+        self._subscribers += 1
+        if self._subscribers == 1:
+            # 구독자가 없는 동안은 발행하지 않아 _tail_id 가 멈춰 있으므로 첫 구독자가 올 때 다시 읽습니다
+            # (같은 때 들어온 구독자들은 이 갱신을 함께 기다립니다)
+            self._tail_refresh = asyncio.create_task(asyncio.to_thread(self._refresh_tail))
+        try:
+            await asyncio.shield(self._tail_refresh)
+        except BaseException:
+            # 연결이 끊겨 취소되면 _event_stream 의 finally 까지 가지 못하므로 여기서 되돌립니다
+            self._subscribers -= 1
+            raise
+        if self._tail_task is None or self._tail_task.done():
+            self._tail_task = asyncio.create_task(self._watch_tail())
+        return self._seq, self._tail_id
+
+    def unsubscribe(self) -> None:
+        self._subscribers -= 1
+
+    def _max_id(self) -> int:
+        with Session(self.engine) as session:
+            return session.exec(select(func.max(Notification.id))).one() or 0
+
+    def _refresh_tail(self) -> None:
+        with self._fetch_lock:
+            self._tail_id = max(self._tail_id or 0, self._max_id())
+
+    async def _watch_tail(self) -> None:
+        # 다른 워커에서 생긴 알림 확인 (워커당 하나, 구독자가 없으면 끝남)
+        while self._subscribers > 0:
+            await asyncio.sleep(TAIL_CHECK_SECONDS)
+            if self._subscribers > 0:
+                await asyncio.to_thread(self.publish_new)
+
+    async def wait(self, after_seq: int, timeout: float) -> Optional[List[Event]]:
+        """
+        after_seq 이후 이벤트를 기다립니다.
+
+        timeout 안에 없으면 빈 목록, 버퍼에서 이미 밀려나 놓친 이벤트가 있으면 None 을 돌려줍니다.
+        """
+        if self._seq <= after_seq:
+            if self._next is None:
+                self._next = asyncio.get_running_loop().create_future()
+            await asyncio.wait({self._next}, timeout=timeout)
+        if self._seq <= after_seq:
+            return []
+        if self._buffer and self._buffer[0][0] > after_seq + 1:
+            return None
+        return [event for event in self._buffer if event[0] > after_seq]
+
+    def resume(self, last_event_id: int) -> List[Tuple[int, str]]:
+        """알림 테이블에서 last_event_id 이후 알림을 SSE 문자열로 읽습니다 (최대 RESUME_LIMIT 개)."""
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(Notification)
+                .where(Notification.id > last_event_id)
+                .order_by(Notification.id)
+                .limit(RESUME_LIMIT)
+            ).all()
+            return [(n.id, format_event(n.id, "notification", notification_payload(n))) for n in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"subscribers": self._subscribers, "buffered": len(self._buffer), "last_id": self._tail_id}
+
+
+notification_broker = NotificationBroker(engine)
+
+
+def _on_changes(batch: List[changes.Change]) -> None:
+    # ORM 으로 추가된 알림 (저장된 검색 등)
+    if any(c.table == Notification.__tablename__ and c.op == changes.INSERT for c in batch):
+        notification_broker.publish_new()
+
+
+changes.subscribe(_on_changes)
@@ -0,0 +1,179 @@
+"""
+알림 보존 정책 / 보관 작업
+
+읽음(READ), 해제(DISMISSED) 알림은 상태별 보존 기간(NOTIFICATION_RETENTION_*_DAYS)이 지나면
+notificationarchive 테이블로 옮겨 알림 테이블(중복 검사, 대기 알림 조회 대상)을 작게 유지합니다.
+
+- 한 배치는 `DELETE ... RETURNING` + 보관 INSERT 한 트랜잭션이고 BATCH_SIZE 행을 넘지 않습니다.
+  배치 사이에 커밋하고 잠시 쉬어 쓰기 잠금을 오래 잡지 않습니다.
+- 한 번 실행에서 MAX_BATCHES 배치까지만 옮기고 나머지는 다음 실행에 이어서 옮깁니다.
+- 옮긴 뒤 SQLite 증분 VACUUM 으로 빈 페이지를 VACUUM_PAGES 개까지 돌려줍니다
+  (DB 가 auto_vacuum=INCREMENTAL 일 때만, db.session.init 참고).
+- 외부 발송을 마친 발송 대기열 행(NotificationDelivery, SENT)도 DELIVERY_RETENTION_DAYS 가 지나면 같은 방식으로 지웁니다.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, delete, or_
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.dialects import insert_ignore
+from app.models import DeliveryStatus, Notification, NotificationArchive, NotificationDelivery, NotificationStatus
+from app.services.content_stats import content_stats
+from app.services.notification_digests import delete_orphan_digests
+
+MAX_BATCHES = 200
+BATCH_PAUSE_SECONDS = 0.05
+VACUUM_PAGES = 2000
+DELIVERY_RETENTION_DAYS = 7
+
+
+def retention_days() -> Dict[NotificationStatus, int]:
+    """상태별 보존 일수 (0 이하인 상태는 보관하지 않음)"""
+    days = {
+        NotificationStatus.READ: settings.NOTIFICATION_RETENTION_READ_DAYS,
+        NotificationStatus.DISMISSED: settings.NOTIFICATION_RETENTION_DISMISSED_DAYS,
+    }
+    return {status: value for status, value in days.items() if value > 0}
+
+
+def _expired_condition(now: datetime, days: Dict[NotificationStatus, int]):
+    # 읽음/해제 처리 시각(updated_at)이 보존 기간을 넘은 알림
+    return or_(*(
+        and_(Notification.status == status, Notification.updated_at < now - timedelta(days=value))
+        for status, value in days.items()
+    ))
+
+
+def archive_batch(session: Session, now: datetime, days: Dict[NotificationStatus, int], batch_size: int) -> int:
+    """보존 기간이 지난 알림을 최대 batch_size 개 보관 테이블로 옮기고 옮긴 개수를 반환합니다."""
+    expired_ids = (
+        select(Notification.id)
+        .where(_expired_condition(now, days))
+        .order_by(Notification.id)
+        .limit(batch_size)
+    )
+    table = Notification.__table__
+    connection = session.connection()
+    rows = connection.execute(
+        delete(table)
+        .where(table.c.id.in_(expired_ids))
+        .returning(
+            table.c.id, table.c.type, table.c.status, table.c.title, table.c.message,
+            table.c.task_id, table.c.project_id, table.c.user_id, table.c.created_at,
+            table.c.read_at, table.c.dismissed_at
+        )
+    ).all()
+    if rows:
+        connection.execute(
+            insert_ignore(connection, NotificationArchive.__table__),
+            [
+                {
+                    "id": row.id,
+                    "type": row.type,
+                    "status": row.status,
+                    "title": row.title,
+                    "message": row.message,
+                    "task_id": row.task_id,
+                    "project_id": row.project_id,
+                    "user_id": row.user_id,
+                    "created_at": row.created_at,
+                    "closed_at": row.read_at or row.dismissed_at,
+                    "archived_at": now,
+                }
+                for row in rows
+            ]
+        )
+        delete_orphan_digests(session)
+    session.commit()
+    return len(rows)
+
+
+def prune_deliveries_batch(session: Session, now: datetime, batch_size: int) -> int:
+    """발송을 마친 지 DELIVERY_RETENTION_DAYS 가 지난 발송 대기열 행을 최대 batch_size 개 지웁니다."""
+    expired_ids = (
+        select(NotificationDelivery.id)
+        .where(
+            NotificationDelivery.status == DeliveryStatus.SENT,
+            NotificationDelivery.sent_at < now - timedelta(days=DELIVERY_RETENTION_DAYS)
+        )
+        .limit(batch_size)
+    )
+    result = session.connection().execute(
+        delete(NotificationDelivery.__table__).where(NotificationDelivery.id.in_(expired_ids))
+    )
+    session.commit()
+    return result.rowcount
+
+
+def vacuum_skip_reason(session: Session) -> Optional[str]:
+    """증분 VACUUM 을 할 수 없는 이유 (할 수 있으면 None)"""
+    connection = session.connection()
+    if connection.dialect.name != "sqlite":
+        return f"{connection.dialect.name} DB 는 증분 VACUUM 대상이 아닙니다"
+    if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+        return "SQLite DB 가 증분 VACUUM 모드가 아닙니다 (시작 시 전환 VACUUM 이 실패했으면 다음 시작 때 다시 시도)"
+    return None
+
+
+def incremental_vacuum(session: Session, max_pages: int = VACUUM_PAGES) -> int:
+    """SQLite 빈 페이지를 max_pages 개까지 돌려주고 돌려준 페이지 수를 반환합니다."""
+    if vacuum_skip_reason(session) is not None:
+        return 0
+    connection = session.connection()
+    before = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+    # sqlite3 모듈은 결과 열이 없는 문장을 한 단계만 실행해 한 번에 한 페이지씩 돌려주므로 반복합니다
+    for _ in range(min(before, max_pages)):
+        connection.exec_driver_sql("PRAGMA incremental_vacuum(1)")
+    after = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+    session.commit()
+    return before - after
+
+
+def archive_notifications(
+    engine,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    max_batches: int = MAX_BATCHES
+) -> Dict[str, Any]:
+    """보존 기간이 지난 알림을 배치 단위로 보관하고 증분 VACUUM 을 실행합니다."""
+    days = retention_days()
+    now = now or datetime.now(timezone.utc)
+    batch_size = batch_size or settings.NOTIFICATION_ARCHIVE_BATCH_SIZE
+    archived = 0
+    batches = 0
+    started = time.perf_counter()
+    with Session(engine) as session:
+        while days and batches < max_batches:
+            moved = archive_batch(session, now, days, batch_size)
+            if not moved:
+                break
+            archived += moved
+            batches += 1
+            if moved < batch_size:
+                break
+            time.sleep(BATCH_PAUSE_SECONDS)
+        pruned = 0
+        for _ in range(max_batches):
+            deleted = prune_deliveries_batch(session, now, batch_size)
+            pruned += deleted
+            if deleted < batch_size:
+                break
+            time.sleep(BATCH_PAUSE_SECONDS)
+        if archived:
+            # ORM 을 거치지 않은 DELETE 이므로 상태별 개수 캐시를 다시 집계하게 합니다
+            content_stats.invalidate()
+        vacuum_skipped = vacuum_skip_reason(session)
+        session.commit()
+        vacuumed_pages = incremental_vacuum(session) if (archived or pruned) and vacuum_skipped is None else 0
+    return {
+        "archived": archived,
+        "batches": batches,
+        "pruned_deliveries": pruned,
+        "complete": batches < max_batches,
+        "vacuumed_pages": vacuumed_pages,
+        "vacuum_skipped": vacuum_skipped,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
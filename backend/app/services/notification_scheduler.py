@@ -0,0 +1,262 @@
+"""
+백그라운드 알림 생성 스케줄러
+
+FastAPI lifespan 에서 시작되는 asyncio 태스크가 NOTIFICATION_SCHEDULER_INTERVAL_SECONDS 마다
+알림 생성(NotificationService.generate_all_notifications)을 워커 스레드에서 실행합니다.
+
+- 여러 uvicorn 워커가 떠 있어도 SchedulerLease 행을 가진 워커 하나만 생성을 실행합니다.
+  임대는 실행할 때마다 갱신되고, 주인이 죽으면 만료 후 다른 워커가 가져갑니다.
+- 워커들이 같은 순간에 깨어나지 않도록 매 주기에 0~JITTER 초를 더하고,
+  실패가 이어지면 간격을 두 배씩 늘립니다 (최대 MAX_BACKOFF 초).
+- 임대를 가진 워커는 매 분 경계에 발송기(notification_dispatcher)의 타이밍 휠을 진행해
+  예약 시각이 된 알림을 SENT 로 바꿉니다. 생성 직후에는 새로 생긴 대기 알림을 휠에 추가합니다.
+- 임대를 가진 워커는 NOTIFICATION_ARCHIVE_INTERVAL_SECONDS 마다 보존 기간이 지난 알림을 보관합니다
+  (notification_retention).
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import or_, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.dialects import insert_ignore
+from app.db.session import engine
+from app.models import SchedulerLease
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.notification_retention import archive_notifications
+from app.services.notifications import NotificationService
+
+LEASE_NAME = "notification-generation"
+
+logger = logging.getLogger(__name__)
+
+
+def acquire_lease(session: Session, name: str, owner: str, lease_seconds: int) -> bool:
+    """임대를 얻거나 갱신합니다. 다른 주인의 임대가 아직 유효하면 False."""
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=lease_seconds)
+    connection = session.connection()
+    connection.execute(
+        insert_ignore(connection, SchedulerLease.__table__)
+        .values(name=name, owner=owner, expires_at=expires_at, acquired_at=now)
+    )
+    result = connection.execute(
+        update(SchedulerLease.__table__)
+        .where(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.owner == owner, SchedulerLease.expires_at < now)
+        )
+        .values(owner=owner, expires_at=expires_at)
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+
+def release_lease(session: Session, name: str, owner: str) -> None:
+    """가진 임대를 바로 만료시켜 다른 워커가 이어받게 합니다."""
+    session.connection().execute(
+        update(SchedulerLease.__table__)
+        .where(SchedulerLease.name == name, SchedulerLease.owner == owner)
+        .values(expires_at=datetime.now(timezone.utc))
+    )
+    session.commit()
+
+
+class NotificationScheduler:
+    def __init__(
+        self, engine, interval: int, jitter: int, max_backoff: int, lease_seconds: int, archive_interval: int
+    ):
+        self.engine = engine
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.lease_seconds = lease_seconds
+        self.archive_interval = archive_interval
+        self._archived_at: Optional[float] = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "runs": 0,
+            "skipped_not_leader": 0,
+            "failures": 0,
+            "consecutive_failures": 0,
+            "notifications_created": 0,
+            "last_created": None,
+            "last_duration_ms": None,
+            "max_duration_ms": None,
+            "total_duration_ms": 0.0,
+            "last_run_at": None,
+            "last_error": None,
+            "next_run_at": None,
+            "is_leader": False,
+            "dispatch_runs": 0,
+            "last_dispatched": None,
+            "archive_runs": 0,
+            "last_archive": None,
+        }
+
+    def run_once(self) -> Optional[int]:
+        """임대를 가진 경우에만 알림을 생성하고 생성 개수를 반환합니다 (임대가 없으면 None)."""
+        with Session(self.engine) as session:
+            if not acquire_lease(session, LEASE_NAME, self.owner, self.lease_seconds):
+                with self._lock:
+                    self._stats["is_leader"] = False
+                    self._stats["skipped_not_leader"] += 1
+                return None
+            with self._lock:
+                became_leader = not self._stats["is_leader"]
+                self._stats["is_leader"] = True
+
+            started = time.perf_counter()
+            created = NotificationService(session).generate_all_notifications()
+            duration_ms = (time.perf_counter() - started) * 1000
+            
+            # 임대를 새로 얻었으면 (다른 워커가 만든 알림을 놓쳤을 수 있으므로) 휠을 다시 적재합니다
+            if became_leader:
+                notification_dispatcher.load(session)
+            else:
+                notification_dispatcher.sync(session)
+
+        self._maybe_archive()
+
+        with self._lock:
+            stats = self._stats
+            stats["runs"] += 1
+            stats["notifications_created"] += created
+            stats["last_created"] = created
+            stats["last_duration_ms"] = round(duration_ms, 2)
+            stats["max_duration_ms"] = round(max(stats["max_duration_ms"] or 0.0, duration_ms), 2)
+            stats["total_duration_ms"] += duration_ms
+            stats["last_run_at"] = datetime.now(timezone.utc).isoformat()
+        return created
+
+    def archive_once(self) -> Dict[str, Any]:
+        """보존 기간이 지난 알림을 보관하고 결과를 반환합니다."""
+        result = archive_notifications(self.engine)
+        with self._lock:
+            self._archived_at = time.monotonic()
+            self._stats["archive_runs"] += 1
+            self._stats["last_archive"] = {**result, "at": datetime.now(timezone.utc).isoformat()}
+        return result
+
+    def _maybe_archive(self) -> None:
+        if self.archive_interval <= 0:
+            return
+        if self._archived_at is None or time.monotonic() - self._archived_at >= self.archive_interval:
+            self.archive_once()
+
+    def _next_delay(self) -> float:
+        failures = self._stats["consecutive_failures"]
+        base = min(self.interval * (2 ** failures), self.max_backoff) if failures else self.interval
+        return base + random.uniform(0, self.jitter)
+
+    async def _loop(self) -> None:
+        # 여러 워커가 동시에 시작해도 첫 실행이 겹치지 않게 지터만큼 기다렸다 시작합니다
+        await asyncio.sleep(random.uniform(0, self.jitter))
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+                with self._lock:
+                    self._stats["consecutive_failures"] = 0
+                    self._stats["last_error"] = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("notification scheduler run failed")
+                with self._lock:
+                    self._stats["failures"] += 1
+                    self._stats["consecutive_failures"] += 1
+                    self._stats["last_error"] = f"{type(exc).__name__}: {exc}"
+            delay = self._next_delay()
+            with self._lock:
+                self._stats["next_run_at"] = (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat()
+            await asyncio.sleep(delay)
+
+    def dispatch_once(self) -> Optional[int]:
+        """임대를 가진 경우 예약 시각이 된 알림을 발송 처리합니다 (임대가 없으면 None)."""
+        with self._lock:
+            is_leader = self._stats["is_leader"]
+        if not is_leader or not notification_dispatcher.loaded:
+            return None
+        with Session(self.engine) as session:
+            dispatched = notification_dispatcher.dispatch(session)
+        with self._lock:
+            self._stats["dispatch_runs"] += 1
+            self._stats["last_dispatched"] = dispatched
+        return dispatched
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            # 다음 분 경계 직후에 깨어납니다
+            await asyncio.sleep(60 - time.time() % 60 + 0.5)
+            try:
+                await asyncio.to_thread(self.dispatch_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("notification dispatch failed")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(), name="notification-scheduler")
+        if self._dispatch_task is None or self._dispatch_task.done():
+            self._dispatch_task = asyncio.create_task(self._dispatch_loop(), name="notification-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        for task in (self._task, self._dispatch_task):
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._dispatch_task = None
+        if self._stats["is_leader"]:
+            await asyncio.to_thread(self._release)
+
+    def _release(self) -> None:
+        with Session(self.engine) as session:
+            release_lease(session, LEASE_NAME, self.owner)
+        with self._lock:
+            self._stats["is_leader"] = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        total_duration_ms = stats.pop("total_duration_ms")
+        stats["avg_duration_ms"] = round(total_duration_ms / stats["runs"], 2) if stats["runs"] else None
+        stats.update({
+            "running": self._task is not None and not self._task.done(),
+            "owner": self.owner,
+            "interval_seconds": self.interval,
+            "jitter_seconds": self.jitter,
+            "max_backoff_seconds": self.max_backoff,
+            "lease_seconds": self.lease_seconds,
+            "archive_interval_seconds": self.archive_interval,
+            "dispatcher": notification_dispatcher.stats(),
+        })
+        return stats
+
+
+notification_scheduler = NotificationScheduler(
+    engine,
+    interval=settings.NOTIFICATION_SCHEDULER_INTERVAL_SECONDS,
+    jitter=settings.NOTIFICATION_SCHEDULER_JITTER_SECONDS,
+    max_backoff=settings.NOTIFICATION_SCHEDULER_MAX_BACKOFF_SECONDS,
+    lease_seconds=settings.NOTIFICATION_SCHEDULER_LEASE_SECONDS,
+    archive_interval=settings.NOTIFICATION_ARCHIVE_INTERVAL_SECONDS,
+)
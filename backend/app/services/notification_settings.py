@@ -0,0 +1,262 @@
+"""
+알림 설정 캐시
+
+전체 알림 설정(NotificationSettings 단일 행)과 프로젝트/사용자별 덮어쓰기(NotificationSettingsOverride)를
+한 번 읽어 프로세스 전역 스냅샷으로 들고 있습니다. 생성기는 작업마다 쿼리하지 않고 스냅샷에서
+(프로젝트, 담당자) 조합의 설정을 풀어 씁니다.
+
+- 설정 쓰기(PATCH /notifications/settings, 덮어쓰기 변경)는 설정 행의 version 을 올리고 이 워커의 캐시를
+  바로 비웁니다.
+- 다른 워커의 변경은 VERSION_CHECK_SECONDS 마다 version 한 칸만 읽어 확인하고, 바뀌었으면 다시 읽습니다.
+- 설정 행이 아직 없으면 기본값(version 0)을 쓰고, 행은 쓰기 경로에서만 만듭니다.
+
+덮어쓰기 우선순위: 전체 설정 < 프로젝트 < 사용자
+"""
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields, replace
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.models import NotificationSettings, NotificationSettingsOverride
+
+VERSION_CHECK_SECONDS = 5
+
+
+@dataclass(frozen=True)
+class ResolvedSettings:
+    """한 범위(전체/프로젝트/사용자)에 적용되는 알림 설정 값 (NotificationSettings 의 설정 항목)"""
+    due_date_reminder_days: int
+    due_date_reminder_hour: int
+    enable_due_date_reminders: bool
+    enable_missing_brief_alerts: bool
+    enable_missing_dod_alerts: bool
+    stale_task_days: int
+    enable_stale_task_alerts: bool
+    enable_review_reminders: bool
+    review_reminder_frequency_days: int
+    enable_decision_review_reminders: bool
+    digest_interval_minutes: int
+    digest_min_items: int
+
+
+# 덮어쓰기/PATCH 로 바꿀 수 있는 항목
+SETTING_FIELDS = tuple(f.name for f in fields(ResolvedSettings))
+
+
+class SettingsOverrideValues(BaseModel):
+    """덮어쓰기 값 검증용 (ResolvedSettings 항목과 같은 타입, 지정하지 않은 항목은 None)"""
+    due_date_reminder_days: Optional[int] = Field(None, ge=0)
+    due_date_reminder_hour: Optional[int] = Field(None, ge=0, le=23)
+    enable_due_date_reminders: Optional[bool] = None
+    enable_missing_brief_alerts: Optional[bool] = None
+    enable_missing_dod_alerts: Optional[bool] = None
+    stale_task_days: Optional[int] = Field(None, ge=1)
+    enable_stale_task_alerts: Optional[bool] = None
+    enable_review_reminders: Optional[bool] = None
+    review_reminder_frequency_days: Optional[int] = Field(None, ge=1)
+    enable_decision_review_reminders: Optional[bool] = None
+    digest_interval_minutes: Optional[int] = Field(None, ge=0)
+    digest_min_items: Optional[int] = Field(None, ge=2)
+
+
+def validate_override_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """덮어쓰기 값을 항목 타입으로 검증/변환 (모르는 항목은 버림, 잘못된 값은 ValidationError)"""
+    known = {name: value for name, value in values.items() if name in SETTING_FIELDS}
+    return SettingsOverrideValues.model_validate(known).model_dump(exclude_none=True)
+
+
+def _stored_override_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """저장된 덮어쓰기 중 유효한 항목만 (검증 이전에 저장된 잘못된 값은 전체 설정을 쓰도록 건너뜀)"""
+    try:
+        return validate_override_values(values)
+    except ValidationError as exc:
+        invalid = {error["loc"][0] for error in exc.errors() if error["loc"]}
+        return validate_override_values({name: value for name, value in values.items() if name not in invalid})
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    id: Optional[int]
+    version: int
+    base: ResolvedSettings
+    projects: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    users: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    _resolved: Dict[Tuple[Optional[int], Optional[int]], ResolvedSettings] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def resolve(self, project_id: Optional[int] = None, user_id: Optional[int] = None) -> ResolvedSettings:
+        """프로젝트/사용자 덮어쓰기를 적용한 설정 (조합마다 한 번만 계산)"""
+        key = (project_id, user_id)
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            values = {**self.projects.get(project_id, {}), **self.users.get(user_id, {})}
+            resolved = replace(self.base, **values) if values else self.base
+            self._resolved[key] = resolved
+        return resolved
+
+    def as_dict(self) -> Dict[str, Any]:
+        """전체 설정 (API 응답용)"""
+        return {"id": self.id, **asdict(self.base), "version": self.version}
+
+    def _values(self, name: str):
+        yield getattr(self.base, name)
+        for overrides in (self.projects, self.users):
+            for values in overrides.values():
+                if name in values:
+                    yield values[name]
+
+    def any_enabled(self, name: str) -> bool:
+        """어느 범위에서든 켜져 있는지 (꺼져 있으면 생성기가 쿼리를 건너뜀)"""
+        return any(self._values(name))
+
+    def max_value(self, name: str) -> int:
+        """범위 중 가장 큰 값 (후보를 넓게 고른 뒤 작업별 설정으로 거르는 데 씀)"""
+        return max(self._values(name))
+
+    def min_value(self, name: str) -> int:
+        return min(self._values(name))
+
+
+def _settings_values(row: NotificationSettings) -> Dict[str, Any]:
+    return {name: getattr(row, name) for name in SETTING_FIELDS}
+
+
+def _base_values(row: Optional[NotificationSettings]) -> Dict[str, Any]:
+    """전체 설정 값 (검증에 걸리는 항목은 기본값으로 대신해 생성기가 잘못된 값으로 멈추지 않게 함)"""
+    defaults = _settings_values(NotificationSettings())
+    if row is None:
+        return defaults
+    return {**defaults, **_stored_override_values(_settings_values(row))}
+
+
+class NotificationSettingsCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._checked_at = 0.0
+        self.loads = 0
+
+    def _current_version(self, session: Session) -> int:
+        version = session.exec(
+            select(NotificationSettings.version).order_by(NotificationSettings.id).limit(1)
+        ).first()
+        return version or 0
+
+    def _load(self, session: Session) -> SettingsSnapshot:
+        row = session.exec(select(NotificationSettings).order_by(NotificationSettings.id).limit(1)).first()
+        projects: Dict[int, Dict[str, Any]] = {}
+        users: Dict[int, Dict[str, Any]] = {}
+        for override in session.exec(select(NotificationSettingsOverride)).all():
+            values = _stored_override_values(override.values or {})
+            if override.project_id is not None:
+                projects[override.project_id] = values
+            elif override.user_id is not None:
+                users[override.user_id] = values
+        return SettingsSnapshot(
+            id=row.id if row else None,
+            version=row.version if row else 0,
+            base=ResolvedSettings(**_base_values(row)),
+            projects=projects,
+            users=users,
+        )
+
+    def get(self, session: Session) -> SettingsSnapshot:
+        """캐시된 설정 스냅샷 (VERSION_CHECK_SECONDS 가 지났으면 version 을 확인해 갱신)"""
+        with self._lock:
+            snapshot = self._snapshot
+            fresh = snapshot is not None and time.monotonic() - self._checked_at < VERSION_CHECK_SECONDS
+        if fresh:
+            return snapshot
+        if snapshot is None or self._current_version(session) != snapshot.version:
+            snapshot = self._load(session)
+            with self._lock:
+                self.loads += 1
+        with self._lock:
+            self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                "cached": snapshot is not None,
+                "version": snapshot.version if snapshot else None,
+                "project_overrides": len(snapshot.projects) if snapshot else None,
+                "user_overrides": len(snapshot.users) if snapshot else None,
+                "loads": self.loads,
+            }
+
+
+notification_settings = NotificationSettingsCache()
+
+
+def get_or_create_settings_row(session: Session) -> NotificationSettings:
+    """쓰기 경로용 전체 설정 행 (없으면 기본값으로 추가, 커밋은 호출자가 함)"""
+    row = session.exec(select(NotificationSettings).order_by(NotificationSettings.id).limit(1)).first()
+    if row is None:
+        row = NotificationSettings()
+        session.add(row)
+        session.flush()
+    return row
+
+
+def bump_version(session: Session) -> None:
+    """설정 변경을 다른 워커에 알리기 위해 version 을 올립니다 (커밋은 호출자가 함)"""
+    row = get_or_create_settings_row(session)
+    session.connection().execute(
+        update(NotificationSettings.__table__)
+        .where(NotificationSettings.id == row.id)
+        .values(version=NotificationSettings.version + 1, updated_at=datetime.now(timezone.utc))
+    )
+    session.expire(row)
+
+
+def _find_override(session: Session, project_id: Optional[int], user_id: Optional[int]):
+    column = NotificationSettingsOverride.project_id if project_id is not None else NotificationSettingsOverride.user_id
+    return session.exec(
+        select(NotificationSettingsOverride).where(column == (project_id if project_id is not None else user_id))
+    ).first()
+
+
+def save_override(
+    session: Session, values: Dict[str, Any], project_id: Optional[int] = None, user_id: Optional[int] = None
+) -> NotificationSettingsOverride:
+    """
+    프로젝트 또는 사용자 덮어쓰기를 저장하고 version 을 올립니다 (values 로 통째로 교체).
+
+    값이 항목 타입/범위에 맞지 않으면 저장하지 않고 ValidationError(ValueError)를 냅니다.
+    """
+    values = validate_override_values(values)
+    override = _find_override(session, project_id, user_id)
+    if override is None:
+        override = NotificationSettingsOverride(project_id=project_id, user_id=user_id)
+    override.values = values
+    override.updated_at = datetime.now(timezone.utc)
+    session.add(override)
+    bump_version(session)
+    session.commit()
+    session.refresh(override)
+    notification_settings.invalidate()
+    return override
+
+
+def delete_override(session: Session, project_id: Optional[int] = None, user_id: Optional[int] = None) -> bool:
+    override = _find_override(session, project_id, user_id)
+    if override is None:
+        return False
+    session.delete(override)
+    bump_version(session)
+    session.commit()
+    notification_settings.invalidate()
+    return True
@@ -1,258 +1,612 @@
-from datetime import datetime, timedelta, timezone
-from typing import List
-from sqlmodel import Session, select
+import base64
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+from sqlalchemy import delete, event, exists, insert, or_, tuple_, update
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, func, select
+from app.db.dialects import insert_ignore
 from app.models import (
-    Notification, NotificationSettings, NotificationType, NotificationStatus,
-    Task, TaskState, Project, Brief, DoD, Review
+    Notification, NotificationType, NotificationStatus,
+    NotificationCheck, NotificationGenerationState,
+    Task, TaskState, Project, Brief, DoD, Review, DecisionLog
 )
+from app.services.content_stats import content_stats
+from app.services.notification_events import notification_broker
+from app.services.notification_digests import active_member_keys, apply_digests, delete_orphan_digests
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.notification_settings import SettingsSnapshot, notification_settings
+
+# 중복 알림 판단 기준이 되는 활성 상태 (dedupe_key 부분 유니크 인덱스 조건과 같음)
+ACTIVE_STATUSES = [NotificationStatus.PENDING, NotificationStatus.SENT]
+# 알림 대상이 되는 작업 상태
+ACTIVE_TASK_STATES = [TaskState.BACKLOG, TaskState.IN_PROGRESS]
+# 한 번에 평가할 대상이 이보다 많으면 (대량 가져오기 등) 전체 평가로 처리합니다
+MAX_INCREMENTAL_TARGETS = 5000
+# IN 목록 한 번에 넣는 키 수
+IN_CHUNK_SIZE = 500
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite 에서 읽은 시각은 tzinfo 없이 UTC 로 저장되어 있습니다
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def dedupe_key(
+    notification_type: NotificationType,
+    task_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    window: str = ""
+) -> str:
+    """
+    활성 알림 중복 판단 키
+
+    window 는 같은 대상이라도 새 알림이 필요한 구간 표시입니다 (마감일 알림은 마감일,
+    나머지는 빈 값이라 대상/타입마다 활성 알림 하나). models.NOTIFICATION_DEDUPE_BACKFILL 과 같은 형식입니다.
+    """
+    return f"{notification_type.value}:{task_id or ''}:{project_id or ''}:{window}"
+
+
+def encode_cursor(created_at: datetime, notification_id: int) -> str:
+    """알림 목록 커서 ("created_at|id" 의 URL-safe base64)"""
+    raw = f"{created_at.isoformat()}|{notification_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """encode_cursor 의 역. 형식이 틀리면 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, notification_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("잘못된 커서입니다.") from exc
+
 
 class NotificationService:
     def __init__(self, session: Session):
         self.session = session
         
-    def get_or_create_settings(self) -> NotificationSettings:
-        """알림 설정을 가져오거나 기본 설정을 생성합니다."""
-        settings = self.session.exec(select(NotificationSettings)).first()
-        if not settings:
-            settings = NotificationSettings()
-            self.session.add(settings)
-            self.session.commit()
-            self.session.refresh(settings)
-        return settings
+    def get_settings(self) -> SettingsSnapshot:
+        """캐시된 알림 설정 (프로젝트/사용자 덮어쓰기 포함)"""
+        return notification_settings.get(self.session)
+    
+    def _insert_notifications(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        알림 행들을 INSERT ... ON CONFLICT DO NOTHING 한 번으로 저장하고 실제로 추가된 개수를 반환합니다.
+        
+        같은 dedupe_key 의 활성 알림이 이미 있으면 유니크 인덱스 충돌로 건너뛰므로,
+        동시에 생성이 실행되어도 중복이 생기지 않습니다.
+        다이제스트 설정에 걸리는 (프로젝트, 타입) 묶음은 DIGEST 알림 하나로 저장합니다 (notification_digests).
+        """
+        if not rows:
+            return 0
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            row.setdefault("status", NotificationStatus.PENDING)
+            row.setdefault("scheduled_for", now)
+            row.setdefault("created_at", now)
+            row.setdefault("updated_at", now)
+            row.setdefault("dedupe_key", dedupe_key(row["type"], row.get("task_id"), row.get("project_id")))
+        
+        # 후보 키 중 이미 활성 알림이 있는 키만 (dedupe_key 인덱스로) 찾아 INSERT 양을 줄입니다
+        # (경쟁 상황은 ON CONFLICT 가 처리)
+        candidate_keys = list({row["dedupe_key"] for row in rows})
+        active_keys = set()
+        for start in range(0, len(candidate_keys), IN_CHUNK_SIZE):
+            active_keys.update(self.session.exec(
+                select(Notification.dedupe_key).where(
+                    Notification.dedupe_key.in_(candidate_keys[start:start + IN_CHUNK_SIZE]),
+                    Notification.status.in_(ACTIVE_STATUSES)
+                )
+            ).all())
+        active_keys |= active_member_keys(
+            self.session, {(row.get("project_id"), row["type"]) for row in rows if row.get("task_id") is not None}
+        )
+        rows = [row for row in rows if row["dedupe_key"] not in active_keys]
+        if not rows:
+            return 0
+        rows, created = apply_digests(self.session, rows, self.get_settings(), now)
+        if rows:
+            connection = self.session.connection()
+            created += connection.execute(insert_ignore(connection, Notification.__table__), rows).rowcount
+        return created
+    
+    @staticmethod
+    def _restrict(query, column, ids: Optional[Collection[int]]):
+        """ids 가 주어지면 해당 행으로 한정 (빈 목록이면 결과 없음)"""
+        if ids is None:
+            return query
+        return query.where(column.in_(list(ids)))
     
-    def generate_due_date_notifications(self) -> List[Notification]:
-        """마감일 기반 알림을 생성합니다."""
-        settings = self.get_or_create_settings()
-        if not settings.enable_due_date_reminders:
-            return []
+    def generate_due_date_notifications(self, task_ids: Optional[Collection[int]] = None) -> int:
+        """마감일 기반 알림을 생성합니다. task_ids 가 주어지면 해당 작업만 평가합니다."""
+        snapshot = self.get_settings()
+        if not snapshot.any_enabled("enable_due_date_reminders"):
+            return 0
             
-        notifications = []
         now = datetime.now(timezone.utc)
-        reminder_date = now + timedelta(days=settings.due_date_reminder_days)
+        # 후보는 가장 긴 알림 기간으로 고르고 작업별 설정(프로젝트/담당자 덮어쓰기)으로 거릅니다
+        reminder_date = now + timedelta(days=snapshot.max_value("due_date_reminder_days"))
         
-        # 마감일이 다가오는 작업들 찾기
+        # 마감일이 다가오는 작업들 (이미 알림이 있는 작업은 INSERT 시 dedupe_key 충돌로 제외)
         upcoming_tasks = self.session.exec(
-            select(Task).where(
-                Task.due_date.is_not(None),
-                Task.state.in_([TaskState.BACKLOG, TaskState.IN_PROGRESS]),
-                Task.due_date <= reminder_date.date()
+            self._restrict(
+                select(Task.id, Task.title, Task.project_id, Task.assignee_id, Task.due_date).where(
+                    Task.due_date.is_not(None),
+                    Task.state.in_(ACTIVE_TASK_STATES),
+                    Task.due_date <= reminder_date.date()
+                ),
+                Task.id, task_ids
             )
         ).all()
         
-        for task in upcoming_tasks:
-            # 이미 해당 작업에 대한 알림이 있는지 확인
-            existing = self.session.exec(
-                select(Notification).where(
-                    Notification.task_id == task.id,
-                    Notification.type == NotificationType.DUE_DATE_REMINDER,
-                    Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.SENT])
-                )
-            ).first()
+        rows = []
+        for task_id, title, project_id, assignee_id, due_date in upcoming_tasks:
+            settings = snapshot.resolve(project_id, assignee_id)
+            if not settings.enable_due_date_reminders:
+                continue
+            days_until_due = (due_date - now.date()).days
+            if days_until_due > settings.due_date_reminder_days:
+                continue
+            if days_until_due == 0:
+                heading = f"📅 오늘 마감: {title}"
+                message = f"작업 '{title}'이 오늘 마감입니다."
+            elif days_until_due < 0:
+                heading = f"⚠️ 마감 초과: {title}"
+                message = f"작업 '{title}'이 {abs(days_until_due)}일 지연되었습니다."
+            else:
+                heading = f"📅 마감 {days_until_due}일 전: {title}"
+                message = f"작업 '{title}'이 {days_until_due}일 후 마감입니다."
             
-            if not existing:
-                days_until_due = (task.due_date - now.date()).days
-                if days_until_due == 0:
-                    title = f"📅 오늘 마감: {task.title}"
-                    message = f"작업 '{task.title}'이 오늘 마감입니다."
-                elif days_until_due < 0:
-                    title = f"⚠️ 마감 초과: {task.title}"
-                    message = f"작업 '{task.title}'이 {abs(days_until_due)}일 지연되었습니다."
-                else:
-                    title = f"📅 마감 {days_until_due}일 전: {task.title}"
-                    message = f"작업 '{task.title}'이 {days_until_due}일 후 마감입니다."
-                
-                notification = Notification(
-                    type=NotificationType.DUE_DATE_REMINDER,
-                    title=title,
-                    message=message,
-                    task_id=task.id,
-                    project_id=task.project_id,
-                    scheduled_for=now
-                )
-                notifications.append(notification)
+            # 마감 N일 전 지정 시각에 발송되도록 예약 (이미 지났으면 바로)
+            remind_at = datetime.combine(
+                due_date - timedelta(days=settings.due_date_reminder_days),
+                time(hour=settings.due_date_reminder_hour), tzinfo=timezone.utc
+            )
+            rows.append({
+                "type": NotificationType.DUE_DATE_REMINDER,
+                "title": heading,
+                "message": message,
+                "task_id": task_id,
+                "project_id": project_id,
+                "scheduled_for": max(now, remind_at),
+                "dedupe_key": dedupe_key(
+                    NotificationType.DUE_DATE_REMINDER, task_id, project_id, window=due_date.isoformat()
+                ),
+            })
                 
-        return notifications
+        return self._insert_notifications(rows)
     
-    def generate_missing_component_notifications(self) -> List[Notification]:
-        """5SB, DoD 미작성 알림을 생성합니다."""
-        settings = self.get_or_create_settings()
-        notifications = []
-        now = datetime.now(timezone.utc)
+    def generate_missing_component_notifications(self, task_ids: Optional[Collection[int]] = None) -> int:
+        """5SB, DoD 미작성 알림을 생성합니다. task_ids 가 주어지면 해당 작업만 평가합니다."""
+        snapshot = self.get_settings()
+        created = 0
         
-        # 활성화된 작업들 가져오기
-        active_tasks = self.session.exec(
-            select(Task).where(
-                Task.state.in_([TaskState.BACKLOG, TaskState.IN_PROGRESS])
-            )
-        ).all()
+        components = []
+        if snapshot.any_enabled("enable_missing_brief_alerts"):
+            components.append((
+                Brief, NotificationType.MISSING_BRIEF, "enable_missing_brief_alerts",
+                lambda title: (f"📝 5SB 미작성: {title}", f"작업 '{title}'의 5문장 브리프를 작성해주세요.")
+            ))
+        if snapshot.any_enabled("enable_missing_dod_alerts"):
+            components.append((
+                DoD, NotificationType.MISSING_DOD, "enable_missing_dod_alerts",
+                lambda title: (f"🎯 DoD 미설정: {title}", f"작업 '{title}'의 완료 정의(DoD)를 설정해주세요.")
+            ))
         
-        for task in active_tasks:
-            # 5SB 미작성 체크
-            if settings.enable_missing_brief_alerts:
-                brief = self.session.exec(
-                    select(Brief).where(Brief.task_id == task.id)
-                ).first()
-                
-                if not brief:
-                    existing = self.session.exec(
-                        select(Notification).where(
-                            Notification.task_id == task.id,
-                            Notification.type == NotificationType.MISSING_BRIEF,
-                            Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.SENT])
-                        )
-                    ).first()
-                    
-                    if not existing:
-                        notification = Notification(
-                            type=NotificationType.MISSING_BRIEF,
-                            title=f"📝 5SB 미작성: {task.title}",
-                            message=f"작업 '{task.title}'의 5문장 브리프를 작성해주세요.",
-                            task_id=task.id,
-                            project_id=task.project_id,
-                            scheduled_for=now
-                        )
-                        notifications.append(notification)
+        for component, notification_type, enabled, describe in components:
+            # 활성 작업 중 구성 요소가 없는 작업들 (anti-join)
+            missing = self.session.exec(
+                self._restrict(
+                    select(Task.id, Task.title, Task.project_id, Task.assignee_id).where(
+                        Task.state.in_(ACTIVE_TASK_STATES),
+                        ~exists(select(component.id).where(component.task_id == Task.id))
+                    ),
+                    Task.id, task_ids
+                )
+            ).all()
             
-            # DoD 미작성 체크
-            if settings.enable_missing_dod_alerts:
-                dod = self.session.exec(
-                    select(DoD).where(DoD.task_id == task.id)
-                ).first()
-                
-                if not dod:
-                    existing = self.session.exec(
-                        select(Notification).where(
-                            Notification.task_id == task.id,
-                            Notification.type == NotificationType.MISSING_DOD,
-                            Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.SENT])
-                        )
-                    ).first()
-                    
-                    if not existing:
-                        notification = Notification(
-                            type=NotificationType.MISSING_DOD,
-                            title=f"🎯 DoD 미설정: {task.title}",
-                            message=f"작업 '{task.title}'의 완료 정의(DoD)를 설정해주세요.",
-                            task_id=task.id,
-                            project_id=task.project_id,
-                            scheduled_for=now
-                        )
-                        notifications.append(notification)
+            rows = []
+            for task_id, title, project_id, assignee_id in missing:
+                if not getattr(snapshot.resolve(project_id, assignee_id), enabled):
+                    continue
+                heading, message = describe(title)
+                rows.append({
+                    "type": notification_type,
+                    "title": heading,
+                    "message": message,
+                    "task_id": task_id,
+                    "project_id": project_id,
+                })
+            created += self._insert_notifications(rows)
                         
-        return notifications
+        return created
     
-    def generate_stale_task_notifications(self) -> List[Notification]:
-        """장기간 미진행 작업 알림을 생성합니다."""
-        settings = self.get_or_create_settings()
-        if not settings.enable_stale_task_alerts:
-            return []
+    def generate_stale_task_notifications(self, task_ids: Optional[Collection[int]] = None) -> int:
+        """장기간 미진행 작업 알림을 생성합니다. task_ids 가 주어지면 해당 작업만 평가합니다."""
+        snapshot = self.get_settings()
+        if not snapshot.any_enabled("enable_stale_task_alerts"):
+            return 0
             
-        notifications = []
         now = datetime.now(timezone.utc)
-        stale_threshold = now - timedelta(days=settings.stale_task_days)
+        stale_threshold = now - timedelta(days=snapshot.min_value("stale_task_days"))
         
         # 장기간 업데이트되지 않은 진행중 작업들
         stale_tasks = self.session.exec(
-            select(Task).where(
-                Task.state == TaskState.IN_PROGRESS,
-                Task.updated_at < stale_threshold
+            self._restrict(
+                select(Task.id, Task.title, Task.project_id, Task.assignee_id, Task.updated_at).where(
+                    Task.state == TaskState.IN_PROGRESS,
+                    Task.updated_at < stale_threshold
+                ),
+                Task.id, task_ids
             )
         ).all()
         
-        for task in stale_tasks:
-            existing = self.session.exec(
-                select(Notification).where(
-                    Notification.task_id == task.id,
-                    Notification.type == NotificationType.STALE_TASK,
-                    Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.SENT])
-                )
-            ).first()
-            
-            if not existing:
-                days_stale = (now - task.updated_at).days
-                notification = Notification(
-                    type=NotificationType.STALE_TASK,
-                    title=f"⏰ 장기 미진행: {task.title}",
-                    message=f"작업 '{task.title}'이 {days_stale}일째 업데이트되지 않았습니다.",
-                    task_id=task.id,
-                    project_id=task.project_id,
-                    scheduled_for=now
-                )
-                notifications.append(notification)
+        rows = []
+        for task_id, title, project_id, assignee_id, updated_at in stale_tasks:
+            settings = snapshot.resolve(project_id, assignee_id)
+            stale_for = now - _as_utc(updated_at)
+            if not settings.enable_stale_task_alerts or stale_for <= timedelta(days=settings.stale_task_days):
+                continue
+            days_stale = stale_for.days
+            rows.append({
+                "type": NotificationType.STALE_TASK,
+                "title": f"⏰ 장기 미진행: {title}",
+                "message": f"작업 '{title}'이 {days_stale}일째 업데이트되지 않았습니다.",
+                "task_id": task_id,
+                "project_id": project_id,
+            })
                 
-        return notifications
+        return self._insert_notifications(rows)
     
-    def generate_review_schedule_notifications(self) -> List[Notification]:
-        """정기 리뷰 스케줄 알림을 생성합니다."""
-        settings = self.get_or_create_settings()
-        if not settings.enable_review_reminders:
-            return []
+    def generate_review_schedule_notifications(self, project_ids: Optional[Collection[int]] = None) -> int:
+        """정기 리뷰 스케줄 알림을 생성합니다. project_ids 가 주어지면 해당 프로젝트만 평가합니다."""
+        snapshot = self.get_settings()
+        if not snapshot.any_enabled("enable_review_reminders"):
+            return 0
             
-        notifications = []
         now = datetime.now(timezone.utc)
+        review_since = now - timedelta(days=snapshot.min_value("review_reminder_frequency_days"))
+        
+        # 가장 짧은 리뷰 주기 안에 리뷰가 없는 프로젝트들 (프로젝트별 주기는 아래에서 확인)
+        last_review = (
+            select(func.max(Review.created_at))
+            .join(Task, Review.task_id == Task.id)
+            .where(Task.project_id == Project.id)
+            .scalar_subquery()
+        )
+        projects = self.session.exec(
+            self._restrict(
+                select(Project.id, Project.name, last_review)
+                .where(or_(last_review.is_(None), last_review <= review_since)),
+                Project.id, project_ids
+            )
+        ).all()
+        
+        rows = []
+        for project_id, name, reviewed_at in projects:
+            settings = snapshot.resolve(project_id)
+            if not settings.enable_review_reminders:
+                continue
+            if reviewed_at and _as_utc(reviewed_at) > now - timedelta(days=settings.review_reminder_frequency_days):
+                continue
+            rows.append({
+                "type": NotificationType.REVIEW_SCHEDULE,
+                "title": f"📋 정기 리뷰 필요: {name}",
+                "message": f"프로젝트 '{name}'의 정기 리뷰를 진행해주세요.",
+                "project_id": project_id,
+            })
+                    
+        return self._insert_notifications(rows)
+    
+    def generate_decision_review_notifications(self, task_ids: Optional[Collection[int]] = None) -> int:
+        """
+        D+7 리뷰 예정일이 된 결정 기록 알림을 생성합니다. task_ids 가 주어지면 해당 작업의 결정만 평가합니다.
         
-        # 최근 리뷰가 없는 진행중인 프로젝트들
-        projects = self.session.exec(select(Project)).all()
+        리뷰가 작성되지 않은 결정만 review_due_on 이 있으므로 인덱스 범위 조회 한 번입니다.
+        """
+        snapshot = self.get_settings()
+        if not snapshot.any_enabled("enable_decision_review_reminders"):
+            return 0
         
-        for project in projects:
-            # 해당 프로젝트의 최근 리뷰 확인
-            recent_review = self.session.exec(
-                select(Review)
-                .join(Task, Review.task_id == Task.id)
-                .where(
-                    Task.project_id == project.id,
-                    Review.created_at > now - timedelta(days=settings.review_reminder_frequency_days)
+        today = datetime.now(timezone.utc).date()
+        due_decisions = self.session.exec(
+            self._restrict(
+                select(
+                    DecisionLog.id, DecisionLog.task_id, DecisionLog.problem, DecisionLog.review_due_on,
+                    Task.project_id, Task.assignee_id
                 )
-                .order_by(Review.created_at.desc())
-            ).first()
-            
-            if not recent_review:
-                existing = self.session.exec(
-                    select(Notification).where(
-                        Notification.project_id == project.id,
-                        Notification.type == NotificationType.REVIEW_SCHEDULE,
-                        Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.SENT])
+                .join(Task, Task.id == DecisionLog.task_id)
+                .where(DecisionLog.review_due_on <= today),
+                DecisionLog.task_id, task_ids
+            )
+        ).all()
+        
+        rows = []
+        for decision_id, task_id, problem, review_due_on, project_id, assignee_id in due_decisions:
+            if not snapshot.resolve(project_id, assignee_id).enable_decision_review_reminders:
+                continue
+            days_overdue = (today - review_due_on).days
+            rows.append({
+                "type": NotificationType.DECISION_REVIEW_DUE,
+                "title": f"🧭 D+7 리뷰 필요: {problem}",
+                "message": (
+                    f"결정 '{problem}'의 D+7 리뷰를 작성해주세요."
+                    + (f" ({days_overdue}일 지남)" if days_overdue > 0 else "")
+                ),
+                "task_id": task_id,
+                "project_id": project_id,
+                # 작업 하나에 결정이 여러 개일 수 있으므로 결정마다 활성 알림 하나
+                "dedupe_key": dedupe_key(
+                    NotificationType.DECISION_REVIEW_DUE, task_id, project_id, window=f"decision:{decision_id}"
+                ),
+            })
+        
+        return self._insert_notifications(rows)
+    
+    def _get_or_create_state(self) -> NotificationGenerationState:
+        state = self.session.exec(select(NotificationGenerationState)).first()
+        if not state:
+            state = NotificationGenerationState()
+            self.session.add(state)
+        return state
+    
+    def _generate(self, task_ids: Optional[Collection[int]] = None, project_ids: Optional[Collection[int]] = None) -> int:
+        created = 0
+        created += self.generate_due_date_notifications(task_ids)
+        created += self.generate_missing_component_notifications(task_ids)
+        created += self.generate_stale_task_notifications(task_ids)
+        created += self.generate_review_schedule_notifications(project_ids)
+        created += self.generate_decision_review_notifications(task_ids)
+        return created
+    
+    def _schedule_checks(
+        self,
+        snapshot: SettingsSnapshot,
+        now: datetime,
+        task_ids: Optional[Collection[int]] = None,
+        project_ids: Optional[Collection[int]] = None
+    ) -> int:
+        """
+        시간이 지나야 성립하는 조건의 다음 평가 시각을 예약합니다 (None 이면 전체 다시 예약).
+        
+        - 마감 임박: 마감일 - due_date_reminder_days 의 0시 (UTC)
+        - 장기 미진행: 진행중 작업의 updated_at + stale_task_days
+        - 리뷰 주기: 마지막 리뷰 + review_reminder_frequency_days (이미 지났으면 지금부터 한 주기 뒤)
+        - 결정 D+7 리뷰: 리뷰 예정일(review_due_on)의 0시 (UTC)
+        """
+        future = NotificationCheck.check_at > now
+        if task_ids is None and project_ids is None:
+            self.session.execute(delete(NotificationCheck).where(future))
+        else:
+            self.session.execute(delete(NotificationCheck).where(future, or_(
+                NotificationCheck.task_id.in_(list(task_ids or ())),
+                NotificationCheck.project_id.in_(list(project_ids or ()))
+            )))
+        
+        rows = []
+        if task_ids is None or task_ids:
+            tasks = self.session.exec(
+                self._restrict(
+                    select(
+                        Task.id, Task.project_id, Task.assignee_id, Task.state, Task.due_date, Task.updated_at
+                    ).where(Task.state.in_(ACTIVE_TASK_STATES)),
+                    Task.id, task_ids
+                )
+            ).all()
+            for task_id, project_id, assignee_id, state, due_date, updated_at in tasks:
+                settings = snapshot.resolve(project_id, assignee_id)
+                if settings.enable_due_date_reminders and due_date is not None:
+                    check_at = datetime.combine(
+                        due_date - timedelta(days=settings.due_date_reminder_days), time.min, tzinfo=timezone.utc
                     )
-                ).first()
-                
-                if not existing:
-                    notification = Notification(
-                        type=NotificationType.REVIEW_SCHEDULE,
-                        title=f"📋 정기 리뷰 필요: {project.name}",
-                        message=f"프로젝트 '{project.name}'의 정기 리뷰를 진행해주세요.",
-                        project_id=project.id,
-                        scheduled_for=now
+                    if check_at > now:
+                        rows.append({"task_id": task_id, "check_at": check_at})
+                if settings.enable_stale_task_alerts and state == TaskState.IN_PROGRESS:
+                    check_at = _as_utc(updated_at) + timedelta(days=settings.stale_task_days)
+                    if check_at > now:
+                        rows.append({"task_id": task_id, "check_at": check_at})
+            
+            if snapshot.any_enabled("enable_decision_review_reminders"):
+                upcoming_reviews = self.session.exec(
+                    self._restrict(
+                        select(DecisionLog.task_id, DecisionLog.review_due_on)
+                        .where(DecisionLog.review_due_on > now.date()),
+                        DecisionLog.task_id, task_ids
                     )
-                    notifications.append(notification)
-                    
-        return notifications
+                ).all()
+                for task_id, review_due_on in upcoming_reviews:
+                    rows.append({
+                        "task_id": task_id,
+                        "check_at": datetime.combine(review_due_on, time.min, tzinfo=timezone.utc),
+                    })
+        
+        if snapshot.any_enabled("enable_review_reminders") and (project_ids is None or project_ids):
+            last_reviews = self.session.exec(
+                self._restrict(
+                    select(Project.id, func.max(Review.created_at))
+                    .outerjoin(Task, Task.project_id == Project.id)
+                    .outerjoin(Review, Review.task_id == Task.id)
+                    .group_by(Project.id),
+                    Project.id, project_ids
+                )
+            ).all()
+            for project_id, last_review in last_reviews:
+                settings = snapshot.resolve(project_id)
+                if not settings.enable_review_reminders:
+                    continue
+                frequency = timedelta(days=settings.review_reminder_frequency_days)
+                check_at = _as_utc(last_review) + frequency if last_review else now
+                if check_at <= now:
+                    check_at = now + frequency
+                rows.append({"project_id": project_id, "check_at": check_at})
+        
+        if rows:
+            self.session.execute(insert(NotificationCheck), rows)
+        return len(rows)
+    
+    def _due_checks(self, now: datetime) -> Tuple[Set[int], Set[int], Optional[int]]:
+        """평가 시각이 된 (작업 ID, 프로젝트 ID, 마지막 check ID)"""
+        due = self.session.exec(
+            select(NotificationCheck.id, NotificationCheck.task_id, NotificationCheck.project_id)
+            .where(NotificationCheck.check_at <= now)
+        ).all()
+        task_ids = {task_id for _, task_id, _ in due if task_id is not None}
+        project_ids = {project_id for _, _, project_id in due if project_id is not None}
+        return task_ids, project_ids, max((check_id for check_id, _, _ in due), default=None)
     
-    def generate_all_notifications(self) -> List[Notification]:
-        """모든 타입의 알림을 생성합니다."""
-        all_notifications = []
+    def generate_all_notifications(self, full: bool = False) -> int:
+        """
+        알림을 생성하고 생성된 개수를 반환합니다.
         
-        all_notifications.extend(self.generate_due_date_notifications())
-        all_notifications.extend(self.generate_missing_component_notifications())
-        all_notifications.extend(self.generate_stale_task_notifications())
-        all_notifications.extend(self.generate_review_schedule_notifications())
+        처음 실행, 알림 설정 변경 후, full=True 일 때는 전체 작업/프로젝트를 평가하고 시간 조건 평가 시각을
+        모두 다시 예약합니다. 그 밖에는 평가 시각이 된 NotificationCheck (마지막 실행 이후 바뀐 작업/프로젝트와
+        시간 조건이 성립한 대상)만 평가하므로, 새 변경이 없으면 설정/상태/check_at 인덱스 조회로 끝납니다.
         
-        # 데이터베이스에 저장
-        for notification in all_notifications:
-            self.session.add(notification)
+        생성기마다 후보 SELECT 한 번 + INSERT ... ON CONFLICT DO NOTHING 한 번이고,
+        중복은 dedupe_key 유니크 인덱스가 막습니다.
+        """
+        snapshot = self.get_settings()
+        state = self._get_or_create_state()
+        now = datetime.now(timezone.utc)
         
-        if all_notifications:
-            self.session.commit()
+        settings_changed = state.settings_version != snapshot.version
+        task_ids, project_ids, last_check_id = set(), set(), None
+        if not (full or state.full_run_at is None or settings_changed):
+            task_ids, project_ids, last_check_id = self._due_checks(now)
+            if last_check_id is None:
+                return 0
+            if task_ids:
+                # 작업 변경은 소속 프로젝트의 리뷰 주기 조건에도 영향을 줍니다 (리뷰 삭제 등)
+                project_ids |= set(self.session.exec(
+                    select(Task.project_id).where(Task.id.in_(list(task_ids)))
+                ).all())
+            full = len(task_ids) + len(project_ids) > MAX_INCREMENTAL_TARGETS
+        
+        if full or last_check_id is None:
+            created = self._generate()
+            self._schedule_checks(snapshot, now)
+            self.session.execute(delete(NotificationCheck).where(NotificationCheck.check_at <= now))
+            state.full_run_at = now
+            state.settings_version = snapshot.version
+        else:
+            created = self._generate(task_ids, project_ids)
+            self.session.execute(delete(NotificationCheck).where(
+                NotificationCheck.id <= last_check_id,
+                NotificationCheck.check_at <= now
+            ))
+            self._schedule_checks(snapshot, now, task_ids, project_ids)
+        
+        state.last_run_at = now
+        self.session.add(state)
+        self.session.commit()
+        if created:
+            # bulk INSERT 는 ORM 변경 피드를 거치지 않으므로 개수 캐시 재집계와 실시간 전송을 직접 알립니다
+            content_stats.invalidate()
+            notification_broker.publish_new()
             
-        return all_notifications
+        return created
+    
+    @staticmethod
+    def filter_conditions(
+        ids: Optional[Collection[int]] = None,
+        status: Optional[NotificationStatus] = None,
+        notification_type: Optional[NotificationType] = None,
+        project_id: Optional[int] = None,
+        task_id: Optional[int] = None,
+        older_than_days: Optional[int] = None
+    ) -> List[Any]:
+        """알림 목록/일괄 처리용 WHERE 조건 목록"""
+        conditions = []
+        if ids is not None:
+            conditions.append(Notification.id.in_(list(ids)))
+        if status is not None:
+            conditions.append(Notification.status == status)
+        if notification_type is not None:
+            conditions.append(Notification.type == notification_type)
+        if project_id is not None:
+            conditions.append(Notification.project_id == project_id)
+        if task_id is not None:
+            conditions.append(Notification.task_id == task_id)
+        if older_than_days is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+            conditions.append(Notification.created_at < cutoff)
+        return conditions
+    
+    def bulk_update_status(self, conditions: List[Any], status: NotificationStatus) -> int:
+        """
+        조건에 맞는 알림의 상태를 UPDATE 한 번으로 바꾸고 바뀐 개수를 반환합니다.
+        
+        이미 같은 상태인 알림은 건드리지 않으므로 반환값이 실제로 바뀐 개수입니다.
+        """
+        now = datetime.now(timezone.utc)
+        values = {"status": status, "updated_at": now}
+        if status == NotificationStatus.READ:
+            values["read_at"] = now
+        elif status == NotificationStatus.DISMISSED:
+            values["dismissed_at"] = now
+        elif status == NotificationStatus.SENT:
+            values["sent_at"] = now
+        
+        updated_ids = self.session.connection().execute(
+            update(Notification.__table__)
+            .where(*conditions, Notification.status != status)
+            .values(**values)
+            .returning(Notification.id)
+        ).scalars().all()
+        self.session.commit()
+        if updated_ids:
+            # ORM 을 거치지 않은 UPDATE 이므로 개수 캐시를 다시 집계하고 발송 예약에서 뺍니다
+            content_stats.invalidate()
+            if status != NotificationStatus.PENDING:
+                notification_dispatcher.cancel(updated_ids)
+        return len(updated_ids)
+    
+    def bulk_delete(self, conditions: List[Any]) -> int:
+        """조건에 맞는 알림을 DELETE 한 번으로 지우고 지운 개수를 반환합니다."""
+        deleted_ids = self.session.connection().execute(
+            delete(Notification.__table__).where(*conditions).returning(Notification.id)
+        ).scalars().all()
+        if deleted_ids:
+            delete_orphan_digests(self.session)
+        self.session.commit()
+        if deleted_ids:
+            content_stats.invalidate()
+            notification_dispatcher.cancel(deleted_ids)
+        return len(deleted_ids)
+    
+    def list_notifications(
+        self, conditions: List[Any], limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Notification], Optional[str]]:
+        """
+        최신순 알림 한 페이지와 다음 페이지 커서를 돌려줍니다 (마지막 페이지면 커서 None).
+        
+        (created_at, id) 키셋 페이지네이션이라 OFFSET 없이 인덱스에서 바로 이어 읽습니다.
+        """
+        query = select(Notification).where(*conditions)
+        if cursor:
+            query = query.where(tuple_(Notification.created_at, Notification.id) < decode_cursor(cursor))
+        rows = self.session.exec(
+            query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1)
+        ).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
     
     def get_pending_notifications(self) -> List[Notification]:
-        """대기중인 알림들을 가져옵니다."""
+        """
+        확인을 기다리는 알림들을 가져옵니다.
+        
+        예약 시각이 된 알림은 발송기(notification_dispatcher)가 SENT 로 바꾸므로 SENT 알림과,
+        발송기가 아직 처리하지 않은 예약 시각이 지난 PENDING 알림을 함께 돌려줍니다.
+        """
         now = datetime.now(timezone.utc)
         return self.session.exec(
-            select(Notification).where(
-                Notification.status == NotificationStatus.PENDING,
-                Notification.scheduled_for <= now
-            ).order_by(Notification.scheduled_for.desc())
+            select(Notification).where(or_(
+                Notification.status == NotificationStatus.SENT,
+                (Notification.status == NotificationStatus.PENDING) & (Notification.scheduled_for <= now)
+            )).order_by(Notification.scheduled_for.desc())
         ).all()
     
     def mark_notification_sent(self, notification_id: int):
@@ -277,4 +631,35 @@ class NotificationService:
         if notification:
             notification.status = NotificationStatus.DISMISSED
             notification.dismissed_at = datetime.now(timezone.utc)
-            self.session.commit()
\ No newline at end of file
+            self.session.commit()
+
+
+# 알림 조건에 영향을 주는 모델 -> 변경 행에서 (task_id, project_id) 를 꺼내는 함수
+_CHECK_TARGETS = {
+    Task: lambda obj: (obj.id, obj.project_id),
+    Brief: lambda obj: (obj.task_id, None),
+    DoD: lambda obj: (obj.task_id, None),
+    Review: lambda obj: (obj.task_id, None),
+    DecisionLog: lambda obj: (obj.task_id, None),
+    Project: lambda obj: (None, obj.id),
+}
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _mark_changed_for_check(session, flush_context):
+    """바뀐 작업/프로젝트를 같은 트랜잭션에서 NotificationCheck 로 표시합니다."""
+    targets = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        target = _CHECK_TARGETS.get(type(obj))
+        if target is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        targets.add(target(obj))
+    if not targets:
+        return
+    now = datetime.now(timezone.utc)
+    session.connection().execute(insert(NotificationCheck), [
+        {"task_id": task_id, "project_id": project_id, "check_at": now}
+        for task_id, project_id in targets
+    ])
@@ -0,0 +1,215 @@
+"""
+프로젝트 유사도용 TF-IDF 희소 인덱스
+
+프로젝트 이름, 설명, 작업 제목, 5SB 본문을 하나의 문서로 보고
+term -> {project_id: tf} 역색인을 유지합니다. 변경 피드로 받은 쓰기는
+더티 표시만 해 두었다가 다음 조회 때 해당 프로젝트만 다시 색인합니다.
+다른 워커의 쓰기는 조회 전에 ChangeLog 로 따라잡습니다 (삭제된 작업/브리프는 프로젝트를 알 수 없어 전체 재색인).
+
+유사 프로젝트 조회는 기준 프로젝트의 가중치 상위 term들의 posting만 순회하는
+희소 코사인 top-k이므로 비용이 전체 프로젝트 수가 아니라 posting 길이에 비례합니다.
+"""
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlmodel import Session, select
+
+from app.db import changes
+from app.models import Project, Task, Brief
+from app.services.change_log import ChangeLogCursor
+from app.services.text import tokenize
+
+# 조회 시 사용할 기준 프로젝트 term 최대 개수
+MAX_QUERY_TERMS = 16
+# 전체 문서의 이 비율 이상에 등장하는 term은 변별력이 없으므로 조회에서 제외
+MAX_DF_RATIO = 0.1
+# 문서 수가 이보다 적으면 DF 상한을 두지 않습니다 (작은 코퍼스에서는 공유 term 대부분이 상한에 걸리므로
+# 흔한 term 은 평활 idf 가중치로만 낮춥니다)
+MIN_DOCS_FOR_DF_CEILING = 50
+# 코퍼스 크기가 이 비율 이상 변하면 전체 문서 norm을 다시 계산
+RENORMALIZE_DRIFT = 0.1
+
+INDEXED_TABLES = [Project.__tablename__, Task.__tablename__, Brief.__tablename__]
+
+
+class ProjectSimilarityIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._norms: Dict[int, float] = {}
+        self._normalized_at_size = 0
+        self._dirty_projects: Set[int] = set()
+        self._dirty_tasks: Set[int] = set()
+        self._cursor = ChangeLogCursor(INDEXED_TABLES)
+
+    # ---- 변경 추적 ----
+    def on_changes(self, batch: List[changes.Change]) -> None:
+        with self._lock:
+            for change in batch:
+                if change.table == Project.__tablename__:
+                    self._dirty_projects.add(change.id)
+                elif change.table == Task.__tablename__:
+                    if change.values.get("project_id") is not None:
+                        self._dirty_projects.add(change.values["project_id"])
+                elif change.table == Brief.__tablename__:
+                    if change.values.get("task_id") is not None:
+                        self._dirty_tasks.add(change.values["task_id"])
+
+    # ---- 색인 ----
+    def _idf(self, term: str) -> float:
+        n = len(self._doc_terms)
+        df = len(self._postings.get(term, ()))
+        return math.log((1 + n) / (1 + df)) + 1.0
+
+    def _norm(self, terms: Dict[str, float]) -> float:
+        return math.sqrt(sum((tf * self._idf(t)) ** 2 for t, tf in terms.items())) or 1.0
+
+    def _remove_doc(self, project_id: int) -> None:
+        for term in self._doc_terms.pop(project_id, {}):
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(project_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._norms.pop(project_id, None)
+
+    def _add_doc(self, project_id: int, texts: Iterable[str], with_norm: bool = True) -> None:
+        counts = Counter()
+        for text in texts:
+            counts.update(tokenize(text or ""))
+        terms = {t: 1.0 + math.log(c) for t, c in counts.items()}
+        self._doc_terms[project_id] = terms
+        for term, tf in terms.items():
+            self._postings[term][project_id] = tf
+        if with_norm:
+            self._norms[project_id] = self._norm(terms)
+
+    def _load_texts(self, session: Session, project_ids: Iterable[int] = None) -> Dict[int, List[str]]:
+        project_query = select(Project.id, Project.name, Project.description)
+        task_query = select(Task.project_id, Task.title)
+        brief_query = select(
+            Task.project_id, Brief.purpose, Brief.success_criteria,
+            Brief.constraints, Brief.priority, Brief.validation
+        ).join(Task, Brief.task_id == Task.id)
+
+        if project_ids is not None:
+            ids = list(project_ids)
+            project_query = project_query.where(Project.id.in_(ids))
+            task_query = task_query.where(Task.project_id.in_(ids))
+            brief_query = brief_query.where(Task.project_id.in_(ids))
+
+        texts: Dict[int, List[str]] = {}
+        for pid, name, description in session.exec(project_query).all():
+            texts[pid] = [name, description or ""]
+        for pid, title in session.exec(task_query).all():
+            if pid in texts:
+                texts[pid].append(title)
+        for pid, *brief_fields in session.exec(brief_query).all():
+            if pid in texts:
+                texts[pid].extend(brief_fields)
+        return texts
+
+    def _renormalize(self) -> None:
+        self._norms = {pid: self._norm(terms) for pid, terms in self._doc_terms.items()}
+        self._normalized_at_size = len(self._doc_terms)
+
+    def _catch_up(self, session: Session) -> None:
+        """다른 워커에서 바뀐 행을 더티 표시 (놓친 변경이 있거나 지워진 작업/브리프가 있으면 전체 재색인)"""
+        changed = self._cursor.pending(session)
+        if changed is None:
+            self._built = False
+            return
+        self._dirty_projects.update(changed.get(Project.__tablename__, ()))
+        task_ids = changed.get(Task.__tablename__, set())
+        brief_ids = changed.get(Brief.__tablename__, set())
+        if task_ids:
+            found = session.exec(select(Task.id, Task.project_id).where(Task.id.in_(list(task_ids)))).all()
+            self._dirty_projects.update(pid for _, pid in found)
+            if len(found) < len(task_ids):
+                self._built = False
+        if brief_ids:
+            found = session.exec(select(Brief.id, Brief.task_id).where(Brief.id.in_(list(brief_ids)))).all()
+            self._dirty_tasks.update(tid for _, tid in found)
+            if len(found) < len(brief_ids):
+                self._built = False
+
+    def ensure_fresh(self, session: Session) -> None:
+        """첫 사용 시 전체 색인, 이후에는 더티 프로젝트만 재색인"""
+        with self._lock:
+            if self._built:
+                self._catch_up(session)
+            if not self._built:
+                self._cursor.start(session)
+                self._doc_terms = {}
+                self._postings = defaultdict(dict)
+                self._norms = {}
+                self._dirty_projects.clear()
+                self._dirty_tasks.clear()
+                for pid, texts in self._load_texts(session).items():
+                    self._add_doc(pid, texts, with_norm=False)
+                self._renormalize()
+                self._built = True
+                return
+
+            dirty = set(self._dirty_projects)
+            if self._dirty_tasks:
+                dirty.update(session.exec(
+                    select(Task.project_id).where(Task.id.in_(list(self._dirty_tasks)))
+                ).all())
+            self._dirty_projects.clear()
+            self._dirty_tasks.clear()
+            if not dirty:
+                return
+
+            texts = self._load_texts(session, dirty)
+            for pid in dirty:
+                self._remove_doc(pid)
+                if pid in texts:
+                    self._add_doc(pid, texts[pid])
+
+            size = len(self._doc_terms)
+            if abs(size - self._normalized_at_size) > RENORMALIZE_DRIFT * max(self._normalized_at_size, 1):
+                self._renormalize()
+
+    # ---- 조회 ----
+    def similar(self, project_id: int, limit: int) -> List[Tuple[int, float]]:
+        """기준 프로젝트와 코사인 유사도가 높은 (project_id, score) 목록"""
+        with self._lock:
+            terms = self._doc_terms.get(project_id)
+            if not terms:
+                return []
+
+            n = len(self._doc_terms)
+            max_df = max(2, int(MAX_DF_RATIO * n)) if n >= MIN_DOCS_FOR_DF_CEILING else n
+            weighted = []
+            for term, tf in terms.items():
+                df = len(self._postings.get(term, ()))
+                # df == 1 이면 기준 프로젝트에만 있는 term
+                if 1 < df <= max_df:
+                    weighted.append((tf * self._idf(term), term))
+            # 동점은 term 사전순으로 정렬해 결과를 결정적으로 유지
+            query_terms = heapq.nsmallest(MAX_QUERY_TERMS, weighted, key=lambda x: (-x[0], x[1]))
+
+            scores: Dict[int, float] = defaultdict(float)
+            for weight, term in query_terms:
+                idf = self._idf(term)
+                for pid, tf in self._postings[term].items():
+                    if pid != project_id:
+                        scores[pid] += weight * tf * idf
+
+            query_norm = self._norms[project_id]
+            ranked = heapq.nsmallest(
+                limit,
+                ((pid, acc / (query_norm * self._norms[pid])) for pid, acc in scores.items()),
+                key=lambda x: (-x[1], x[0])
+            )
+            return ranked
+
+
+similarity_index = ProjectSimilarityIndex()
+changes.subscribe(similarity_index.on_changes)
@@ -0,0 +1,374 @@
+"""
+저장된 검색과 쓰기 시점 percolation
+
+콘텐츠(프로젝트, 작업, 5SB, 의사결정, 리뷰)가 생성되거나 검색 대상 필드가 수정되어 커밋되면, 문서를
+저장된 검색 전체와 대조해 일치하는 검색의 사용자에게 알림을 만듭니다.
+
+- 대조 대상은 지속 ChangeLog 에서 읽습니다 (ChangeLogConsumer 워터마크 "saved-search-percolation").
+  재시작/장애 중에 쓰인 변경도 다음 실행에서 처리하고, 알림 스케줄러 설정과 무관하게 워커마다
+  saved_search_percolation 태스크가 PERCOLATE_SECONDS 마다 (같은 워커의 쓰기면 바로) 처리합니다.
+  여러 워커가 같은 구간을 읽어도 워터마크를 compare-and-set 으로 올린 한 워커의 알림만 커밋됩니다.
+- 쓰기 경로(변경 피드 콜백)는 태스크를 깨우기만 합니다.
+- 알림 dedupe_key 는 "saved_search:검색 ID:타입:문서 ID" 라, 같은 문서의 활성 알림이 있으면
+  다시 만들지 않습니다.
+
+저장된 검색마다 DB 쿼리를 돌리지 않고, 검색어 단어에 대한 역색인을 씁니다.
+- 각 검색은 가장 긴(가장 선택적인) 단어 하나를 anchor 로 역색인에 등록합니다.
+- 문서가 들어오면 문서 단어들의 접두사(최대 MAX_TERM_LENGTH 글자)로 anchor 를 조회해 후보를 뽑고,
+  후보 검색의 나머지 단어가 모두 문서 단어의 접두사인지 같은 접두사 집합으로 확인합니다.
+  (검색어 단어가 문서 단어의 접두사이면 일치: "설계" ~ "설계를")
+문서당 비용은 문서 단어 수에 비례하고 저장된 검색 수와는 거의 무관합니다.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.db import changes
+from app.db.dialects import insert_ignore
+from app.db.session import engine
+from app.models import ChangeLog, SavedSearch, Notification, NotificationStatus, NotificationType
+from app.services.change_log import advance_consumer, consumer_position
+from app.services.content_stats import content_stats
+from app.services.notification_events import notification_broker
+from app.services.search_documents import CONTENT_TYPES, TABLE_CONTENT_TYPES, document_fields
+from app.services.text import tokenize
+
+# percolation 대상 콘텐츠 타입
+PERCOLATED_TYPES = {"projects", "tasks", "briefs", "decisions", "reviews"}
+# 검색어 단어 최대 길이 (문서 단어 접두사도 이 길이까지만 만듭니다)
+MAX_TERM_LENGTH = 12
+# 다른 워커에서 바뀐 저장된 검색을 반영하기 위한 재적재 주기
+RELOAD_SECONDS = 60
+# ChangeLog 에서 읽는 테이블 (저장된 검색 + 대상 콘텐츠)
+PERCOLATED_TABLES = [SavedSearch.__tablename__] + [
+    table for table, content_type in TABLE_CONTENT_TYPES.items() if content_type in PERCOLATED_TYPES
+]
+# ChangeLog 소비자 이름
+CONSUMER_NAME = "saved-search-percolation"
+# 한 번에 읽는 ChangeLog 행 수
+PERCOLATE_BATCH = 500
+# 다른 워커의 쓰기를 확인하는 주기 (같은 워커의 쓰기는 바로 깨움)
+PERCOLATE_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+TYPE_LABELS = {
+    "projects": "프로젝트",
+    "tasks": "작업",
+    "briefs": "5SB",
+    "decisions": "의사결정",
+    "reviews": "리뷰",
+}
+
+
+def query_terms(query: str) -> Tuple[str, ...]:
+    """저장된 검색어의 단어들 (중복 제거, 최대 길이로 자름)"""
+    return tuple(dict.fromkeys(t[:MAX_TERM_LENGTH] for t in tokenize(query, min_length=1)))
+
+
+def document_prefixes(texts: Iterable[str]) -> Set[str]:
+    prefixes = set()
+    for text in texts:
+        for token in tokenize(text, min_length=1):
+            for n in range(1, min(len(token), MAX_TERM_LENGTH) + 1):
+                prefixes.add(token[:n])
+    return prefixes
+
+
+class _Percolator:
+    """저장된 검색 역색인 (anchor 단어 -> 검색 ID 집합)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._queries: Dict[int, Tuple[Tuple[str, ...], Optional[Set[str]]]] = {}
+        self._anchors: Dict[str, Set[int]] = defaultdict(set)
+
+    def _add(self, search_id: int, query: str, content_types: Optional[List[str]], is_active: bool) -> None:
+        self._remove(search_id)
+        terms = query_terms(query)
+        if not is_active or not terms:
+            return
+        self._queries[search_id] = (terms, set(content_types) if content_types else None)
+        self._anchors[max(terms, key=lambda t: (len(t), t))].add(search_id)
+
+    def _remove(self, search_id: int) -> None:
+        entry = self._queries.pop(search_id, None)
+        if entry is None:
+            return
+        anchor = max(entry[0], key=lambda t: (len(t), t))
+        bucket = self._anchors.get(anchor)
+        if bucket is not None:
+            bucket.discard(search_id)
+            if not bucket:
+                del self._anchors[anchor]
+
+    def load(self, session: Session) -> None:
+        with self._lock:
+            self._queries = {}
+            self._anchors = defaultdict(set)
+            for row in session.exec(select(SavedSearch).where(SavedSearch.is_active == True)).all():
+                self._add(row.id, row.query, row.content_types, row.is_active)
+            self._loaded_at = time.monotonic()
+
+    def needs_load(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > RELOAD_SECONDS
+
+    def match(self, content_type: str, texts: Iterable[str]) -> List[int]:
+        """문서와 일치하는 저장된 검색 ID 목록"""
+        prefixes = document_prefixes(texts)
+        matched = []
+        with self._lock:
+            candidates = set()
+            for prefix in prefixes:
+                candidates.update(self._anchors.get(prefix, ()))
+            for search_id in candidates:
+                terms, content_types = self._queries[search_id]
+                if content_types is not None and content_type not in content_types:
+                    continue
+                if all(t in prefixes for t in terms):
+                    matched.append(search_id)
+        return sorted(matched)
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+
+percolator = _Percolator()
+
+
+def _association(content_type: str, values: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """알림에 연결할 task_id / project_id"""
+    if content_type == "projects":
+        return {"task_id": None, "project_id": values.get("id")}
+    if content_type == "tasks":
+        return {"task_id": values.get("id"), "project_id": values.get("project_id")}
+    return {"task_id": values.get("task_id"), "project_id": None}
+
+
+def _document_title(content_type: str, values: Dict[str, Any]) -> str:
+    if content_type == "projects":
+        return values.get("name") or ""
+    if content_type == "tasks":
+        return values.get("title") or ""
+    if content_type == "decisions":
+        return (values.get("problem") or "")[:50]
+    return f"Task #{values.get('task_id')}"
+
+
+def _is_relevant(change: changes.Change) -> bool:
+    """저장된 검색 변경, 콘텐츠 INSERT, 검색 대상 필드가 바뀐 콘텐츠 UPDATE"""
+    return _is_relevant_row(change.table, change.op, change.changed)
+
+
+def _is_relevant_row(table: str, op: str, changed: Optional[Iterable[str]]) -> bool:
+    # changed 가 None 이면 (바뀐 컬럼 기록 이전의 로그) 검색 대상 필드가 바뀐 것으로 봅니다
+    if table == SavedSearch.__tablename__:
+        return True
+    content_type = TABLE_CONTENT_TYPES.get(table)
+    if content_type not in PERCOLATED_TYPES:
+        return False
+    if op == changes.INSERT:
+        return True
+    if op == changes.UPDATE:
+        return changed is None or any(name in CONTENT_TYPES[content_type][1] for name in changed)
+    return False
+
+
+def saved_search_dedupe_key(search_id: int, content_type: str, row_id: Any) -> str:
+    return f"saved_search:{search_id}:{content_type}:{row_id}"
+
+
+def _load_documents(session: Session, row_ids: Dict[str, Set[int]]) -> List[Tuple[str, int, Dict[str, Any]]]:
+    """(콘텐츠 타입, 행 ID, 현재 값) 목록 (그 사이 지워진 행은 빠짐)"""
+    documents = []
+    for content_type, ids in row_ids.items():
+        model, _ = CONTENT_TYPES[content_type]
+        for row in session.exec(select(model).where(model.id.in_(ids)).order_by(model.id)).all():
+            documents.append((content_type, row.id, row.model_dump()))
+    return documents
+
+
+def _notification_rows(
+    session: Session, documents: List[Tuple[str, int, Dict[str, Any]]], now: datetime
+) -> Tuple[List[Dict[str, Any]], Set[int]]:
+    """문서들과 일치하는 저장된 검색 알림 행과 일치한 검색 ID"""
+    hits: Dict[Tuple[int, str, Any], Dict[str, Any]] = {}
+    for content_type, row_id, values in documents:
+        fields = document_fields(content_type, values)
+        for search_id in percolator.match(content_type, fields.values()):
+            hits[(search_id, content_type, row_id)] = values
+    if not hits:
+        return [], set()
+
+    searches = {
+        s.id: s for s in session.exec(
+            select(SavedSearch).where(SavedSearch.id.in_({h[0] for h in hits}))
+        ).all()
+    }
+    rows = []
+    for (search_id, content_type, row_id), values in hits.items():
+        search = searches.get(search_id)
+        if search is None or not search.is_active:
+            continue
+        label = TYPE_LABELS[content_type]
+        title = _document_title(content_type, values)
+        rows.append({
+            "type": NotificationType.SAVED_SEARCH_MATCH,
+            "title": f"🔎 저장된 검색 '{search.name}' 새 결과",
+            "message": f"{label} '{title}'이(가) 저장된 검색 '{search.query}'과 일치합니다.",
+            "status": NotificationStatus.PENDING,
+            "user_id": search.user_id,
+            "scheduled_for": now,
+            "created_at": now,
+            "updated_at": now,
+            "dedupe_key": saved_search_dedupe_key(search_id, content_type, row_id),
+            **_association(content_type, values),
+        })
+    return rows, {search_id for search_id, _, _ in hits}
+
+
+def percolate_batch(engine, batch_size: int = PERCOLATE_BATCH) -> Tuple[int, int]:
+    """
+    워터마크 이후 ChangeLog 를 batch_size 행까지 저장된 검색과 대조해 알림을 만듭니다.
+    (읽은 로그 행 수, 만든 알림 수)를 반환합니다. 다른 워커가 먼저 처리했으면 (0, 0).
+    """
+    with Session(engine) as session:
+        applied_id = consumer_position(session, CONSUMER_NAME)
+        log_rows = session.exec(
+            select(ChangeLog.id, ChangeLog.table_name, ChangeLog.row_id, ChangeLog.op, ChangeLog.changed_columns)
+            .where(ChangeLog.id > applied_id)
+            .order_by(ChangeLog.id)
+            .limit(batch_size)
+        ).all()
+        if not log_rows:
+            return 0, 0
+        last_id = log_rows[-1][0]
+
+        searches_changed = False
+        row_ids: Dict[str, Set[int]] = defaultdict(set)
+        for _, table, row_id, op, changed_columns in log_rows:
+            if table not in PERCOLATED_TABLES:
+                continue
+            changed = changed_columns.split(",") if changed_columns is not None else None
+            if not _is_relevant_row(table, op, changed):
+                continue
+            if table == SavedSearch.__tablename__:
+                searches_changed = True
+            else:
+                row_ids[TABLE_CONTENT_TYPES[table]].add(row_id)
+
+        if searches_changed or percolator.needs_load():
+            percolator.load(session)
+        now = datetime.now(timezone.utc)
+        rows, matched_searches = (
+            _notification_rows(session, _load_documents(session, row_ids), now)
+            if row_ids and len(percolator) else ([], set())
+        )
+        connection = session.connection()
+        created = 0
+        if rows:
+            # 같은 문서/검색의 활성 알림이 이미 있으면 부분 유니크 인덱스 충돌로 건너뜁니다
+            created = connection.execute(insert_ignore(connection, Notification.__table__), rows).rowcount
+            connection.execute(
+                update(SavedSearch.__table__)
+                .where(SavedSearch.id.in_(matched_searches))
+                .values(last_matched_at=now)
+            )
+        if not advance_consumer(session, CONSUMER_NAME, applied_id, last_id):
+            # 다른 워커가 같은 구간을 먼저 처리함
+            session.rollback()
+            return 0, 0
+        session.commit()
+    if created:
+        # bulk INSERT 는 ORM 변경 피드를 거치지 않으므로 개수 캐시 재집계와 실시간 전송을 직접 알립니다
+        content_stats.invalidate()
+        notification_broker.publish_new()
+    return len(log_rows), created
+
+
+class SavedSearchPercolation:
+    """워커마다 도는 percolation 태스크 (알림 스케줄러/임대와 무관)"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"runs": 0, "log_rows": 0, "matches": 0, "failures": 0, "last_error": None}
+
+    def drain(self) -> int:
+        """워터마크 이후 ChangeLog 를 끝까지 처리하고 만든 알림 수를 반환합니다."""
+        created = 0
+        while True:
+            read, batch_created = percolate_batch(self.engine)
+            created += batch_created
+            with self._lock:
+                self._stats["runs"] += 1
+                self._stats["log_rows"] += read
+                self._stats["matches"] += batch_created
+            if read < PERCOLATE_BATCH:
+                return created
+
+    def wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.drain)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("saved search percolation failed")
+                with self._lock:
+                    self._stats["failures"] += 1
+                    self._stats["last_error"] = f"{type(exc).__name__}: {exc}"
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=PERCOLATE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="saved-search-percolation")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "running": self._task is not None and not self._task.done()}
+
+
+saved_search_percolation = SavedSearchPercolation(engine)
+
+
+def _on_changes(batch: List[changes.Change]) -> None:
+    # 같은 워커의 쓰기는 주기를 기다리지 않고 바로 대조하게 깨웁니다 (대조 대상은 ChangeLog 에서 읽음)
+    if any(_is_relevant(c) for c in batch):
+        saved_search_percolation.wake()
+
+
+changes.log_durably(ChangeLog.__table__, PERCOLATED_TABLES)
+changes.subscribe(_on_changes)
@@ -1,8 +1,15 @@
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlmodel import Session, select, or_, and_, func
 from app.models import Project, Task, Brief, DoD, DecisionLog, Review
-import re
+from app.services import project_similarity as similarity
+from app.services.content_stats import content_stats
+from app.services.search_cache import search_cache
+from app.services.search_documents import ALL_CONTENT_TYPES, CONTENT_TYPES, CONTENT_TYPE_TABLES
+from app.services.semantic_index import semantic_index
+from app.services.snippets import build_snippets
+from app.services.text_index import text_index
+from app.services.trigram_index import trigram_index
 
 class SearchService:
     def __init__(self, session: Session):
@@ -12,7 +19,9 @@ class SearchService:
         self, 
         query: str, 
         content_types: Optional[List[str]] = None,
-        limit: int = 50
+        limit: int = 50,
+        fuzzy: bool = False,
+        mode: str = "keyword"
     ) -> Dict[str, List[Dict[str, Any]]]:
         """
         통합 검색: 모든 콘텐츠 타입에서 검색
@@ -21,6 +30,8 @@ class SearchService:
             query: 검색어
             content_types: 검색할 콘텐츠 타입 리스트 ['projects', 'tasks', 'briefs', 'dod', 'decisions', 'reviews']
             limit: 결과 제한 수
+            fuzzy: 오타 허용 검색 여부 (keyword 모드)
+            mode: 'keyword' (부분 문자열) 또는 'semantic' (임베딩 유사도)
         """
         if not query or len(query.strip()) < 2:
             return {"results": {}}
@@ -29,8 +40,25 @@ class SearchService:
         
         # 기본적으로 모든 타입 검색
         if not content_types:
-            content_types = ['projects', 'tasks', 'briefs', 'dod', 'decisions', 'reviews']
-        
+            content_types = ALL_CONTENT_TYPES
+        content_types = sorted(set(content_types))
+        
+        if mode == "semantic":
+            search = self._semantic_search
+        else:
+            search = self._fuzzy_search if fuzzy else self._unified_search
+        return search_cache.get_or_compute(
+            ("unified_search", query, tuple(content_types), limit, fuzzy, mode),
+            [CONTENT_TYPE_TABLES[t] for t in content_types if t in CONTENT_TYPE_TABLES],
+            lambda: search(query, content_types, limit)
+        )
+    
+    def _unified_search(
+        self,
+        query: str,
+        content_types: List[str],
+        limit: int
+    ) -> Dict[str, Any]:
         results = {}
         
         # 프로젝트 검색
@@ -70,17 +98,17 @@ class SearchService:
             ).limit(limit)
         ).all()
         
-        return [
-            {
-                "id": p.id,
-                "type": "project",
-                "title": p.name,
-                "content": p.description or "",
-                "created_at": p.created_at.isoformat(),
-                "relevance_score": self._calculate_text_relevance(query, [p.name, p.description or ""])
-            }
-            for p in projects
-        ]
+        return self._format_rows('projects', projects, query)
+    
+    def _format_project(self, p: Project, query: str) -> Dict[str, Any]:
+        return {
+            "id": p.id,
+            "type": "project",
+            "title": p.name,
+            "content": p.description or "",
+            "created_at": p.created_at.isoformat(),
+            "relevance_score": self._calculate_text_relevance(query, [p.name, p.description or ""])
+        }
     
     def _search_tasks(self, query: str, limit: int) -> List[Dict[str, Any]]:
         """작업 검색"""
@@ -90,18 +118,18 @@ class SearchService:
             ).limit(limit)
         ).all()
         
-        return [
-            {
-                "id": t.id,
-                "type": "task",
-                "title": t.title,
-                "content": f"우선순위: P{t.priority}, 상태: {t.state.value}",
-                "project_id": t.project_id,
-                "created_at": t.created_at.isoformat(),
-                "relevance_score": self._calculate_text_relevance(query, [t.title])
-            }
-            for t in tasks
-        ]
+        return self._format_rows('tasks', tasks, query)
+    
+    def _format_task(self, t: Task, query: str) -> Dict[str, Any]:
+        return {
+            "id": t.id,
+            "type": "task",
+            "title": t.title,
+            "content": f"우선순위: P{t.priority}, 상태: {t.state.value}",
+            "project_id": t.project_id,
+            "created_at": t.created_at.isoformat(),
+            "relevance_score": self._calculate_text_relevance(query, [t.title])
+        }
     
     def _search_briefs(self, query: str, limit: int) -> List[Dict[str, Any]]:
         """5SB 검색"""
@@ -117,20 +145,20 @@ class SearchService:
             ).limit(limit)
         ).all()
         
-        return [
-            {
-                "id": b.id,
-                "type": "brief",
-                "title": f"5SB - Task #{b.task_id}",
-                "content": f"목적: {b.purpose[:100]}...",
-                "task_id": b.task_id,
-                "created_at": b.created_at.isoformat(),
-                "relevance_score": self._calculate_text_relevance(
-                    query, [b.purpose, b.success_criteria, b.constraints, b.priority, b.validation]
-                )
-            }
-            for b in briefs
-        ]
+        return self._format_rows('briefs', briefs, query)
+    
+    def _format_brief(self, b: Brief, query: str) -> Dict[str, Any]:
+        return {
+            "id": b.id,
+            "type": "brief",
+            "title": f"5SB - Task #{b.task_id}",
+            "content": f"목적: {b.purpose[:100]}...",
+            "task_id": b.task_id,
+            "created_at": b.created_at.isoformat(),
+            "relevance_score": self._calculate_text_relevance(
+                query, [b.purpose, b.success_criteria, b.constraints, b.priority, b.validation]
+            )
+        }
     
     def _search_dod(self, query: str, limit: int) -> List[Dict[str, Any]]:
         """DoD 검색"""
@@ -144,20 +172,20 @@ class SearchService:
             ).limit(limit)
         ).all()
         
-        return [
-            {
-                "id": d.id,
-                "type": "dod",
-                "title": f"DoD - Task #{d.task_id}",
-                "content": f"품질 기준: {d.quality_bar[:100]}...",
-                "task_id": d.task_id,
-                "created_at": d.created_at.isoformat(),
-                "relevance_score": self._calculate_text_relevance(
-                    query, [d.deliverable_formats, d.quality_bar, d.verification]
-                )
-            }
-            for d in dods
-        ]
+        return self._format_rows('dod', dods, query)
+    
+    def _format_dod(self, d: DoD, query: str) -> Dict[str, Any]:
+        return {
+            "id": d.id,
+            "type": "dod",
+            "title": f"DoD - Task #{d.task_id}",
+            "content": f"품질 기준: {d.quality_bar[:100]}...",
+            "task_id": d.task_id,
+            "created_at": d.created_at.isoformat(),
+            "relevance_score": self._calculate_text_relevance(
+                query, [d.deliverable_formats, d.quality_bar, d.verification]
+            )
+        }
     
     def _search_decisions(self, query: str, limit: int) -> List[Dict[str, Any]]:
         """의사결정 검색"""
@@ -172,20 +200,20 @@ class SearchService:
             ).limit(limit)
         ).all()
         
-        return [
-            {
-                "id": d.id,
-                "type": "decision",
-                "title": f"의사결정 - {d.problem[:50]}...",
-                "content": f"결정: {d.decision_reason[:100]}...",
-                "task_id": d.task_id,
-                "created_at": d.created_at.isoformat(),
-                "relevance_score": self._calculate_text_relevance(
-                    query, [d.problem, d.options, d.decision_reason, d.assumptions_risks]
-                )
-            }
-            for d in decisions
-        ]
+        return self._format_rows('decisions', decisions, query)
+    
+    def _format_decision(self, d: DecisionLog, query: str) -> Dict[str, Any]:
+        return {
+            "id": d.id,
+            "type": "decision",
+            "title": f"의사결정 - {d.problem[:50]}...",
+            "content": f"결정: {d.decision_reason[:100]}...",
+            "task_id": d.task_id,
+            "created_at": d.created_at.isoformat(),
+            "relevance_score": self._calculate_text_relevance(
+                query, [d.problem, d.options, d.decision_reason, d.assumptions_risks]
+            )
+        }
     
     def _search_reviews(self, query: str, limit: int) -> List[Dict[str, Any]]:
         """리뷰 검색"""
@@ -199,20 +227,126 @@ class SearchService:
             ).limit(limit)
         ).all()
         
-        return [
-            {
-                "id": r.id,
-                "type": "review",
-                "title": f"{r.review_type.value} 리뷰 - Task #{r.task_id}",
-                "content": f"긍정: {r.positives[:100]}...",
-                "task_id": r.task_id,
-                "created_at": r.created_at.isoformat(),
-                "relevance_score": self._calculate_text_relevance(
-                    query, [r.positives, r.negatives, r.changes_next]
-                )
-            }
-            for r in reviews
-        ]
+        return self._format_rows('reviews', reviews, query)
+    
+    def _format_review(self, r: Review, query: str) -> Dict[str, Any]:
+        return {
+            "id": r.id,
+            "type": "review",
+            "title": f"{r.review_type.value} 리뷰 - Task #{r.task_id}",
+            "content": f"긍정: {r.positives[:100]}...",
+            "task_id": r.task_id,
+            "created_at": r.created_at.isoformat(),
+            "relevance_score": self._calculate_text_relevance(
+                query, [r.positives, r.negatives, r.changes_next]
+            )
+        }
+    
+    def _fuzzy_search(
+        self,
+        query: str,
+        content_types: List[str],
+        limit: int
+    ) -> Dict[str, Any]:
+        """
+        오타 허용 검색
+        
+        정확한 부분 문자열 결과를 먼저 두고, trigram 색인에서 편집 거리 이내로
+        검증된 결과를 거리순으로 이어 붙입니다.
+        """
+        exact = self._unified_search(query, content_types, limit)
+        results = exact["results"]
+        
+        trigram_index.ensure_built(self.session)
+        fuzzy_hits, corrections = trigram_index.search(query, content_types, limit)
+        corrected_query = " ".join(corrections.get(w, w) for w in query.split())
+        
+        for content_type, hits in fuzzy_hits.items():
+            items = results.setdefault(content_type, [])
+            seen = {item["id"] for item in items}
+            hits = [(row_id, distance) for row_id, distance in hits if row_id not in seen]
+            items.extend(self._format_hits(
+                content_type, hits[:max(0, limit - len(items))], corrected_query, "fuzzy_distance"
+            ))
+        
+        return {
+            "results": results,
+            "query": query,
+            "fuzzy": True,
+            "corrections": {w: c for w, c in corrections.items() if w != c},
+            "total_results": sum(len(v) for v in results.values())
+        }
+    
+    def _semantic_search(
+        self,
+        query: str,
+        content_types: List[str],
+        limit: int
+    ) -> Dict[str, Any]:
+        """
+        의미 검색
+        
+        해시 벡터라이저 임베딩의 코사인 유사도 순으로 결과를 반환합니다.
+        검색어가 그대로 들어 있지 않아도 표현이 비슷한 항목을 찾습니다.
+        """
+        hits = semantic_index.search(self.session, query, content_types, limit)
+        results = {
+            content_type: self._format_hits(
+                content_type, [(row_id, round(score, 4)) for row_id, score in type_hits],
+                query, "semantic_score"
+            )
+            for content_type, type_hits in hits.items()
+        }
+        return {
+            "results": results,
+            "query": query,
+            "mode": "semantic",
+            "total_results": sum(len(v) for v in results.values())
+        }
+    
+    def _format_hits(
+        self,
+        content_type: str,
+        hits: List[Tuple[int, Any]],
+        query: str,
+        score_field: str
+    ) -> List[Dict[str, Any]]:
+        """색인 조회 결과 [(id, 점수)]를 한 번의 IN 쿼리로 읽어 순서대로 포맷"""
+        if not hits:
+            return []
+        model, _ = CONTENT_TYPES[content_type]
+        rows = {
+            row.id: row for row in self.session.exec(
+                select(model).where(model.id.in_([row_id for row_id, _ in hits]))
+            ).all()
+        }
+        ordered = [rows[row_id] for row_id, _ in hits if row_id in rows]
+        scores = dict(hits)
+        items = self._format_rows(content_type, ordered, query)
+        for item in items:
+            item[score_field] = scores[item["id"]]
+        return items
+    
+    def _format_rows(self, content_type: str, rows: List[Any], query: str) -> List[Dict[str, Any]]:
+        """행들을 타입별 결과 형식으로 바꾸고, 색인 위치 기반 스니펫/하이라이트를 붙입니다."""
+        if not rows:
+            return []
+        formatters = {
+            'projects': self._format_project,
+            'tasks': self._format_task,
+            'briefs': self._format_brief,
+            'dod': self._format_dod,
+            'decisions': self._format_decision,
+            'reviews': self._format_review,
+        }
+        text_index.ensure_ready(self.session)
+        snippets = build_snippets(content_type, rows, query)
+        items = []
+        for row in rows:
+            item = formatters[content_type](row, query)
+            item["snippets"] = snippets.get(row.id, [])
+            items.append(item)
+        return items
     
     def _calculate_text_relevance(self, query: str, texts: List[str]) -> float:
         """텍스트 관련성 점수 계산 (간단한 구현)"""
@@ -249,55 +383,58 @@ class SearchService:
     def find_similar_projects(self, project_id: int, limit: int = 5) -> List[Dict[str, Any]]:
         """
         유사한 프로젝트 찾기
-        현재는 간단한 키워드 기반 유사도 측정
+        프로젝트 이름/설명, 작업 제목, 5SB 본문의 TF-IDF 코사인 유사도 기준
         """
-        current_project = self.session.get(Project, project_id)
-        if not current_project:
-            return []
-        
-        # 현재 프로젝트의 키워드 추출
-        keywords = self._extract_keywords(
-            [current_project.name, current_project.description or ""]
+        return search_cache.get_or_compute(
+            ("find_similar_projects", project_id, limit),
+            similarity.INDEXED_TABLES,
+            lambda: self._find_similar_projects(project_id, limit)
         )
-        
-        if not keywords:
+    
+    def _find_similar_projects(self, project_id: int, limit: int) -> List[Dict[str, Any]]:
+        similarity.similarity_index.ensure_fresh(self.session)
+        ranked = similarity.similarity_index.similar(project_id, limit)
+        if not ranked:
             return []
         
-        # 다른 프로젝트들과 유사도 계산
-        other_projects = self.session.exec(
-            select(Project).where(Project.id != project_id)
-        ).all()
-        
-        similar_projects = []
+        projects = {
+            p.id: p for p in self.session.exec(
+                select(Project).where(Project.id.in_([pid for pid, _ in ranked]))
+            ).all()
+        }
         
-        for project in other_projects:
-            project_texts = [project.name, project.description or ""]
-            similarity_score = self._calculate_similarity(keywords, project_texts)
-            
-            if similarity_score > 0:
-                similar_projects.append({
-                    "id": project.id,
-                    "name": project.name,
-                    "description": project.description,
-                    "similarity_score": similarity_score,
-                    "created_at": project.created_at.isoformat()
-                })
-        
-        # 유사도 순으로 정렬
-        similar_projects.sort(key=lambda x: x["similarity_score"], reverse=True)
-        
-        return similar_projects[:limit]
+        return [
+            {
+                "id": pid,
+                "name": projects[pid].name,
+                "description": projects[pid].description,
+                "similarity_score": round(score * 100, 2),
+                "created_at": projects[pid].created_at.isoformat()
+            }
+            for pid, score in ranked
+            if pid in projects
+        ]
     
-    def get_decision_patterns(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_decision_patterns(self, query: str, limit: int = 10, mode: str = "keyword") -> List[Dict[str, Any]]:
         """
         의사결정 패턴 분석
         유사한 문제에 대한 과거 의사결정들을 찾음
+        
+        mode 가 'semantic' 이면 검색어가 그대로 들어 있지 않은 비슷한 표현의 문제도 찾습니다.
         """
         if not query or len(query.strip()) < 3:
             return []
         
         query = query.strip().lower()
         
+        compute = self._get_semantic_decision_patterns if mode == "semantic" else self._get_decision_patterns
+        return search_cache.get_or_compute(
+            ("get_decision_patterns", query, limit, mode),
+            [DecisionLog.__tablename__],
+            lambda: compute(query, limit)
+        )
+    
+    def _get_decision_patterns(self, query: str, limit: int) -> List[Dict[str, Any]]:
         # 유사한 문제를 다룬 의사결정들 찾기
         similar_decisions = self.session.exec(
             select(DecisionLog).where(
@@ -308,81 +445,52 @@ class SearchService:
             ).order_by(DecisionLog.created_at.desc()).limit(limit)
         ).all()
         
-        patterns = []
-        
-        for decision in similar_decisions:
-            # 해당 의사결정의 D+7 리뷰가 있는지 확인
-            has_review = decision.d_plus_7_review is not None and len(decision.d_plus_7_review.strip()) > 0
-            
-            patterns.append({
-                "id": decision.id,
-                "problem": decision.problem,
-                "options": decision.options,
-                "decision": decision.decision_reason,
-                "risks": decision.assumptions_risks,
-                "d_plus_7_review": decision.d_plus_7_review,
-                "has_review": has_review,
-                "task_id": decision.task_id,
-                "created_at": decision.created_at.isoformat(),
-                "relevance_score": self._calculate_text_relevance(
-                    query, [decision.problem, decision.options]
-                )
-            })
+        patterns = [self._format_decision_pattern(decision, query) for decision in similar_decisions]
         
         # 관련성 순으로 정렬
         patterns.sort(key=lambda x: x["relevance_score"], reverse=True)
         
         return patterns
     
-    def _extract_keywords(self, texts: List[str]) -> List[str]:
-        """텍스트에서 키워드 추출 (간단한 구현)"""
-        if not texts:
+    def _get_semantic_decision_patterns(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        hits = semantic_index.search(self.session, query, ['decisions'], limit)['decisions']
+        if not hits:
             return []
-        
-        # 한글, 영문, 숫자만 추출하고 공백으로 분리
-        all_text = " ".join(text for text in texts if text)
-        
-        # 간단한 키워드 추출 (3글자 이상)
-        words = re.findall(r'[가-힣a-zA-Z0-9]+', all_text.lower())
-        keywords = [word for word in words if len(word) >= 3]
-        
-        # 중복 제거하고 빈도 기준으로 상위 키워드만 반환
-        unique_keywords = list(set(keywords))
-        
-        return unique_keywords[:10]  # 상위 10개만
+        decisions = {
+            d.id: d for d in self.session.exec(
+                select(DecisionLog).where(DecisionLog.id.in_([row_id for row_id, _ in hits]))
+            ).all()
+        }
+        patterns = []
+        for row_id, score in hits:
+            if row_id in decisions:
+                pattern = self._format_decision_pattern(decisions[row_id], query)
+                pattern["semantic_score"] = round(score, 4)
+                patterns.append(pattern)
+        return patterns
     
-    def _calculate_similarity(self, keywords: List[str], texts: List[str]) -> float:
-        """키워드 기반 유사도 계산"""
-        if not keywords or not texts:
-            return 0.0
-        
-        all_text = " ".join(text for text in texts if text).lower()
+    def _format_decision_pattern(self, decision: DecisionLog, query: str) -> Dict[str, Any]:
+        # 해당 의사결정의 D+7 리뷰가 있는지 확인
+        has_review = decision.d_plus_7_review is not None and len(decision.d_plus_7_review.strip()) > 0
         
-        matches = 0
-        for keyword in keywords:
-            if keyword in all_text:
-                matches += 1
-        
-        # 매치 비율 계산
-        similarity = (matches / len(keywords)) * 100
-        
-        return round(similarity, 2)
+        return {
+            "id": decision.id,
+            "problem": decision.problem,
+            "options": decision.options,
+            "decision": decision.decision_reason,
+            "risks": decision.assumptions_risks,
+            "d_plus_7_review": decision.d_plus_7_review,
+            "has_review": has_review,
+            "task_id": decision.task_id,
+            "created_at": decision.created_at.isoformat(),
+            "relevance_score": self._calculate_text_relevance(
+                query, [decision.problem, decision.options]
+            )
+        }
     
     def get_content_summary(self) -> Dict[str, int]:
         """전체 콘텐츠 요약 통계"""
-        projects_count = self.session.exec(select(func.count(Project.id))).first() or 0
-        tasks_count = self.session.exec(select(func.count(Task.id))).first() or 0
-        briefs_count = self.session.exec(select(func.count(Brief.id))).first() or 0
-        dod_count = self.session.exec(select(func.count(DoD.id))).first() or 0
-        decisions_count = self.session.exec(select(func.count(DecisionLog.id))).first() or 0
-        reviews_count = self.session.exec(select(func.count(Review.id))).first() or 0
-        
-        return {
-            "projects": projects_count,
-            "tasks": tasks_count,
-            "briefs": briefs_count,
-            "dod": dod_count,
-            "decisions": decisions_count,
-            "reviews": reviews_count,
-            "total": projects_count + tasks_count + briefs_count + dod_count + decisions_count + reviews_count
-        }
\ No newline at end of file
+        counts = content_stats.counts(self.session)
+        summary = {t: counts.get(t, 0) for t in ALL_CONTENT_TYPES}
+        summary["total"] = sum(summary.values())
+        return summary
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""
+검색 결과 LRU 캐시
+
+항목 수와 바이트 크기로 제한되며, 각 항목은 결과를 만들 때 참조한 테이블들의
+쓰기 버전을 함께 저장합니다. 조회 시 버전이 하나라도 바뀌었으면 무효로 간주하므로
+`Brief` 쓰기는 브리프를 포함한 결과만 무효화합니다.
+
+버전은 두 가지를 함께 봅니다.
+- 이 프로세스의 변경 피드 버전: 같은 워커의 쓰기는 커밋 즉시 반영
+- DB 의 TableVersion 행 (쓰기와 같은 트랜잭션에서 올라감): 다른 워커의 쓰기는
+  SHARED_VERSION_CHECK_SECONDS 마다 한 번 읽어 확인하므로 그만큼 늦게 반영될 수 있습니다
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db import changes
+from app.db.session import engine
+from app.models import TableVersion
+from app.services.search_documents import TABLE_CONTENT_TYPES
+
+SHARED_VERSION_CHECK_SECONDS = 2
+
+changes.version_durably(TableVersion.__table__, TABLE_CONTENT_TYPES)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    tables: Tuple[str, ...]
+    versions: Tuple[Tuple[str, int, int], ...]
+    size: int
+
+
+def _estimate_size(value: Any) -> int:
+    """결과의 대략적인 크기 (JSON 직렬화 바이트 수)"""
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class SearchCache:
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._shared_versions: Dict[str, int] = {}
+        self._shared_checked_at = float("-inf")
+
+    def _load_shared_versions(self) -> Dict[str, int]:
+        with Session(engine) as session:
+            return dict(session.exec(select(TableVersion.table_name, TableVersion.version)).all())
+
+    def _versions(self, tables: Tuple[str, ...]) -> Tuple[Tuple[str, int, int], ...]:
+        """테이블별 (이름, 프로세스 버전, DB 버전)"""
+        if time.monotonic() - self._shared_checked_at >= SHARED_VERSION_CHECK_SECONDS:
+            shared = self._load_shared_versions()
+            with self._lock:
+                self._shared_versions = shared
+                self._shared_checked_at = time.monotonic()
+        local = changes.table_versions(tables)
+        with self._lock:
+            return tuple((table, version, self._shared_versions.get(table, 0)) for table, version in local)
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        tables: Iterable[str],
+        compute: Callable[[], Any]
+    ) -> Any:
+        """
+        캐시된 결과를 반환하거나, 없으면 계산 후 저장합니다.
+
+        Args:
+            key: 정규화된 캐시 키
+            tables: 결과가 의존하는 테이블 이름들
+            compute: 캐시 미스 시 결과를 만드는 함수
+        """
+        tables = tuple(sorted(set(tables)))
+        # 계산 전에 버전을 찍어 두어야 계산 중 발생한 쓰기가 항목을 즉시 무효화합니다
+        versions = self._versions(tables)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.versions == versions:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry.value
+                self._remove(key)
+                self._invalidations += 1
+            self._misses += 1
+
+        value = compute()
+        size = _estimate_size(value)
+
+        if size <= self.max_bytes:
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = _Entry(value=value, tables=tables, versions=versions, size=size)
+                self._bytes += size
+                self._evict()
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self._evictions += 1
+
+
+search_cache = SearchCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    max_bytes=settings.SEARCH_CACHE_MAX_BYTES,
+)
@@ -0,0 +1,44 @@
+"""
+검색 대상 콘텐츠 타입 정의
+
+콘텐츠 타입별 모델과 검색 대상 텍스트 필드를 한곳에 모아,
+검색 서비스와 인메모리 색인들이 같은 정의를 공유하도록 합니다.
+"""
+from typing import Any, Dict, Iterable, Tuple
+
+from app.models import Project, Task, Brief, DoD, DecisionLog, Review
+
+# 콘텐츠 타입 -> (모델, 검색 대상 필드)
+CONTENT_TYPES: Dict[str, Tuple[Any, Tuple[str, ...]]] = {
+    'projects': (Project, ('name', 'description')),
+    'tasks': (Task, ('title',)),
+    'briefs': (Brief, ('purpose', 'success_criteria', 'constraints', 'priority', 'validation')),
+    'dod': (DoD, ('deliverable_formats', 'quality_bar', 'verification')),
+    'decisions': (DecisionLog, ('problem', 'options', 'decision_reason', 'assumptions_risks')),
+    'reviews': (Review, ('positives', 'negatives', 'changes_next')),
+}
+
+ALL_CONTENT_TYPES = list(CONTENT_TYPES)
+
+# 콘텐츠 타입별 원본 테이블 (캐시 무효화 기준)
+CONTENT_TYPE_TABLES = {t: model.__tablename__ for t, (model, _) in CONTENT_TYPES.items()}
+
+# 테이블 -> 콘텐츠 타입 (변경 피드 처리용)
+TABLE_CONTENT_TYPES = {table: t for t, table in CONTENT_TYPE_TABLES.items()}
+
+
+def document_fields(content_type: str, values: Dict[str, Any]) -> Dict[str, str]:
+    """행 값(dict)에서 검색 대상 필드만 추출"""
+    _, fields = CONTENT_TYPES[content_type]
+    return {f: values.get(f) or "" for f in fields}
+
+
+def iter_documents(session, content_types: Iterable[str] = None):
+    """DB에서 (content_type, id, fields) 를 타입별 한 번의 쿼리로 순회"""
+    from sqlmodel import select
+
+    for content_type in content_types or ALL_CONTENT_TYPES:
+        model, fields = CONTENT_TYPES[content_type]
+        columns = [getattr(model, f) for f in fields]
+        for row_id, *texts in session.exec(select(model.id, *columns)).all():
+            yield content_type, row_id, {f: t or "" for f, t in zip(fields, texts)}
@@ -0,0 +1,281 @@
+"""
+오프라인 의미 검색 색인 (해시 벡터라이저 + 랜덤 투영)
+
+외부 모델 없이 표현이 조금 달라도 비슷한 문장을 찾기 위한 벡터 색인입니다.
+
+- 임베딩: 정규화한 텍스트의 문자 2~4-gram을 2^20 차원으로 해싱(가중치 1 + log tf)한 뒤,
+  해시 값에서 결정되는 희소 랜덤 투영(특성당 4개 차원, 부호 ±1)으로 256차원에 사상하고
+  L2 정규화합니다. 같은 입력은 항상 같은 벡터가 되므로 투영 행렬을 저장할 필요가 없습니다.
+- 저장: 콘텐츠 타입별 float32 행렬을 `.npy` 파일로 두고 memmap으로 엽니다.
+  행 ID / 텍스트 체크섬 배열을 나란히 저장해, 시작 시에는 체크섬이 달라진 행만 다시 임베딩합니다.
+- 조회: 행렬을 청크 단위로 나눠 (청크 x 차원) @ (차원 x 질의 수) 곱과 argpartition으로 top-k를 구합니다.
+- 갱신: 변경 피드로 새 행은 뒤에 덧붙이고, 수정은 제자리 덮어쓰기, 삭제는 빈 슬롯으로 돌려 재사용합니다.
+"""
+import os
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db import changes
+from app.services.search_documents import (
+    CONTENT_TYPES, TABLE_CONTENT_TYPES, document_fields, iter_documents
+)
+from app.services.text import normalize
+
+DIM = 256
+N_FEATURES = 1 << 20
+NGRAM_SIZES = (2, 3, 4)
+NNZ_PER_FEATURE = 4
+INITIAL_CAPACITY = 1024
+CHUNK_ROWS = 65536
+DEFAULT_MIN_SCORE = 0.2
+
+# 행 ID 배열의 특수 값: 한 번도 쓰지 않은 슬롯 / 삭제되어 재사용 가능한 슬롯
+_UNUSED = -2
+_FREE = -1
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(20240611)
+_PROJ_A = _rng.randint(1, 1 << 31, size=NNZ_PER_FEATURE).astype(np.uint64)
+_PROJ_B = _rng.randint(0, 1 << 31, size=NNZ_PER_FEATURE).astype(np.uint64)
+
+
+def document_text(fields: Dict[str, str]) -> str:
+    return " ".join(v for v in fields.values() if v)
+
+
+def checksum(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def embed(text: str) -> np.ndarray:
+    """텍스트 -> 정규화된 DIM 차원 float32 벡터 (빈 텍스트는 영벡터)"""
+    text = " ".join(normalize(text).split())
+    vector = np.zeros(DIM, dtype=np.float32)
+    if not text:
+        return vector
+    padded = f" {text} "
+    hashes = [
+        zlib.crc32(padded[i:i + n].encode("utf-8"))
+        for n in NGRAM_SIZES
+        for i in range(len(padded) - n + 1)
+    ]
+    if not hashes:
+        return vector
+
+    features, counts = np.unique(np.array(hashes, dtype=np.uint64) % N_FEATURES, return_counts=True)
+    weights = (1.0 + np.log(counts)).astype(np.float32)
+
+    # 희소 랜덤 투영: 특성마다 NNZ_PER_FEATURE개의 (차원, 부호)를 해시로 결정
+    mixed = (features[:, None] * _PROJ_A[None, :] + _PROJ_B[None, :]) % _MERSENNE
+    dims = (mixed % DIM).astype(np.intp)
+    signs = np.where((mixed >> np.uint64(20)) & np.uint64(1), 1.0, -1.0).astype(np.float32)
+    np.add.at(vector, dims.ravel(), (signs * weights[:, None]).ravel())
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class VectorStore:
+    """memmap된 (행렬, 행 ID, 체크섬) 파일 묶음"""
+
+    def __init__(self, path_prefix: str):
+        self.path_prefix = path_prefix
+        self.vectors: Optional[np.ndarray] = None
+        self.ids: Optional[np.ndarray] = None
+        self.checksums: Optional[np.ndarray] = None
+        self.count = 0
+        self._positions: Dict[int, int] = {}
+        self._free: List[int] = []
+
+    def _paths(self, suffix: str = "") -> Tuple[str, str, str]:
+        return (
+            f"{self.path_prefix}.vectors{suffix}.npy",
+            f"{self.path_prefix}.ids{suffix}.npy",
+            f"{self.path_prefix}.checksums{suffix}.npy",
+        )
+
+    def _create(self, capacity: int, suffix: str = "") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        vectors_path, ids_path, checksums_path = self._paths(suffix)
+        vectors = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=(capacity, DIM))
+        ids = np.lib.format.open_memmap(ids_path, mode="w+", dtype=np.int64, shape=(capacity,))
+        ids[:] = _UNUSED
+        checksums = np.lib.format.open_memmap(checksums_path, mode="w+", dtype=np.uint32, shape=(capacity,))
+        return vectors, ids, checksums
+
+    def open(self) -> None:
+        os.makedirs(os.path.dirname(self.path_prefix), exist_ok=True)
+        vectors_path, ids_path, checksums_path = self._paths()
+        try:
+            vectors = np.load(vectors_path, mmap_mode="r+")
+            ids = np.load(ids_path, mmap_mode="r+")
+            checksums = np.load(checksums_path, mmap_mode="r+")
+            if vectors.shape[1] != DIM or not (len(vectors) == len(ids) == len(checksums)):
+                raise ValueError("vector store shape mismatch")
+        except (OSError, ValueError):
+            vectors, ids, checksums = self._create(INITIAL_CAPACITY)
+
+        self.vectors, self.ids, self.checksums = vectors, ids, checksums
+        used = np.flatnonzero(ids != _UNUSED)
+        self.count = int(used[-1]) + 1 if len(used) else 0
+        live = ids[:self.count]
+        self._positions = {int(row_id): int(pos) for pos, row_id in enumerate(live) if row_id >= 0}
+        self._free = [int(pos) for pos in np.flatnonzero(live == _FREE)]
+
+    def _grow(self) -> None:
+        capacity = len(self.ids) * 2
+        vectors, ids, checksums = self._create(capacity, suffix=".tmp")
+        vectors[:self.count] = self.vectors[:self.count]
+        ids[:self.count] = self.ids[:self.count]
+        checksums[:self.count] = self.checksums[:self.count]
+        for array in (vectors, ids, checksums):
+            array.flush()
+        del self.vectors, self.ids, self.checksums
+        for tmp_path, path in zip(self._paths(".tmp"), self._paths()):
+            os.replace(tmp_path, path)
+        self.vectors = np.load(self._paths()[0], mmap_mode="r+")
+        self.ids = np.load(self._paths()[1], mmap_mode="r+")
+        self.checksums = np.load(self._paths()[2], mmap_mode="r+")
+
+    def checksum_of(self, row_id: int) -> Optional[int]:
+        pos = self._positions.get(row_id)
+        return None if pos is None else int(self.checksums[pos])
+
+    def row_ids(self) -> Iterable[int]:
+        return list(self._positions)
+
+    def put(self, row_id: int, vector: np.ndarray, text_checksum: int) -> None:
+        pos = self._positions.get(row_id)
+        if pos is None:
+            if self._free:
+                pos = self._free.pop()
+            else:
+                if self.count == len(self.ids):
+                    self._grow()
+                pos = self.count
+                self.count += 1
+            self._positions[row_id] = pos
+        self.vectors[pos] = vector
+        self.ids[pos] = row_id
+        self.checksums[pos] = text_checksum
+
+    def delete(self, row_id: int) -> None:
+        pos = self._positions.pop(row_id, None)
+        if pos is None:
+            return
+        self.vectors[pos] = 0.0
+        self.ids[pos] = _FREE
+        self._free.append(pos)
+
+    def flush(self) -> None:
+        for array in (self.vectors, self.ids, self.checksums):
+            array.flush()
+
+    def top_k(self, queries: np.ndarray, k: int, min_score: float) -> List[List[Tuple[int, float]]]:
+        """질의 행렬 (m x DIM)의 각 행에 대한 [(row_id, score), ...] (점수 내림차순)"""
+        m = len(queries)
+        best_scores = np.full((m, 0), -np.inf, dtype=np.float32)
+        best_ids = np.zeros((m, 0), dtype=np.int64)
+
+        for lo in range(0, self.count, CHUNK_ROWS):
+            hi = min(lo + CHUNK_ROWS, self.count)
+            scores = queries @ self.vectors[lo:hi].T
+            scores[:, self.ids[lo:hi] < 0] = -np.inf
+            take = min(k, hi - lo)
+            part = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+            best_ids = np.concatenate([best_ids, np.asarray(self.ids[lo:hi])[part]], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_ids = np.take_along_axis(best_ids, keep, axis=1)
+
+        results = []
+        for scores_row, ids_row in zip(best_scores, best_ids):
+            order = np.lexsort((ids_row, -scores_row))
+            results.append([
+                (int(ids_row[i]), float(scores_row[i]))
+                for i in order if scores_row[i] >= min_score
+            ])
+        return results
+
+
+class SemanticIndex:
+    """콘텐츠 타입별 VectorStore 묶음. 처음 사용할 때 열고 DB와 맞춥니다."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.RLock()
+        self._stores: Dict[str, VectorStore] = {}
+
+    def _sync_store(self, session: Session, content_type: str, store: VectorStore) -> None:
+        seen = set()
+        for _, row_id, fields in iter_documents(session, [content_type]):
+            seen.add(row_id)
+            text = document_text(fields)
+            text_checksum = checksum(text)
+            if store.checksum_of(row_id) != text_checksum:
+                store.put(row_id, embed(text), text_checksum)
+        for row_id in store.row_ids():
+            if row_id not in seen:
+                store.delete(row_id)
+        store.flush()
+
+    def ensure_built(self, session: Session, content_types: Iterable[str]) -> None:
+        with self._lock:
+            for content_type in content_types:
+                if content_type in self._stores:
+                    continue
+                store = VectorStore(os.path.join(self.directory, content_type))
+                store.open()
+                self._sync_store(session, content_type, store)
+                self._stores[content_type] = store
+
+    def on_changes(self, batch: List[changes.Change]) -> None:
+        with self._lock:
+            touched = set()
+            for change in batch:
+                content_type = TABLE_CONTENT_TYPES.get(change.table)
+                store = self._stores.get(content_type)
+                if store is None:
+                    continue
+                touched.add(content_type)
+                if change.op == changes.DELETE:
+                    store.delete(change.id)
+                    continue
+                text = document_text(document_fields(content_type, change.values))
+                text_checksum = checksum(text)
+                if store.checksum_of(change.id) != text_checksum:
+                    store.put(change.id, embed(text), text_checksum)
+            for content_type in touched:
+                self._stores[content_type].flush()
+
+    def search(
+        self,
+        session: Session,
+        query: str,
+        content_types: Sequence[str],
+        limit: int = 10,
+        min_score: float = DEFAULT_MIN_SCORE
+    ) -> Dict[str, List[Tuple[int, float]]]:
+        """콘텐츠 타입별 [(id, cosine similarity), ...]"""
+        content_types = [t for t in content_types if t in CONTENT_TYPES]
+        self.ensure_built(session, content_types)
+        query_vector = embed(query)[None, :]
+        if not query_vector.any():
+            return {t: [] for t in content_types}
+        with self._lock:
+            return {
+                t: self._stores[t].top_k(query_vector, limit, min_score)[0]
+                for t in content_types
+            }
+
+
+semantic_index = SemanticIndex(os.path.join(settings.SEARCH_INDEX_DIR, "semantic"))
+changes.subscribe(semantic_index.on_changes)
@@ -0,0 +1,157 @@
+"""
+검색 결과 스니펫과 일치 위치 하이라이트
+
+역색인(text_index)에 저장된 단어 위치만으로 필드마다 검색어가 가장 많이 모인 구간을 고릅니다.
+전체 텍스트를 다시 훑어 검색어를 찾지 않고, 위치로 잘라낸 구간과 그 안의 하이라이트 오프셋을
+돌려줍니다. 오프셋은 원문 기준 문자(코드 포인트) 단위이며, 자모 분리로 입력된 한글도
+정규화 전 원문 위치로 되돌려 계산합니다.
+
+키워드 검색은 부분 문자열로 일치하므로 단어 위치에 걸리는 검색어가 없는 결과도 있습니다
+(단어 중간 일치, 확장 한도 밖의 단어). 그런 필드는 본문에서 검색어 단어를 직접 찾아 구간을 고릅니다.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.search_documents import CONTENT_TYPES
+from app.services.text import normalize, normalized_spans, tokenize
+from app.services.text_index import text_index
+
+# 스니펫 길이 / 첫 일치 앞에 남길 문맥 (원문 글자 수)
+SNIPPET_LENGTH = 80
+CONTEXT_BEFORE = 20
+# 검색어 단어 하나가 확장될 수 있는 사전 단어 수 ("설계" -> "설계", "설계를", ...)
+MAX_TERM_EXPANSIONS = 20
+MAX_HITS_PER_FIELD = 200
+
+
+def expand_query(query: str) -> Dict[str, str]:
+    """검색어 단어로 시작하는 사전 단어 (문서 빈도 상위) -> 검색어 단어"""
+    term_words: Dict[str, str] = {}
+    for word in dict.fromkeys(tokenize(query, min_length=1)):
+        for term in text_index.frequent_terms_with_prefix(word, MAX_TERM_EXPANSIONS):
+            term_words.setdefault(term, word)
+    return term_words
+
+
+def _to_original(spans: Optional[List[Tuple[int, int]]], start: int, end: int) -> Tuple[int, int]:
+    if spans is None:
+        return start, end
+    return spans[start][0], spans[end - 1][1]
+
+
+def _snap(text: str, position: int, spans: Optional[List[Tuple[int, int]]]) -> int:
+    """자모 분리 입력에서 글자 조합 중간을 자르지 않도록 구간 경계로 맞춤"""
+    if spans is None:
+        return position
+    boundaries = {s for s, _ in spans} | {len(text)}
+    while position > 0 and position not in boundaries:
+        position -= 1
+    return position
+
+
+def _select_window(
+    text: str, matches: List[Tuple[int, int, str]], spans: Optional[List[Tuple[int, int]]]
+) -> Dict[str, Any]:
+    """원문 일치 [(시작, 끝, 검색어 단어)] (시작 순) 중 서로 다른 단어가 가장 많이, 그다음 일치가 가장 많이 들어가는 구간"""
+    best = None
+    for i, (anchor, _, _) in enumerate(matches):
+        window_start = max(0, anchor - CONTEXT_BEFORE)
+        window_end = window_start + SNIPPET_LENGTH
+        inside = [m for m in matches[i:] if m[1] <= window_end]
+        score = (len({m[2] for m in inside}), len(inside), -i)
+        if best is None or score > best[0]:
+            best = (score, window_start, inside)
+
+    _, window_start, inside = best
+    first = inside[0][0]
+    # 단어 중간에서 시작하지 않도록 첫 일치 전의 공백 뒤로 시작 위치를 옮깁니다
+    if window_start > 0 and not text[window_start - 1].isspace():
+        space = text.find(" ", window_start, first)
+        if space != -1:
+            window_start = space + 1
+    window_start = _snap(text, window_start, spans)
+    window_end = min(len(text), window_start + SNIPPET_LENGTH)
+    if window_end < len(text):
+        window_end = max(_snap(text, window_end, spans), inside[-1][1])
+
+    return {
+        "text": text[window_start:window_end],
+        "start": window_start,
+        "end": window_end,
+        "highlights": [[s - window_start, e - window_start] for s, e, _ in inside if e <= window_end],
+        "matched_terms": sorted({m[2] for m in inside}),
+    }
+
+
+def best_window(text: str, hits: Iterable[Tuple[int, str]], term_words: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    필드 텍스트와 색인 위치 [(정규화 오프셋, 단어)] 로 최적 구간 계산
+
+    서로 다른 검색어 단어가 가장 많이, 그다음 일치가 가장 많이 들어가는 구간을 고릅니다.
+    """
+    if not text:
+        return None
+    normalized = normalize(text)
+    spans = normalized_spans(text)
+
+    matches = []  # (원문 시작, 원문 끝, 검색어 단어)
+    for offset, term in hits:
+        word = term_words[term]
+        # 색인과 본문이 어긋난 경우(동시 수정 등)는 건너뜁니다
+        if not normalized.startswith(word, offset):
+            continue
+        start, end = _to_original(spans, offset, offset + len(word))
+        matches.append((start, end, word))
+        if len(matches) >= MAX_HITS_PER_FIELD:
+            break
+    if not matches:
+        return None
+    return _select_window(text, matches, spans)
+
+
+def substring_window(text: str, words: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """색인 위치 없이 정규화한 본문에서 검색어 단어를 부분 문자열로 찾아 구간 계산"""
+    if not text:
+        return None
+    normalized = normalize(text)
+    spans = normalized_spans(text)
+
+    matches = []
+    for word in words:
+        offset = normalized.find(word)
+        while offset != -1 and len(matches) < MAX_HITS_PER_FIELD:
+            start, end = _to_original(spans, offset, offset + len(word))
+            matches.append((start, end, word))
+            offset = normalized.find(word, offset + len(word))
+    if not matches:
+        return None
+    matches.sort()
+    return _select_window(text, matches, spans)
+
+
+def build_snippets(content_type: str, rows: List[Any], query: str) -> Dict[int, List[Dict[str, Any]]]:
+    """결과 행들의 {id: [필드별 스니펫, ...]} (일치가 많은 필드 순)"""
+    if not rows:
+        return {}
+    words = list(dict.fromkeys(tokenize(query, min_length=1)))
+    if not words:
+        return {}
+    term_words = expand_query(query)
+
+    _, fields = CONTENT_TYPES[content_type]
+    positions = text_index.positions([(content_type, row.id) for row in rows], term_words) if term_words else {}
+    snippets: Dict[int, List[Dict[str, Any]]] = {}
+    for row in rows:
+        row_snippets = []
+        row_positions = positions.get((content_type, row.id), {})
+        for field_id, name in enumerate(fields):
+            text = getattr(row, name) or ""
+            hits = row_positions.get(field_id)
+            snippet = best_window(text, hits, term_words) if hits else None
+            if snippet is None:
+                # 단어 위치로 찾지 못한 일치 (단어 중간 부분 문자열 등)
+                snippet = substring_window(text, words)
+            if snippet is not None:
+                row_snippets.append({"field": name, **snippet})
+        row_snippets.sort(key=lambda s: (-len(s["matched_terms"]), -len(s["highlights"]), s["field"]))
+        snippets[row.id] = row_snippets
+    return snippets
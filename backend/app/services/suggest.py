@@ -0,0 +1,322 @@
+"""
+검색어 자동완성 (search-as-you-type) 색인
+
+프로젝트 이름, 작업 제목, 템플릿 이름, 템플릿 태그를 메모리의 정렬 배열로 유지하고
+접두사 범위(bisect)에서 인기도 상위 k개를 돌려줍니다. 키 입력마다 호출되는 것을 전제로
+SQLite를 거치지 않습니다.
+
+- 키: 정규화한 텍스트의 각 단어 시작 위치부터의 접미사 ("인증 모듈" -> "인증 모듈", "모듈")
+- 인기도: 템플릿은 usage_count, 작업은 최근 수정 시각, 프로젝트는 생성 시각,
+  태그는 해당 태그를 가진 템플릿들의 usage_count 합 + 템플릿 수
+- 범위가 큰 접두사(짧은 접두사)는 상위 k개 결과를 캐시해 두고, 쓰기 시 점수가 오르는
+  경우는 캐시를 제자리에서 갱신하며, 캐시된 항목의 점수가 내려가거나 삭제될 때만 버립니다.
+- 다른 워커의 쓰기는 ChangeLog 로 따라잡습니다 (change_log.CHECK_SECONDS 마다 한 번만 DB 확인).
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select
+
+from app.db import changes
+from app.models import Project, Task, Template
+from app.services.change_log import ChangeLogCursor
+from app.services.text import normalize
+
+# 응답 가능한 최대 k (접두사 캐시도 이 크기로 유지)
+MAX_SUGGESTIONS = 20
+# 항목당 색인하는 단어 시작 위치 수 / 키 최대 길이
+MAX_WORD_STARTS = 8
+MAX_KEY_LENGTH = 32
+# 접두사 범위가 이보다 크면 상위 k개를 캐시
+SCAN_LIMIT = 256
+# 색인 생성 시 미리 캐시해 두는 접두사 길이 (가장 범위가 큰 첫 입력들)
+WARM_PREFIX_LENGTH = 2
+
+_END = "\U0010ffff"
+
+SUGGEST_KINDS = ["projects", "tasks", "templates", "tags"]
+
+
+def suggest_keys(text: str) -> Set[str]:
+    """텍스트의 단어 시작 위치별 접미사 키"""
+    words = normalize(text).split()
+    keys = set()
+    for i in range(min(len(words), MAX_WORD_STARTS)):
+        key = " ".join(words[i:])[:MAX_KEY_LENGTH]
+        if key:
+            keys.add(key)
+    return keys
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return 0.0
+
+
+class PrefixIndex:
+    """정렬된 (키, 항목 ID) 배열 + 접두사별 상위 k 캐시"""
+
+    def __init__(self):
+        self._keys: List[Tuple[str, Hashable]] = []
+        self._entries: Dict[Hashable, Tuple[float, Set[str], Dict[str, Any]]] = {}
+        self._top_cache: Dict[str, List[Tuple[float, Hashable]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def upsert(self, entry_id: Hashable, texts: List[str], score: float, payload: Dict[str, Any]) -> None:
+        keys = set()
+        for text in texts:
+            keys |= suggest_keys(text)
+        old = self._entries.get(entry_id)
+        old_score, old_keys = (old[0], old[1]) if old else (None, set())
+
+        for key in old_keys - keys:
+            i = bisect_left(self._keys, (key, entry_id))
+            if i < len(self._keys) and self._keys[i] == (key, entry_id):
+                del self._keys[i]
+        for key in keys - old_keys:
+            insort(self._keys, (key, entry_id))
+
+        if not keys:
+            self._entries.pop(entry_id, None)
+        else:
+            self._entries[entry_id] = (score, keys, payload)
+        self._update_cache(entry_id, old_keys, keys, old_score, score)
+
+    def remove(self, entry_id: Hashable) -> None:
+        if entry_id in self._entries:
+            self.upsert(entry_id, [], 0.0, {})
+
+    def _update_cache(self, entry_id, old_keys, new_keys, old_score, new_score) -> None:
+        if not self._top_cache:
+            return
+        new_prefixes = {k[:n] for k in new_keys for n in range(1, len(k) + 1)}
+        old_prefixes = {k[:n] for k in old_keys for n in range(1, len(k) + 1)}
+        for prefix in old_prefixes | new_prefixes:
+            top = self._top_cache.get(prefix)
+            if top is None:
+                continue
+            was_member = any(e == entry_id for _, e in top)
+            still_matches = prefix in new_prefixes
+            if was_member:
+                if not still_matches or new_score < old_score:
+                    # 캐시 밖의 더 높은 항목이 올라와야 할 수 있으므로 다시 계산
+                    del self._top_cache[prefix]
+                    continue
+                top = [item for item in top if item[1] != entry_id]
+            if still_matches:
+                top.append((new_score, entry_id))
+                top.sort(key=lambda item: (-item[0], str(item[1])))
+                del top[MAX_SUGGESTIONS:]
+            self._top_cache[prefix] = top
+
+    def _scan(self, lo: int, hi: int, k: int) -> List[Tuple[float, Hashable]]:
+        entry_ids = {self._keys[i][1] for i in range(lo, hi)}
+        ranked = heapq.nsmallest(
+            k, entry_ids, key=lambda e: (-self._entries[e][0], str(e))
+        )
+        return [(self._entries[e][0], e) for e in ranked]
+
+    def warm(self, length: int = WARM_PREFIX_LENGTH) -> None:
+        """길이 length 이하의 큰 접두사 범위를 미리 캐시"""
+        for n in range(1, length + 1):
+            lo = 0
+            while lo < len(self._keys):
+                prefix = self._keys[lo][0][:n]
+                hi = bisect_left(self._keys, (prefix + _END,), lo)
+                if len(prefix) == n and hi - lo > SCAN_LIMIT:
+                    self._top_cache[prefix] = self._scan(lo, hi, MAX_SUGGESTIONS)
+                lo = hi
+
+    def top(self, prefix: str, k: int) -> List[Dict[str, Any]]:
+        prefix = prefix[:MAX_KEY_LENGTH]
+        top = self._top_cache.get(prefix)
+        if top is None:
+            lo = bisect_left(self._keys, (prefix,))
+            hi = bisect_left(self._keys, (prefix + _END,))
+            if hi - lo <= SCAN_LIMIT:
+                top = self._scan(lo, hi, k)
+            else:
+                top = self._scan(lo, hi, MAX_SUGGESTIONS)
+                self._top_cache[prefix] = top
+        return [self._entries[e][2] for _, e in top[:k]]
+
+
+class SuggestIndex:
+    """종류별 PrefixIndex 묶음. 변경 피드로 증분 갱신됩니다."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._indexes = {kind: PrefixIndex() for kind in SUGGEST_KINDS}
+        # 템플릿 ID -> (태그 목록, usage_count), 태그 -> [템플릿 수, usage 합]
+        self._template_tags: Dict[int, Tuple[Tuple[str, ...], int]] = {}
+        self._tag_stats: Dict[str, List[int]] = {}
+        self._cursor = ChangeLogCursor([Project.__tablename__, Task.__tablename__, Template.__tablename__])
+
+    # ---- 항목별 반영 ----
+    def _put_project(self, values: Dict[str, Any]) -> None:
+        self._indexes["projects"].upsert(
+            values["id"], [values.get("name") or ""], _timestamp(values.get("created_at")),
+            {"id": values["id"], "type": "project", "text": values.get("name")}
+        )
+
+    def _put_task(self, values: Dict[str, Any]) -> None:
+        self._indexes["tasks"].upsert(
+            values["id"], [values.get("title") or ""],
+            _timestamp(values.get("updated_at") or values.get("created_at")),
+            {"id": values["id"], "type": "task", "text": values.get("title"),
+             "project_id": values.get("project_id")}
+        )
+
+    def _put_template(self, values: Dict[str, Any]) -> None:
+        usage = values.get("usage_count") or 0
+        self._indexes["templates"].upsert(
+            values["id"], [values.get("name") or ""], float(usage),
+            {"id": values["id"], "type": "template", "text": values.get("name"),
+             "usage_count": usage}
+        )
+        self._set_template_tags(values["id"], tuple(dict.fromkeys(values.get("tags") or ())), usage)
+
+    def _remove_template(self, template_id: int) -> None:
+        self._indexes["templates"].remove(template_id)
+        self._set_template_tags(template_id, (), 0)
+
+    def _set_template_tags(self, template_id: int, tags: Tuple[str, ...], usage: int) -> None:
+        old_tags, old_usage = self._template_tags.pop(template_id, ((), 0))
+        if tags:
+            self._template_tags[template_id] = (tags, usage)
+        touched = set(old_tags) | set(tags)
+        for tag in touched:
+            stats = self._tag_stats.setdefault(tag, [0, 0])
+            if tag in old_tags:
+                stats[0] -= 1
+                stats[1] -= old_usage
+            if tag in tags:
+                stats[0] += 1
+                stats[1] += usage
+            if stats[0] <= 0:
+                del self._tag_stats[tag]
+                self._indexes["tags"].remove(tag)
+            else:
+                self._indexes["tags"].upsert(
+                    tag, [tag], float(stats[1] + stats[0]),
+                    {"type": "tag", "text": tag, "template_count": stats[0]}
+                )
+
+    def on_changes(self, batch: List[changes.Change]) -> None:
+        with self._lock:
+            if not self._built:
+                return
+            for change in batch:
+                if change.table == Project.__tablename__:
+                    if change.op == changes.DELETE:
+                        self._indexes["projects"].remove(change.id)
+                    else:
+                        self._put_project(change.values)
+                elif change.table == Task.__tablename__:
+                    if change.op == changes.DELETE:
+                        self._indexes["tasks"].remove(change.id)
+                    else:
+                        self._put_task(change.values)
+                elif change.table == Template.__tablename__:
+                    if change.op == changes.DELETE:
+                        self._remove_template(change.id)
+                    else:
+                        self._put_template(change.values)
+
+    def _load_projects(self, session: Session, ids: Optional[Set[int]] = None) -> Set[int]:
+        query = select(Project.id, Project.name, Project.created_at)
+        if ids is not None:
+            query = query.where(Project.id.in_(list(ids)))
+        found = set()
+        for row_id, name, created_at in session.exec(query).all():
+            found.add(row_id)
+            self._put_project({"id": row_id, "name": name, "created_at": created_at})
+        return found
+
+    def _load_tasks(self, session: Session, ids: Optional[Set[int]] = None) -> Set[int]:
+        query = select(Task.id, Task.title, Task.project_id, Task.created_at, Task.updated_at)
+        if ids is not None:
+            query = query.where(Task.id.in_(list(ids)))
+        found = set()
+        for row_id, title, project_id, created_at, updated_at in session.exec(query).all():
+            found.add(row_id)
+            self._put_task({"id": row_id, "title": title, "project_id": project_id,
+                            "created_at": created_at, "updated_at": updated_at})
+        return found
+
+    def _load_templates(self, session: Session, ids: Optional[Set[int]] = None) -> Set[int]:
+        query = select(Template.id, Template.name, Template.tags, Template.usage_count)
+        if ids is not None:
+            query = query.where(Template.id.in_(list(ids)))
+        found = set()
+        for row_id, name, tags, usage_count in session.exec(query).all():
+            found.add(row_id)
+            self._put_template({"id": row_id, "name": name, "tags": tags, "usage_count": usage_count})
+        return found
+
+    def _catch_up(self, session: Session) -> None:
+        changed = self._cursor.pending(session)
+        if changed is None:
+            # 놓친 변경이 있을 수 있어 전체를 다시 만듭니다
+            self._built = False
+            self._indexes = {kind: PrefixIndex() for kind in SUGGEST_KINDS}
+            self._template_tags = {}
+            self._tag_stats = {}
+            return
+        ids = changed.get(Project.__tablename__)
+        if ids:
+            for row_id in ids - self._load_projects(session, ids):
+                self._indexes["projects"].remove(row_id)
+        ids = changed.get(Task.__tablename__)
+        if ids:
+            for row_id in ids - self._load_tasks(session, ids):
+                self._indexes["tasks"].remove(row_id)
+        ids = changed.get(Template.__tablename__)
+        if ids:
+            for row_id in ids - self._load_templates(session, ids):
+                self._remove_template(row_id)
+
+    def ensure_built(self, session: Session) -> None:
+        """처음 사용할 때 전체 색인, 이후에는 다른 워커의 변경을 따라잡습니다."""
+        with self._lock:
+            if self._built:
+                self._catch_up(session)
+            if self._built:
+                return
+            self._cursor.start(session)
+            self._load_projects(session)
+            self._load_tasks(session)
+            self._load_templates(session)
+            for index in self._indexes.values():
+                index.warm()
+            self._built = True
+
+    # ---- 조회 ----
+    def suggest(
+        self,
+        prefix: str,
+        kinds: Optional[List[str]] = None,
+        limit: int = 10
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """종류별 접두사 일치 상위 limit개"""
+        prefix = " ".join(normalize(prefix).split())
+        limit = min(limit, MAX_SUGGESTIONS)
+        if not prefix:
+            return {kind: [] for kind in kinds or SUGGEST_KINDS}
+        with self._lock:
+            return {kind: self._indexes[kind].top(prefix, limit) for kind in kinds or SUGGEST_KINDS}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {kind: len(index) for kind, index in self._indexes.items()}
+
+
+suggest_index = SuggestIndex()
+changes.subscribe(suggest_index.on_changes)
@@ -1,11 +1,12 @@
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
-from sqlmodel import Session, select, func
+from sqlmodel import Session, select
 from app.models import (
     Template, TemplateUsage, BestPractice, 
     TemplateCategory, TemplateType,
     Project, Task, Brief, DoD, TaskState
 )
+from app.services.content_stats import content_stats
 
 class TemplateService:
     def __init__(self, session: Session):
@@ -423,21 +424,16 @@ class TemplateService:
     
     def get_template_stats(self) -> Dict[str, Any]:
         """템플릿 통계"""
-        total_templates = self.session.exec(select(func.count(Template.id))).first() or 0
-        system_templates = self.session.exec(
-            select(func.count(Template.id)).where(Template.is_system_template == True)
-        ).first() or 0
-        ai_templates = self.session.exec(
-            select(func.count(Template.id)).where(Template.is_ai_generated == True)
-        ).first() or 0
+        counts = content_stats.counts(self.session)
+        total_templates = counts.get("templates", 0)
+        system_templates = counts.get("templates.system", 0)
+        ai_templates = counts.get("templates.ai_generated", 0)
         
         # 카테고리별 분포
-        category_stats = {}
-        for category in TemplateCategory:
-            count = self.session.exec(
-                select(func.count(Template.id)).where(Template.category == category)
-            ).first() or 0
-            category_stats[category.value] = count
+        category_stats = {
+            category.value: counts.get(f"templates.category.{category.value}", 0)
+            for category in TemplateCategory
+        }
         
         return {
             "total_templates": total_templates,
@@ -0,0 +1,52 @@
+"""검색/색인용 텍스트 정규화 유틸리티"""
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+_WORD_RE = re.compile(r'[가-힣a-zA-Z0-9]+')
+
+
+def normalize(text: str) -> str:
+    """NFC 정규화 + 소문자 변환 (한글 자모 분리 입력도 완성형으로 맞춤)"""
+    if not text:
+        return ""
+    return unicodedata.normalize("NFC", text).lower()
+
+
+def tokenize(text: str, min_length: int = 2) -> List[str]:
+    """한글, 영문, 숫자 단어 토큰 추출"""
+    return [w for w in _WORD_RE.findall(normalize(text)) if len(w) >= min_length]
+
+
+def tokenize_with_offsets(text: str, min_length: int = 1) -> List[Tuple[str, int]]:
+    """(단어, 정규화된 텍스트 안의 문자 오프셋) 목록"""
+    return [
+        (m.group(), m.start()) for m in _WORD_RE.finditer(normalize(text))
+        if len(m.group()) >= min_length
+    ]
+
+
+def _starts_segment(ch: str) -> bool:
+    # 조합 문자와 한글 중성/종성 자모는 앞 글자와 NFC로 합쳐질 수 있으므로 새 구간을 시작하지 않습니다
+    code = ord(ch)
+    return unicodedata.combining(ch) == 0 and not (0x1160 <= code <= 0x11FF or 0xD7B0 <= code <= 0xD7FF)
+
+
+def normalized_spans(text: str) -> Optional[List[Tuple[int, int]]]:
+    """
+    normalize(text) 의 각 글자가 원문에서 차지하는 (시작, 끝) 구간
+
+    정규화해도 글자 수가 그대로인 경우(대부분)는 None 을 반환하며 오프셋을 그대로 쓰면 됩니다.
+    자모 분리(NFD)로 입력된 한글처럼 글자 수가 바뀌는 경우에만 구간별 대응표를 만듭니다.
+    """
+    if not text:
+        return None
+    if unicodedata.is_normalized("NFC", text) and len(text.lower()) == len(text):
+        return None
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    for i in range(1, len(text) + 1):
+        if i == len(text) or _starts_segment(text[i]):
+            spans.extend([(start, i)] * len(normalize(text[start:i])))
+            start = i
+    return spans
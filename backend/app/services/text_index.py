@@ -0,0 +1,624 @@
+"""
+디스크에 저장되는 위치 정보 포함 역색인 (positional inverted index)
+
+검색 대상 필드(search_documents.CONTENT_TYPES)의 단어별로 (문서, 필드, 문자 오프셋 목록)을
+저장합니다. 워커가 시작할 때마다 DB 전체를 다시 읽지 않도록 색인을 하나의 바이너리 세그먼트
+파일로 저장하고, 각 워커는 mmap으로 열어 페이지 캐시를 공유합니다.
+
+세그먼트 파일 구성 (little-endian, 각 구역은 8바이트 정렬):
+- 헤더: 매직/버전, 워터마크(ChangeLog.id), 문서 수, 단어 수, 각 구역 오프셋
+- 문서 테이블: int64[문서 수] = (콘텐츠 타입 코드 << 48) | 행 ID, 오름차순 (인덱스가 문서 번호)
+- 단어 사전: 정렬된 단어들의 UTF-8 blob + uint64[단어 수 + 1] 오프셋
+- posting: uint64[단어 수 + 1] 오프셋 + varint blob.
+  항목마다 (문서 번호 증분, 필드 번호, 위치 수, 위치 증분...) 를 기록합니다.
+
+세그먼트 이후의 변경은 ChangeLog에서 워터마크 이후 행만 읽어 메모리 overlay로 반영하고,
+overlay가 커지면 새 세그먼트로 합쳐 원자적으로 교체합니다 (다른 워커는 파일 교체를 감지해 다시 엽니다).
+"""
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import delete
+from sqlmodel import Session, func, select
+
+from app.core.config import settings
+from app.db import changes
+from app.models import ChangeLog
+from app.services.change_log import min_consumer_position
+from app.services.search_documents import (
+    ALL_CONTENT_TYPES, CONTENT_TYPES, TABLE_CONTENT_TYPES, iter_documents
+)
+from app.services.text import tokenize_with_offsets
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MAGIC = b"POIDX001"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIqQQQQQQQ")
+# overlay 문서 수가 이 값과 기존 세그먼트의 10% 중 큰 값을 넘으면 새 세그먼트로 합칩니다
+COMPACT_MIN_DOCS = 2000
+# 한 번에 다시 읽을 변경 행 수
+REFRESH_BATCH = 500
+# 접두사 확장 시 문서 빈도를 비교해 볼 사전 단어 수
+PREFIX_SCAN_LIMIT = 256
+
+_TYPE_CODES = {t: i for i, t in enumerate(ALL_CONTENT_TYPES)}
+_ID_BITS = 48
+_ID_MASK = (1 << _ID_BITS) - 1
+
+DocKey = Tuple[str, int]
+# 필드 번호 -> 문자 오프셋 목록
+FieldPositions = Dict[int, List[int]]
+
+logger = logging.getLogger(__name__)
+
+changes.log_durably(ChangeLog.__table__, TABLE_CONTENT_TYPES)
+
+
+def _encode_doc(key: DocKey) -> int:
+    return (_TYPE_CODES[key[0]] << _ID_BITS) | key[1]
+
+
+def _decode_doc(value: int) -> DocKey:
+    return ALL_CONTENT_TYPES[value >> _ID_BITS], value & _ID_MASK
+
+
+def field_names(content_type: str) -> Tuple[str, ...]:
+    return CONTENT_TYPES[content_type][1]
+
+
+# ---- varint ----
+def _put_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_postings(entries: Iterable[Tuple[int, int, List[int]]]) -> bytes:
+    """(문서 번호, 필드 번호, 오프셋 목록) 를 문서 번호/필드 순으로 받아 증분 varint로 인코딩"""
+    out = bytearray()
+    previous_doc = 0
+    for doc, field, offsets in entries:
+        _put_varint(out, doc - previous_doc)
+        previous_doc = doc
+        _put_varint(out, field)
+        _put_varint(out, len(offsets))
+        previous_offset = 0
+        for offset in offsets:
+            _put_varint(out, offset - previous_offset)
+            previous_offset = offset
+    return bytes(out)
+
+
+def decode_postings(buf, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int, List[int]]]:
+    end = len(buf) if end is None else end
+    pos = start
+    doc = 0
+    while pos < end:
+        delta, pos = _read_varint(buf, pos)
+        doc += delta
+        field, pos = _read_varint(buf, pos)
+        count, pos = _read_varint(buf, pos)
+        offsets = []
+        offset = 0
+        for _ in range(count):
+            delta, pos = _read_varint(buf, pos)
+            offset += delta
+            offsets.append(offset)
+        yield doc, field, offsets
+
+
+def _align(out: bytearray) -> int:
+    out.extend(b"\0" * (-len(out) % 8))
+    return len(out)
+
+
+def write_segment(
+    path: str,
+    watermark: int,
+    doc_values: np.ndarray,
+    terms: List[str],
+    postings: List[bytes]
+) -> None:
+    """세그먼트 파일을 임시 파일에 쓰고 원자적으로 교체"""
+    out = bytearray(HEADER.size)
+    docs_offset = _align(out)
+    out.extend(doc_values.astype("<i8").tobytes())
+
+    term_blob = bytearray()
+    term_offsets = [0]
+    for term in terms:
+        term_blob.extend(term.encode("utf-8"))
+        term_offsets.append(len(term_blob))
+    term_offsets_offset = _align(out)
+    out.extend(np.asarray(term_offsets, dtype="<u8").tobytes())
+    term_blob_offset = len(out)
+    out.extend(term_blob)
+
+    posting_offsets = [0]
+    total = 0
+    for blob in postings:
+        total += len(blob)
+        posting_offsets.append(total)
+    posting_offsets_offset = _align(out)
+    out.extend(np.asarray(posting_offsets, dtype="<u8").tobytes())
+    postings_offset = len(out)
+    for blob in postings:
+        out.extend(blob)
+
+    out[:HEADER.size] = HEADER.pack(
+        MAGIC, FORMAT_VERSION, watermark, len(doc_values), len(terms),
+        docs_offset, term_offsets_offset, term_blob_offset, posting_offsets_offset, postings_offset
+    )
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(out)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _exclusive_file_lock(path: str, blocking: bool) -> Iterator[bool]:
+    """
+    워커 간 배타 잠금 (POSIX 는 flock, Windows 는 msvcrt.locking 으로 첫 바이트 잠금).
+    잡았으면 True, blocking=False 인데 다른 워커가 잡고 있으면 False 를 내줍니다.
+    """
+    with open(path, "a+") as lock_file:
+        fd = lock_file.fileno()
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            return
+
+        while True:
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if not blocking:
+                    yield False
+                    return
+                time.sleep(0.1)
+        try:
+            yield True
+        finally:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class Segment:
+    """mmap으로 연 읽기 전용 세그먼트"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.stat_key = (os.fstat(f.fileno()).st_ino, os.fstat(f.fileno()).st_mtime_ns)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.watermark, n_docs, n_terms, docs_offset, term_offsets_offset,
+         self._term_blob_offset, posting_offsets_offset, self._postings_offset) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"unsupported index segment: {path}")
+        self.doc_values = np.frombuffer(self._mmap, dtype="<i8", count=n_docs, offset=docs_offset)
+        self._term_offsets = np.frombuffer(self._mmap, dtype="<u8", count=n_terms + 1, offset=term_offsets_offset)
+        self._posting_offsets = np.frombuffer(self._mmap, dtype="<u8", count=n_terms + 1, offset=posting_offsets_offset)
+        self.n_terms = n_terms
+
+    def term(self, i: int) -> str:
+        start = self._term_blob_offset + int(self._term_offsets[i])
+        end = self._term_blob_offset + int(self._term_offsets[i + 1])
+        return self._mmap[start:end].decode("utf-8")
+
+    def terms(self) -> List[str]:
+        blob = self._mmap[self._term_blob_offset:self._term_blob_offset + int(self._term_offsets[-1])]
+        offsets = self._term_offsets.tolist()
+        return [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.n_terms)]
+
+    def _lower_bound(self, term: str) -> int:
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term(mid) < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_term(self, term: str) -> Optional[int]:
+        i = self._lower_bound(term)
+        return i if i < self.n_terms and self.term(i) == term else None
+
+    def terms_with_prefix(self, prefix: str, limit: int) -> List[str]:
+        found = []
+        i = self._lower_bound(prefix)
+        while i < self.n_terms and len(found) < limit:
+            term = self.term(i)
+            if not term.startswith(prefix):
+                break
+            found.append(term)
+            i += 1
+        return found
+
+    def document_frequency(self, term_index: int) -> int:
+        """단어가 나오는 문서 수 (posting 항목은 문서/필드 순이라 문서 번호가 바뀌는 횟수)"""
+        count = 0
+        previous = None
+        for doc, _, _ in self.postings(term_index):
+            if doc != previous:
+                count += 1
+                previous = doc
+        return count
+
+    def postings(self, term_index: int) -> Iterator[Tuple[int, int, List[int]]]:
+        start = self._postings_offset + int(self._posting_offsets[term_index])
+        end = self._postings_offset + int(self._posting_offsets[term_index + 1])
+        return decode_postings(self._mmap, start, end)
+
+    def doc_ordinal(self, key: DocKey) -> Optional[int]:
+        value = _encode_doc(key)
+        i = int(np.searchsorted(self.doc_values, value))
+        return i if i < len(self.doc_values) and self.doc_values[i] == value else None
+
+    def close(self) -> None:
+        self.doc_values = self._term_offsets = self._posting_offsets = None
+        self._mmap.close()
+
+
+class EmptySegment:
+    path = None
+    stat_key = None
+    watermark = 0
+    n_terms = 0
+    doc_values = np.zeros(0, dtype="<i8")
+
+    def terms(self) -> List[str]:
+        return []
+
+    def find_term(self, term: str) -> Optional[int]:
+        return None
+
+    def terms_with_prefix(self, prefix: str, limit: int) -> List[str]:
+        return []
+
+    def postings(self, term_index: int):
+        return iter(())
+
+    def document_frequency(self, term_index: int) -> int:
+        return 0
+
+    def doc_ordinal(self, key: DocKey) -> Optional[int]:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class TextIndex:
+    """세그먼트 + 메모리 overlay 로 구성된 역색인"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, "text_index.bin")
+        self._lock = threading.RLock()
+        self._ready = False
+        self._segment = EmptySegment()
+        self._applied_id = 0
+        self._previous_watermark = 0
+        # 세그먼트 문서 중 overlay로 대체되었거나 삭제된 문서 번호
+        self._superseded: Set[int] = set()
+        # overlay: 문서 -> 단어 -> 필드별 오프셋, 단어 -> overlay 문서 집합
+        self._overlay_docs: Dict[DocKey, Dict[str, FieldPositions]] = {}
+        self._overlay_terms: Dict[str, Set[DocKey]] = defaultdict(set)
+        # 단어 사전 변경 추적 (trigram 색인 등 파생 색인용)
+        self.generation = 0
+        self._new_terms: List[str] = []
+        # 세그먼트 단어 번호 -> 문서 빈도 (세그먼트는 바뀌지 않으므로 다시 열 때까지 유지)
+        self._segment_df: Dict[int, int] = {}
+
+    # ---- 열기 / 따라잡기 ----
+    def ensure_ready(self, session: Session) -> None:
+        """세그먼트를 열고 (없으면 DB에서 만들고) 워터마크 이후의 변경을 반영"""
+        with self._lock:
+            if not self._ready:
+                os.makedirs(self.directory, exist_ok=True)
+                if not self._open_segment():
+                    self._build(session)
+                self._ready = True
+            elif self._segment_replaced():
+                self._open_segment()
+            self._catch_up(session)
+
+    def _segment_replaced(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns) != self._segment.stat_key
+
+    def _open_segment(self) -> bool:
+        try:
+            segment = Segment(self.path)
+        except (OSError, ValueError):
+            return False
+        self._segment.close()
+        self._segment = segment
+        self._applied_id = segment.watermark
+        self._superseded = set()
+        self._overlay_docs = {}
+        self._overlay_terms = defaultdict(set)
+        self.generation += 1
+        self._new_terms = []
+        self._segment_df = {}
+        return True
+
+    def _build(self, session: Session) -> None:
+        # 워터마크를 먼저 읽어 두면, 스캔 중에 들어온 변경은 이후 따라잡기에서 다시 반영됩니다
+        watermark = session.exec(select(func.max(ChangeLog.id))).one() or 0
+        for content_type, row_id, fields in iter_documents(session):
+            self._put((content_type, row_id), fields)
+        self._applied_id = watermark
+        self._compact(force=True)
+
+    def _catch_up(self, session: Session) -> None:
+        while True:
+            entries = session.exec(
+                select(ChangeLog.id, ChangeLog.table_name, ChangeLog.row_id)
+                .where(ChangeLog.id > self._applied_id)
+                .order_by(ChangeLog.id)
+                .limit(REFRESH_BATCH)
+            ).all()
+            if not entries:
+                break
+            keys_by_type: Dict[str, Set[int]] = defaultdict(set)
+            for _, table_name, row_id in entries:
+                content_type = TABLE_CONTENT_TYPES.get(table_name)
+                if content_type is not None:
+                    keys_by_type[content_type].add(row_id)
+            for content_type, row_ids in keys_by_type.items():
+                model, fields = CONTENT_TYPES[content_type]
+                rows = session.exec(
+                    select(model.id, *[getattr(model, f) for f in fields]).where(model.id.in_(row_ids))
+                ).all()
+                found = set()
+                for row_id, *texts in rows:
+                    found.add(row_id)
+                    self._put((content_type, row_id), {f: t or "" for f, t in zip(fields, texts)})
+                for row_id in row_ids - found:
+                    self._remove((content_type, row_id))
+            self._applied_id = entries[-1][0]
+        self._maybe_compact(session)
+
+    # ---- overlay ----
+    def _put(self, key: DocKey, fields: Dict[str, str]) -> None:
+        self._remove(key)
+        term_positions: Dict[str, FieldPositions] = defaultdict(lambda: defaultdict(list))
+        for field_id, name in enumerate(field_names(key[0])):
+            for term, offset in tokenize_with_offsets(fields.get(name) or ""):
+                term_positions[term][field_id].append(offset)
+        self._overlay_docs[key] = {t: dict(p) for t, p in term_positions.items()}
+        for term in term_positions:
+            if term not in self._overlay_terms and self._segment.find_term(term) is None:
+                self._new_terms.append(term)
+            self._overlay_terms[term].add(key)
+
+    def _remove(self, key: DocKey) -> None:
+        ordinal = self._segment.doc_ordinal(key)
+        if ordinal is not None:
+            self._superseded.add(ordinal)
+        for term in self._overlay_docs.pop(key, {}):
+            docs = self._overlay_terms.get(term)
+            if docs is not None:
+                docs.discard(key)
+                if not docs:
+                    del self._overlay_terms[term]
+
+    # ---- 합치기 ----
+    def _maybe_compact(self, session: Session) -> None:
+        threshold = max(COMPACT_MIN_DOCS, len(self._segment.doc_values) // 10)
+        if len(self._overlay_docs) + len(self._superseded) > threshold:
+            self._compact()
+            self._prune_log(session)
+
+    def _compact(self, force: bool = False) -> None:
+        with _exclusive_file_lock(f"{self.path}.lock", blocking=force) as locked:
+            if not locked:
+                # 다른 워커가 합치는 중: 그 결과를 다음 따라잡기에서 엽니다
+                return
+            self._write_merged()
+        self._open_segment()
+
+    def _write_merged(self) -> None:
+        segment = self._segment
+        base_values = segment.doc_values
+        keep = np.ones(len(base_values), dtype=bool)
+        if self._superseded:
+            keep[list(self._superseded)] = False
+        overlay_values = np.array(sorted(_encode_doc(k) for k in self._overlay_docs), dtype="<i8")
+        doc_values = np.union1d(base_values[keep], overlay_values)
+        base_remap = np.full(len(base_values), -1, dtype=np.int64)
+        base_remap[keep] = np.searchsorted(doc_values, base_values[keep])
+
+        terms = sorted(set(segment.terms()) | set(self._overlay_terms))
+        postings = []
+        for term in terms:
+            entries = []
+            term_index = segment.find_term(term)
+            if term_index is not None:
+                for doc, field, offsets in segment.postings(term_index):
+                    new_doc = base_remap[doc]
+                    if new_doc >= 0:
+                        entries.append((int(new_doc), field, offsets))
+            for key in self._overlay_terms.get(term, ()):
+                new_doc = int(np.searchsorted(doc_values, _encode_doc(key)))
+                for field, offsets in self._overlay_docs[key][term].items():
+                    entries.append((new_doc, field, offsets))
+            if entries:
+                entries.sort(key=lambda e: (e[0], e[1]))
+                postings.append((term, encode_postings(entries)))
+
+        write_segment(
+            self.path, self._applied_id, doc_values,
+            [t for t, _ in postings], [p for _, p in postings]
+        )
+        logger.info("text index segment written: %d docs, %d terms", len(doc_values), len(postings))
+
+    def _prune_log(self, session: Session) -> None:
+        # 한 세대 전 세그먼트의 워터마크까지만 지워, 아직 파일 교체를 못 본 워커도 따라잡을 수 있게 합니다
+        # (지속 소비자가 아직 처리하지 않은 구간은 남김)
+        if self._previous_watermark:
+            floor = self._previous_watermark
+            consumer_floor = min_consumer_position(session)
+            if consumer_floor is not None:
+                floor = min(floor, consumer_floor)
+            with session.get_bind().begin() as conn:
+                conn.execute(delete(ChangeLog).where(ChangeLog.id <= floor))
+        self._previous_watermark = self._segment.watermark
+
+    # ---- 조회 ----
+    def postings(self, term: str, content_types: Optional[Iterable[str]] = None) -> Dict[DocKey, FieldPositions]:
+        """단어의 {문서: {필드 번호: [오프셋...]}}"""
+        content_types = set(content_types or ALL_CONTENT_TYPES)
+        result: Dict[DocKey, FieldPositions] = {}
+        with self._lock:
+            term_index = self._segment.find_term(term)
+            if term_index is not None:
+                values = self._segment.doc_values
+                for doc, field, offsets in self._segment.postings(term_index):
+                    if doc in self._superseded:
+                        continue
+                    key = _decode_doc(int(values[doc]))
+                    if key[0] in content_types:
+                        result.setdefault(key, {})[field] = offsets
+            for key in self._overlay_terms.get(term, ()):
+                if key[0] in content_types:
+                    result[key] = dict(self._overlay_docs[key][term])
+        return result
+
+    def positions(
+        self,
+        keys: Iterable[DocKey],
+        terms: Iterable[str]
+    ) -> Dict[DocKey, Dict[int, List[Tuple[int, str]]]]:
+        """주어진 문서들에서 단어들이 나타난 위치 {문서: {필드 번호: [(오프셋, 단어), ...]}}"""
+        keys = set(keys)
+        result: Dict[DocKey, Dict[int, List[Tuple[int, str]]]] = defaultdict(lambda: defaultdict(list))
+        with self._lock:
+            ordinals = {}
+            for key in keys:
+                if key in self._overlay_docs:
+                    continue
+                ordinal = self._segment.doc_ordinal(key)
+                if ordinal is not None and ordinal not in self._superseded:
+                    ordinals[ordinal] = key
+            for term in terms:
+                term_index = self._segment.find_term(term) if ordinals else None
+                if term_index is not None:
+                    for doc, field, offsets in self._segment.postings(term_index):
+                        key = ordinals.get(doc)
+                        if key is not None:
+                            result[key][field].extend((o, term) for o in offsets)
+                for key in self._overlay_terms.get(term, ()):
+                    if key in keys:
+                        for field, offsets in self._overlay_docs[key][term].items():
+                            result[key][field].extend((o, term) for o in offsets)
+        for fields in result.values():
+            for hits in fields.values():
+                hits.sort()
+        return result
+
+    def terms_with_prefix(self, prefix: str, limit: int = 50) -> List[str]:
+        """prefix 로 시작하는 사전 단어 (최대 limit개)"""
+        with self._lock:
+            found = self._segment.terms_with_prefix(prefix, limit)
+            if len(found) < limit:
+                existing = set(found)
+                for term in self._overlay_terms:
+                    if term.startswith(prefix) and term not in existing:
+                        found.append(term)
+                        if len(found) >= limit:
+                            break
+            return found
+
+    def frequent_terms_with_prefix(self, prefix: str, limit: int, scan: int = PREFIX_SCAN_LIMIT) -> List[str]:
+        """prefix 로 시작하는 사전 단어 중 문서 빈도가 높은 limit개 (사전순 앞쪽 최대 scan개 중에서)"""
+        with self._lock:
+            candidates = self.terms_with_prefix(prefix, scan)
+            if len(candidates) <= limit:
+                return candidates
+            return sorted(candidates, key=lambda t: (-self._document_frequency(t), t))[:limit]
+
+    def _document_frequency(self, term: str) -> int:
+        df = len(self._overlay_terms.get(term, ()))
+        term_index = self._segment.find_term(term)
+        if term_index is not None:
+            cached = self._segment_df.get(term_index)
+            if cached is None:
+                cached = self._segment_df[term_index] = self._segment.document_frequency(term_index)
+            df += cached
+        return df
+
+    def docs(self, term: str, content_types: Optional[Iterable[str]] = None) -> Set[DocKey]:
+        return set(self.postings(term, content_types))
+
+    def terms(self) -> List[str]:
+        """현재 단어 사전 (세그먼트 + overlay에서 새로 생긴 단어)"""
+        with self._lock:
+            return self._segment.terms() + list(self._new_terms)
+
+    def new_terms_since(self, generation: int, position: int) -> Tuple[int, int, List[str]]:
+        """
+        파생 색인용 단어 사전 변경분
+
+        같은 세대이면 position 이후 새로 생긴 단어만, 세대가 바뀌었으면 전체 사전을 돌려줍니다.
+        Returns: (세대, 다음 position, 단어 목록)
+        """
+        with self._lock:
+            if generation != self.generation:
+                return self.generation, len(self._new_terms), self.terms()
+            return self.generation, len(self._new_terms), self._new_terms[position:]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "segment_docs": len(self._segment.doc_values),
+                "segment_terms": self._segment.n_terms,
+                "overlay_docs": len(self._overlay_docs),
+                "superseded_docs": len(self._superseded),
+                "watermark": self._segment.watermark,
+                "applied_change_id": self._applied_id,
+            }
+
+
+text_index = TextIndex(os.path.join(settings.SEARCH_INDEX_DIR, "text"))
@@ -0,0 +1,121 @@
+"""
+분 단위 계층형 타이밍 휠
+
+예약 시각이 된 항목을 주기적인 DB 조회 없이 꺼내기 위한 메모리 구조입니다.
+
+- 분 휠(60칸) / 시간 휠(24칸) / 일 휠(DAY_SLOTS칸) 세 단계이고, 그보다 먼 항목은 overflow 힙에 둡니다.
+- 추가/취소는 O(1): 항목이 들어 있는 칸(dict)을 ID로 기억해 두고 바로 넣고 뺍니다.
+- 시각을 한 분씩 진행하며, 시간/일 경계에서 윗단계 칸의 항목을 아랫단계로 내려보내고
+  분 휠의 현재 칸 항목을 만료로 돌려줍니다.
+
+시각은 epoch 기준 분(int)으로 다룹니다.
+"""
+import heapq
+from datetime import datetime, timezone
+from typing import Dict, Hashable, List, Optional, Tuple
+
+MINUTE_SLOTS = 60
+HOUR_SLOTS = 24
+DAY_SLOTS = 366
+MINUTES_PER_HOUR = 60
+MINUTES_PER_DAY = 1440
+# 이보다 오래 멈췄다가 진행하면 분 단위로 돌지 않고 남은 항목을 한 번에 다시 배치합니다
+MAX_STEP_MINUTES = 7 * MINUTES_PER_DAY
+
+
+def to_minute(value: datetime) -> int:
+    """datetime -> epoch 분 (tzinfo 없으면 UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() // 60)
+
+
+class TimingWheel:
+    def __init__(self, now_minute: int):
+        self.current = now_minute
+        self._minutes: List[Dict[Hashable, int]] = [{} for _ in range(MINUTE_SLOTS)]
+        self._hours: List[Dict[Hashable, int]] = [{} for _ in range(HOUR_SLOTS)]
+        self._days: List[Dict[Hashable, int]] = [{} for _ in range(DAY_SLOTS)]
+        self._overflow: List[Tuple[int, Hashable]] = []
+        self._overflow_items: Dict[Hashable, int] = {}
+        self._ready: Dict[Hashable, int] = {}
+        # 항목 ID -> 들어 있는 칸
+        self._slot_of: Dict[Hashable, Dict[Hashable, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slot_of) + len(self._overflow_items)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._slot_of or item in self._overflow_items
+
+    def _slot_for(self, due: int) -> Optional[Dict[Hashable, int]]:
+        delta = due - self.current
+        if delta <= 0:
+            return self._ready
+        if delta < MINUTE_SLOTS:
+            return self._minutes[due % MINUTE_SLOTS]
+        if delta < MINUTES_PER_DAY:
+            return self._hours[(due // MINUTES_PER_HOUR) % HOUR_SLOTS]
+        if delta < DAY_SLOTS * MINUTES_PER_DAY:
+            return self._days[(due // MINUTES_PER_DAY) % DAY_SLOTS]
+        return None
+
+    def add(self, item: Hashable, due: int) -> None:
+        """항목을 due 분에 예약 (이미 있으면 옮김)"""
+        self.cancel(item)
+        slot = self._slot_for(due)
+        if slot is None:
+            self._overflow_items[item] = due
+            heapq.heappush(self._overflow, (due, item))
+            return
+        slot[item] = due
+        self._slot_of[item] = slot
+
+    def cancel(self, item: Hashable) -> bool:
+        slot = self._slot_of.pop(item, None)
+        if slot is not None:
+            del slot[item]
+            return True
+        # overflow 힙에서는 지연 삭제 (꺼낼 때 _overflow_items 로 확인)
+        return self._overflow_items.pop(item, None) is not None
+
+    def _cascade(self, slot: Dict[Hashable, int]) -> None:
+        items = list(slot.items())
+        slot.clear()
+        for item, due in items:
+            del self._slot_of[item]
+            self.add(item, due)
+
+    def _pull_overflow(self) -> None:
+        horizon = self.current + DAY_SLOTS * MINUTES_PER_DAY
+        while self._overflow and self._overflow[0][0] < horizon:
+            due, item = heapq.heappop(self._overflow)
+            if self._overflow_items.get(item) == due:
+                del self._overflow_items[item]
+                self.add(item, due)
+
+    def _rebuild(self, now_minute: int) -> None:
+        items = [(item, due) for item, due in self._overflow_items.items()]
+        items += [(item, slot[item]) for item, slot in self._slot_of.items()]
+        self.__init__(now_minute)
+        for item, due in items:
+            self.add(item, due)
+
+    def advance(self, now_minute: int) -> List[Hashable]:
+        """now_minute 까지 진행하고 만료된 항목 ID 목록을 (예약 시각 순으로) 돌려줍니다."""
+        if now_minute - self.current > MAX_STEP_MINUTES:
+            self._rebuild(now_minute)
+        while self.current < now_minute:
+            self.current += 1
+            minute = self.current
+            if minute % MINUTES_PER_DAY == 0:
+                self._pull_overflow()
+                self._cascade(self._days[(minute // MINUTES_PER_DAY) % DAY_SLOTS])
+            if minute % MINUTES_PER_HOUR == 0:
+                self._cascade(self._hours[(minute // MINUTES_PER_HOUR) % HOUR_SLOTS])
+            self._cascade(self._minutes[minute % MINUTE_SLOTS])
+        expired = sorted(self._ready.items(), key=lambda entry: entry[1])
+        for item, _ in expired:
+            self._slot_of.pop(item, None)
+        self._ready.clear()
+        return [item for item, _ in expired]
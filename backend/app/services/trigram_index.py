@@ -0,0 +1,186 @@
+"""
+오타 허용 검색용 trigram 색인
+
+검색 대상 필드의 단어 사전(vocabulary)에 대해 pg_trgm 방식(단어 앞 공백 2칸,
+뒤 공백 1칸 패딩)의 trigram 역색인을 유지합니다.
+
+조회 흐름:
+1. 검색어 단어별 trigram 겹침 수로 후보 단어를 뽑고 (q-gram 하한으로 누락 없이 가지치기)
+2. 후보 단어와 검색어의 편집 거리를 상한(k) 안에서만 계산해 검증한 뒤
+3. 검증된 단어의 문서 posting을 합쳐 모든 검색어 단어를 만족하는 문서를 반환합니다.
+
+단어 사전과 posting은 디스크에 저장된 역색인(text_index)에서 가져오므로, 시작 시 DB를 다시
+읽지 않고 단어 사전만으로 trigram 색인을 만듭니다. 문서 전체 텍스트를 훑지 않고 단어 사전 크기에
+비례하는 비용으로 동작합니다.
+"""
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlmodel import Session
+
+from app.services.search_documents import ALL_CONTENT_TYPES
+from app.services.text import tokenize
+from app.services.text_index import text_index
+
+# 단어별 검증할 최대 후보 단어 수
+MAX_CANDIDATE_WORDS = 2000
+
+DocKey = Tuple[str, int]
+
+
+def word_trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(word: str) -> int:
+    """검색어 단어 길이에 따른 허용 편집 거리"""
+    if len(word) <= 1:
+        return 0
+    if len(word) <= 5:
+        return 1
+    return 2
+
+
+def bounded_prefix_distance(query: str, word: str, k: int) -> Optional[int]:
+    """
+    query 와 word 의 접두사들 사이 최소 편집 거리 (k 초과 시 None)
+
+    한국어 조사/어미처럼 단어 뒤에 붙는 부분은 비용 없이 무시합니다 ("설게" ~ "설계를").
+    """
+    if len(word) + k < len(query):
+        return None
+    previous = list(range(len(word) + 1))
+    for i, qc in enumerate(query, 1):
+        current = [i] + [0] * len(word)
+        row_min = i
+        for j, wc in enumerate(word, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (qc != wc)
+            )
+            row_min = min(row_min, current[j])
+        if row_min > k:
+            return None
+        previous = current
+    best = min(previous)
+    return best if best <= k else None
+
+
+class TrigramIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._generation: Optional[int] = None
+        self._position = 0
+        self._word_ids: Dict[str, int] = {}
+        self._words: List[str] = []
+        self._trigram_words: Dict[str, Set[int]] = defaultdict(set)
+
+    # ---- 색인 ----
+    def _add_word(self, word: str) -> None:
+        if word in self._word_ids:
+            return
+        word_id = len(self._words)
+        self._words.append(word)
+        self._word_ids[word] = word_id
+        for trigram in word_trigrams(word):
+            self._trigram_words[trigram].add(word_id)
+
+    def ensure_built(self, session: Session) -> None:
+        """역색인을 최신으로 맞추고, 새로 생긴 단어만 trigram 색인에 추가"""
+        text_index.ensure_ready(session)
+        with self._lock:
+            generation, position, words = text_index.new_terms_since(
+                self._generation if self._generation is not None else -1, self._position
+            )
+            if generation != self._generation:
+                # 세그먼트가 새로 합쳐지면 사전에서 사라진 단어를 정리하기 위해 다시 만듭니다
+                self._word_ids = {}
+                self._words = []
+                self._trigram_words = defaultdict(set)
+            for word in words:
+                self._add_word(word)
+            self._generation, self._position = generation, position
+
+    # ---- 조회 ----
+    def _match_word(self, query_word: str) -> Dict[int, int]:
+        """검색어 단어와 편집 거리 k 이내인 사전 단어들 {word_id: distance}"""
+        exact = self._word_ids.get(query_word)
+        k = max_edits(query_word)
+        query_grams = word_trigrams(query_word)
+        # 편집 1회는 trigram을 최대 3개 바꾸고, 접두사 매칭은 끝 패딩 trigram 1개를 잃을 수 있음
+        min_overlap = max(1, len(query_grams) - 3 * k - 1)
+
+        overlap = Counter()
+        for trigram in query_grams:
+            overlap.update(self._trigram_words.get(trigram, ()))
+        candidates = [w for w, c in overlap.items() if c >= min_overlap]
+        if len(candidates) > MAX_CANDIDATE_WORDS:
+            candidates = sorted(candidates, key=lambda w: (-overlap[w], w))[:MAX_CANDIDATE_WORDS]
+
+        matches: Dict[int, int] = {}
+        if exact is not None:
+            matches[exact] = 0
+        for word_id in candidates:
+            if word_id in matches:
+                continue
+            distance = bounded_prefix_distance(query_word, self._words[word_id], k)
+            if distance is not None:
+                matches[word_id] = distance
+        return matches
+
+    def search(
+        self,
+        query: str,
+        content_types: Iterable[str] = None,
+        limit: int = 50
+    ) -> Tuple[Dict[str, List[Tuple[int, int]]], Dict[str, str]]:
+        """
+        오타 허용 검색
+
+        Returns:
+            ({content_type: [(id, total_distance), ...]}, {검색어 단어: 가장 가까운 사전 단어})
+        """
+        content_types = set(content_types or ALL_CONTENT_TYPES)
+        query_words = list(dict.fromkeys(tokenize(query, min_length=1)))
+        if not query_words:
+            return {}, {}
+
+        with self._lock:
+            doc_distance: Optional[Dict[DocKey, int]] = None
+            corrections: Dict[str, str] = {}
+            for query_word in query_words:
+                matches = self._match_word(query_word)
+                # 사전에 남아 있지만 더 이상 어떤 문서에도 없는 단어는 제외
+                docs_by_word = {w: text_index.docs(self._words[w], content_types) for w in matches}
+                matches = {w: d for w, d in matches.items() if docs_by_word[w]}
+                if not matches:
+                    return {}, {}
+                best = min(matches, key=lambda w: (matches[w], -len(docs_by_word[w]), self._words[w]))
+                corrections[query_word] = self._words[best]
+
+                word_docs: Dict[DocKey, int] = {}
+                for word_id, distance in matches.items():
+                    for key in docs_by_word[word_id]:
+                        if distance < word_docs.get(key, distance + 1):
+                            word_docs[key] = distance
+
+                if doc_distance is None:
+                    doc_distance = word_docs
+                else:
+                    doc_distance = {
+                        key: d + word_docs[key] for key, d in doc_distance.items() if key in word_docs
+                    }
+                if not doc_distance:
+                    return {}, corrections
+
+        grouped: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for (content_type, row_id), distance in sorted(doc_distance.items(), key=lambda x: (x[1], x[0])):
+            if len(grouped[content_type]) < limit:
+                grouped[content_type].append((row_id, distance))
+        return dict(grouped), corrections
+
+
+trigram_index = TrigramIndex()
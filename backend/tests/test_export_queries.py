@@ -0,0 +1,72 @@
+"""
+프로젝트 Markdown 내보내기 쿼리 수 (작업 수가 늘어도 배치당 쿼리 수가 고정인지)
+
+실제 DB 대신 임시 SQLite 파일을 쓰도록 app 을 불러오기 전에 환경 변수를 정합니다.
+"""
+import math
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="export-queries-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ["SEARCH_INDEX_DIR"] = os.path.join(_TMP_DIR, "search_index")
+os.environ["NOTIFICATION_SCHEDULER_ENABLED"] = "false"
+
+import pytest  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+
+import app.main  # noqa: E402,F401  (모델/변경 피드 구독 등록)
+from app.db.session import engine, init  # noqa: E402
+from app.export.markdown import EXPORT_BATCH_SIZE, iter_project_markdown  # noqa: E402
+from app.models import Project, Task, User  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def owner_id():
+    init()
+    with Session(engine) as session:
+        user = User(username="exporter", email="exporter@example.com")
+        session.add(user)
+        session.commit()
+        return user.id
+
+
+def _project_with_tasks(owner_id: int, count: int) -> int:
+    with Session(engine) as session:
+        project = Project(name=f"export {count}", owner_id=owner_id)
+        session.add(project)
+        session.commit()
+        project_id = project.id
+    if count:
+        with engine.begin() as connection:
+            connection.execute(insert(Task.__table__), [
+                {"project_id": project_id, "title": f"task {i}"} for i in range(count)
+            ])
+    return project_id
+
+
+def _count_statements(project_id: int) -> int:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        chunks = list(iter_project_markdown(project_id))
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert chunks
+    return len(statements)
+
+
+@pytest.mark.parametrize("count", [10, 1000])
+def test_export_statement_count_is_fixed_per_batch(owner_id, count):
+    project_id = _project_with_tasks(owner_id, count)
+    assert _count_statements(project_id) == 2 + 5 * math.ceil(count / EXPORT_BATCH_SIZE)
+
+
+def test_export_without_tasks_reads_no_batches(owner_id):
+    project_id = _project_with_tasks(owner_id, 0)
+    assert _count_statements(project_id) == 2